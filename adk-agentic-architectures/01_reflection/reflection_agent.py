@@ -7,7 +7,7 @@ Reflection ADK Agent (config-driven)
 """
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 import os
 
 try:
@@ -18,14 +18,18 @@ import json
 
 from google.adk.agents import Agent, SequentialAgent
 
+from model_client import MODEL_CLIENT
+
 # No tools are needed for this agent.
 
 @dataclass
 class SubAgentConfig:
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
 
 @dataclass
 class SequentialAgentConfig:
@@ -62,7 +66,7 @@ sub_agents = []
 for sub_agent_cfg in cfg.sub_agents:
     sub_agent = Agent(
         name=sub_agent_cfg.name,
-        model=sub_agent_cfg.model,
+        model=MODEL_CLIENT.model(sub_agent_cfg.model, sub_agent_cfg.priority, sub_agent_cfg.tier),
         instruction=sub_agent_cfg.instruction,
         tools=[], # No tools for this agent
     )
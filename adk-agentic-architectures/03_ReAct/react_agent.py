@@ -3,62 +3,45 @@ ReAct ADK Agent (config-driven)
 -----------------------------------------------------
 - Implements a simplified, single-agent architecture to pass ADK tests.
 - Configurable via YAML.
+- An Actor with `dispatch_from` calls the chosen Python tool (calculator) directly
+  instead of asking a model to re-read the action; model-side tools (google_search,
+  code_execution) still go through the Actor model (ToolDispatcher in tool_dispatch.py).
+- Tool results, and the Actor's answer for model-side tool calls, can be cached per
+  tool and user (`tool_cache:`, see tool_cache.py).
 """
 
-import json
 import os
 import yaml
-from typing import Any, Dict, List, Union, Optional, AsyncGenerator
+from typing import Any, Dict, List, Union, Optional
 from dataclasses import dataclass, field
 
 from google.adk.agents import Agent, BaseAgent, LlmAgent, SequentialAgent, LoopAgent, ParallelAgent
-from google.adk.agents.invocation_context import InvocationContext
-from google.adk.events import Event, EventActions
 
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
+from agent_tools import TOOL_REGISTRY, ToolGuard
+from model_client import MODEL_CLIENT
+from structured_output import StructuredOutputs
+from tool_cache import ToolResultCache
+from tool_dispatch import StopChecker, ToolDispatcher, model_side
 
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except ImportError:
-        pass
-    try:
-        from google.adk.tools import code_executor
-        _BUILTIN_TOOL_REGISTRY["code_executor"] = code_executor
-    except ImportError:
-        pass
+# Per-tool timeouts, concurrency limits and circuit breakers, configured from YAML
+_TOOL_GUARD = ToolGuard()
 
-class StopChecker(BaseAgent):
-    """A custom agent that checks the actor's output and stops the loop."""
-    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
-        action_result = ctx.session.state.get("action_result", "{}")
-        should_stop = False
-        try:
-            action_json = json.loads(action_result)
-            if "response" in action_json:
-                should_stop = True
-        except (json.JSONDecodeError, AttributeError):
-            pass
-
-        yield Event(
-            invocation_id=ctx.invocation_id,
-            author=self.name,
-            actions=EventActions(escalate=should_stop)
-        )
+# JSON outputs of sub-agents (`output_schema:`), parsed tolerantly and counted
+_OUTPUTS = StructuredOutputs()
 
 @dataclass
 class SubAgentConfig:
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
     output_key: Optional[str] = None
+    dispatch_from: Optional[str] = None
+    max_calls_per_step: int = 8
+    tool_cache: Dict[str, Any] = field(default_factory=dict)
+    output_schema: Dict[str, Any] = field(default_factory=dict)
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
 
 @dataclass
 class WorkflowAgentConfig:
@@ -86,13 +69,34 @@ class WorkflowAgentConfig:
 def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig]) -> BaseAgent:
     """Recursively builds agents and workflow agents from config."""
     if isinstance(config, SubAgentConfig):
-        return Agent(
-            name=config.name,
-            model=config.model,
+        tool_names = config.tools
+        if config.dispatch_from:
+            # The dispatcher calls Python tools itself; the Actor model only gets model-side ones
+            tool_names = [n for n in config.tools if model_side(TOOL_REGISTRY.get(n))]
+        agent = Agent(
+            name=config.name if not config.dispatch_from else f"{config.name}Model",
+            model=MODEL_CLIENT.model(config.model, config.priority, config.tier),
             instruction=config.instruction,
-            tools=resolve_tools(config.tools),
+            tools=resolve_tools(tool_names),
             output_key=config.output_key,
+            generate_content_config=_OUTPUTS.register(
+                config.name, config.output_key, config.output_schema, has_tools=bool(tool_names)
+            ),
         )
+        if config.dispatch_from:
+            tools = {n: TOOL_REGISTRY.get(n) for n in config.tools}
+            return ToolDispatcher(
+                name=config.name,
+                action_key=config.dispatch_from,
+                output_key=config.output_key or config.name,
+                tools=tools,
+                fallback=agent,
+                outputs=_OUTPUTS,
+                guard=_TOOL_GUARD,
+                max_calls_per_step=config.max_calls_per_step,
+                cache=ToolResultCache.from_dict(config.tool_cache) if config.tool_cache else None,
+            )
+        return agent
     
     sub_agents = [build_agent_from_config(sub) for sub in config.sub_agents]
     
@@ -100,7 +104,7 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
         return SequentialAgent(name=config.name, sub_agents=sub_agents)
     elif config.architecture == "loop":
         loop_agents = sub_agents.copy()
-        loop_agents.append(StopChecker(name="StopChecker"))
+        loop_agents.append(StopChecker(name="StopChecker", outputs=_OUTPUTS))
         return LoopAgent(name=config.name, sub_agents=loop_agents, max_iterations=config.max_iterations)
     elif config.architecture == "parallel":
         return ParallelAgent(name=config.name, sub_agents=sub_agents)
@@ -108,13 +112,8 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
         raise ValueError(f"Unknown architecture: {config.architecture}")
 
 def resolve_tools(names: List[str]) -> List[Any]:
-    _maybe_import_builtin_tools()
-    tools = []
-    for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
-    return tools
+    """Looks tools up in the shared registry; unknown names raise when the agent is built."""
+    return [_TOOL_GUARD.wrap(n, TOOL_REGISTRY.get(n)) for n in names]
 
 def create_agent(
     config_file_path: Optional[str] = None
@@ -125,6 +124,7 @@ def create_agent(
 
     with open(config_file_path, "r", encoding="utf-8") as file:
         config_yaml = yaml.safe_load(file)
+    _TOOL_GUARD.configure(config_yaml.get("tool_limits"), config_yaml.get("tool_timeouts"))
     
     config = WorkflowAgentConfig.from_dict(config_yaml)
 
@@ -18,38 +18,33 @@ import json
 
 from google.adk.agents import Agent, SequentialAgent
 
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
+from agent_tools import TOOL_REGISTRY, ToolGuard
+from dataflow import DataflowAgent, DataflowGraph, Step, staged_agent
+from model_client import MODEL_CLIENT
 
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except ImportError:
-        pass
-    try:
-        from google.adk.tools import code_executor
-        _BUILTIN_TOOL_REGISTRY["code_executor"] = code_executor
-    except ImportError:
-        pass
+# Per-tool timeouts, concurrency limits and circuit breakers, configured from YAML
+_TOOL_GUARD = ToolGuard()
 
 @dataclass
 class SubAgentConfig:
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
     output_key: Optional[str] = None
+    depends_on: List[str] = field(default_factory=list)
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
 
 @dataclass
 class SequentialAgentConfig:
     name: str
     architecture: str
     sub_agents: List[SubAgentConfig]
+    schedule: str = "sequential"
+    inputs: List[str] = field(default_factory=list)
+    tool_limits: Dict[str, Any] = field(default_factory=dict)
+    tool_timeouts: Dict[str, Any] = field(default_factory=dict)
 
     @staticmethod
     def from_file(path: str) -> "SequentialAgentConfig":
@@ -67,19 +62,17 @@ class SequentialAgentConfig:
         return SequentialAgentConfig(**{k: v for k, v in data.items() if k in SequentialAgentConfig.__annotations__})
 
 def resolve_tools(names: List[str]) -> List[Any]:
-    _maybe_import_builtin_tools()
-    tools = []
-    for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
-    return tools
+    """Looks tools up in the shared registry; unknown names raise when the agent is built."""
+    return [_TOOL_GUARD.wrap(n, TOOL_REGISTRY.get(n)) for n in names]
 
 # Load configuration
 cfg_path = os.path.join(os.path.dirname(__file__), "config", "planning_agent.yaml")
 if not os.path.exists(cfg_path):
     raise FileNotFoundError(f"Configuration file not found: {cfg_path}")
 cfg = SequentialAgentConfig.from_file(cfg_path)
+_TOOL_GUARD.configure(cfg.tool_limits, cfg.tool_timeouts)
+# Fail at load on dataflow cycles or {placeholders} no sub-agent produces
+graph = DataflowGraph.of(cfg)
 
 # Build sub-agents
 sub_agents = []
@@ -87,15 +80,22 @@ for sub_agent_cfg in cfg.sub_agents:
     sub_tool_impls = resolve_tools(sub_agent_cfg.tools)
     sub_agent = Agent(
         name=sub_agent_cfg.name,
-        model=sub_agent_cfg.model,
+        model=MODEL_CLIENT.model(sub_agent_cfg.model, sub_agent_cfg.priority, sub_agent_cfg.tier),
         instruction=sub_agent_cfg.instruction,
         tools=sub_tool_impls,
         output_key=sub_agent_cfg.output_key,
     )
     sub_agents.append(sub_agent)
 
-# Create the root SequentialAgent
-root_agent = SequentialAgent(
-    name=cfg.name,
-    sub_agents=sub_agents,
-)
+# Create the root SequentialAgent, or run sub-agents as their inputs become ready
+if cfg.schedule == "dataflow":
+    root_agent = DataflowAgent(name=cfg.name, sub_agents=sub_agents, graph=graph)
+elif cfg.schedule == "stages":
+    root_agent = staged_agent(cfg.name, [Step.of(c) for c in cfg.sub_agents], sub_agents)
+elif cfg.schedule == "sequential":
+    root_agent = SequentialAgent(
+        name=cfg.name,
+        sub_agents=sub_agents,
+    )
+else:
+    raise ValueError(f"Unknown schedule: {cfg.schedule}")
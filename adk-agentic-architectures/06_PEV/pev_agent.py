@@ -20,32 +20,29 @@ from google.adk.agents import Agent, SequentialAgent, LoopAgent, BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
 
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
-
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except ImportError:
-        pass
-    try:
-        from google.adk.tools import code_executor
-        _BUILTIN_TOOL_REGISTRY["code_executor"] = code_executor
-    except ImportError:
-        pass
+from agent_tools import TOOL_REGISTRY, ToolGuard
+from dataflow import DataflowAgent, DataflowGraph, Step, staged_agent
+from model_client import MODEL_CLIENT
+from prompt_budget import PromptBudget
+from structured_output import StructuredOutputs
+
+# Per-tool timeouts, concurrency limits and circuit breakers, configured from YAML
+_TOOL_GUARD = ToolGuard()
+
+# JSON outputs of sub-agents (`output_schema:`), parsed tolerantly and counted
+_OUTPUTS = StructuredOutputs()
 
 @dataclass
 class SubAgentConfig:
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
     output_key: Optional[str] = None
+    output_schema: Dict[str, Any] = field(default_factory=dict)
+    depends_on: List[str] = field(default_factory=list)
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
 
 @dataclass
 class WorkflowAgentConfig:
@@ -53,6 +50,10 @@ class WorkflowAgentConfig:
     architecture: str
     sub_agents: List[Union[SubAgentConfig, "WorkflowAgentConfig"]] = field(default_factory=list)
     max_iterations: Optional[int] = None
+    prompt_budget: Dict[str, Any] = field(default_factory=dict)
+    schedule: str = "sequential"
+    inputs: List[str] = field(default_factory=list)
+    depends_on: List[str] = field(default_factory=list)
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "WorkflowAgentConfig":
@@ -67,23 +68,26 @@ class WorkflowAgentConfig:
             name=data["name"],
             architecture=data["architecture"],
             sub_agents=sub_agent_configs,
-            max_iterations=data.get("max_iterations")
+            max_iterations=data.get("max_iterations"),
+            prompt_budget=data.get("prompt_budget") or {},
+            schedule=data.get("schedule", "sequential"),
+            inputs=data.get("inputs") or [],
+            depends_on=data.get("depends_on") or [],
         )
 
 class StopChecker(BaseAgent):
     """A custom agent that checks the verifier's output and stops the loop on SUCCESS."""
     async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
-        verification_output = ctx.session.state.get("verification", "{}")
+        # An unusable verdict is counted as a retry: the loop runs again
+        verification_json = _OUTPUTS.parse(
+            "verification", ctx.session.state.get("verification", "{}"), dict, retry=True
+        )
         should_stop = False
-        try:
-            verification_json = json.loads(verification_output)
-            if verification_json.get("status") == "SUCCESS":
-                should_stop = True
-                # Carry the final result forward for the synthesizer
-                ctx.session.state["result"] = verification_json.get("final_result", "")
-        except (json.JSONDecodeError, AttributeError):
-            pass # If output is not as expected, continue the loop
-            
+        if verification_json is not None and verification_json.get("status") == "SUCCESS":
+            should_stop = True
+            # Carry the final result forward for the synthesizer
+            ctx.session.state["result"] = verification_json.get("final_result", "")
+
         yield Event(
             invocation_id=ctx.invocation_id,
             author=self.name,
@@ -91,34 +95,40 @@ class StopChecker(BaseAgent):
         )
 
 def resolve_tools(names: List[str]) -> List[Any]:
-    _maybe_import_builtin_tools()
-    tools = []
-    for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
-    return tools
-
-def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig]) -> BaseAgent:
+    """Looks tools up in the shared registry; unknown names raise when the agent is built."""
+    return [_TOOL_GUARD.wrap(n, TOOL_REGISTRY.get(n)) for n in names]
+
+def build_agent_from_config(
+    config: Union[SubAgentConfig, WorkflowAgentConfig], prompt_budget: Optional[PromptBudget] = None
+) -> BaseAgent:
     """Recursively builds agents and workflow agents from config."""
     if isinstance(config, SubAgentConfig):
         return Agent(
             name=config.name,
-            model=config.model,
-            instruction=config.instruction,
+            model=MODEL_CLIENT.model(config.model, config.priority, config.tier),
+            instruction=prompt_budget.instruction(config.name, config.instruction) if prompt_budget else config.instruction,
             tools=resolve_tools(config.tools),
             output_key=config.output_key,
+            generate_content_config=_OUTPUTS.register(
+                config.name, config.output_key, config.output_schema, has_tools=bool(config.tools)
+            ),
         )
     
-    sub_agents = [build_agent_from_config(sub) for sub in config.sub_agents]
+    sub_agents = [build_agent_from_config(sub, prompt_budget) for sub in config.sub_agents]
     
     if config.architecture == "sequential":
+        if config.schedule == "dataflow":
+            return DataflowAgent(name=config.name, sub_agents=sub_agents, graph=DataflowGraph.of(config))
+        if config.schedule == "stages":
+            return staged_agent(config.name, [Step.of(sub) for sub in config.sub_agents], sub_agents)
         return SequentialAgent(name=config.name, sub_agents=sub_agents)
     elif config.architecture == "loop":
         # Inject the custom StopChecker agent at the end of the loop cycle
         loop_agents = sub_agents.copy()
         if isinstance(loop_agents[0], SequentialAgent):
              loop_agents[0].sub_agents.append(StopChecker(name="StopChecker"))
+        else:
+            loop_agents.append(StopChecker(name="StopChecker"))
         return LoopAgent(name=config.name, sub_agents=loop_agents, max_iterations=config.max_iterations)
     else:
         raise ValueError(f"Unknown architecture: {config.architecture}")
@@ -130,8 +140,11 @@ if not os.path.exists(cfg_path):
 
 with open(cfg_path, "r", encoding="utf-8") as f:
     raw_data = yaml.safe_load(f) if yaml else json.load(f)
+_TOOL_GUARD.configure(raw_data.get("tool_limits"), raw_data.get("tool_timeouts"))
 
 cfg = WorkflowAgentConfig.from_dict(raw_data)
+# Fail at load on dataflow cycles or {placeholders} no sub-agent produces
+DataflowGraph.of(cfg)
 
 # Build the root agent from the nested configuration
-root_agent = build_agent_from_config(cfg)
+root_agent = build_agent_from_config(cfg, PromptBudget.from_dict(cfg.prompt_budget))
@@ -17,32 +17,22 @@ from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
 from google.genai import types
 
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
-
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except ImportError:
-        pass
-    try:
-        from google.adk.tools import code_executor
-        _BUILTIN_TOOL_REGISTRY["code_executor"] = code_executor
-    except ImportError:
-        pass
+from agent_tools import TOOL_REGISTRY, ToolGuard
+from model_client import MODEL_CLIENT
+from session_state import StateConfig
+
+# Per-tool timeouts, concurrency limits and circuit breakers, configured from YAML
+_TOOL_GUARD = ToolGuard()
 
 @dataclass
 class SubAgentConfig:
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
     output_key: Optional[str] = None
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
 
 @dataclass
 class WorkflowAgentConfig:
@@ -50,6 +40,7 @@ class WorkflowAgentConfig:
     architecture: str
     sub_agents: List[Union[SubAgentConfig, "WorkflowAgentConfig"]] = field(default_factory=list)
     max_iterations: Optional[int] = None
+    state: Dict[str, Any] = field(default_factory=dict)
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "WorkflowAgentConfig":
@@ -64,19 +55,23 @@ class WorkflowAgentConfig:
             name=data["name"],
             architecture=data["architecture"],
             sub_agents=sub_agent_configs,
-            max_iterations=data.get("max_iterations")
+            max_iterations=data.get("max_iterations"),
+            state=data.get("state") or {},
         )
 
 class BlackboardAgent(BaseAgent):
     controller: Optional[Agent] = None
     specialists: Optional[Dict[str, Agent]] = None
     max_iterations: int = 5
+    state_config: Optional[StateConfig] = None
 
-    def __init__(self, name: str, controller: Agent, specialists: Dict[str, Agent], max_iterations: int = 5):
+    def __init__(self, name: str, controller: Agent, specialists: Dict[str, Agent], max_iterations: int = 5,
+                 state_config: Optional[StateConfig] = None):
         super().__init__(name=name)
         self.controller = controller
         self.specialists = specialists
         self.max_iterations = max_iterations
+        self.state_config = state_config or StateConfig()
 
     async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
         if "blackboard" not in ctx.session.state:
@@ -116,7 +111,7 @@ Output ONLY the specialist name or FINISH."""
             )
             
             async for event in temp_controller.run_async(ctx):
-                yield event
+                yield self.state_config.compact(ctx, event)
             
             controller_output = ctx.session.state.get(self.controller.output_key, "FINISH")
             next_agent_name = controller_output.strip()
@@ -151,7 +146,7 @@ Output ONLY the specialist name or FINISH."""
                     temp_specialist = specialist
                 
                 async for event in temp_specialist.run_async(ctx):
-                    yield event
+                    yield self.state_config.compact(ctx, event)
                 
                 specialist_output = ctx.session.state.get(specialist.output_key, "")
                 ctx.session.state["blackboard"]["completed_analyses"].append(next_agent_name)
@@ -178,7 +173,7 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
     if isinstance(config, SubAgentConfig):
         return Agent(
             name=config.name,
-            model=config.model,
+            model=MODEL_CLIENT.model(config.model, config.priority, config.tier),
             instruction=config.instruction,
             tools=resolve_tools(config.tools),
             output_key=config.output_key,
@@ -199,19 +194,15 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
         return BlackboardAgent(
             name=config.name,
             controller=controller,
-            specialists=specialists
+            specialists=specialists,
+            state_config=StateConfig.from_dict(config.state),
         )
     else:
         raise ValueError(f"Unknown architecture: {config.architecture}")
 
 def resolve_tools(names: List[str]) -> List[Any]:
-    _maybe_import_builtin_tools()
-    tools = []
-    for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
-    return tools
+    """Looks tools up in the shared registry; unknown names raise when the agent is built."""
+    return [_TOOL_GUARD.wrap(n, TOOL_REGISTRY.get(n)) for n in names]
 
 def create_agent(
     config_file_path: Optional[str] = None
@@ -222,6 +213,7 @@ def create_agent(
 
     with open(config_file_path, "r", encoding="utf-8") as file:
         config_yaml = yaml.safe_load(file)
+    _TOOL_GUARD.configure(config_yaml.get("tool_limits"), config_yaml.get("tool_timeouts"))
     
     config = WorkflowAgentConfig.from_dict(config_yaml)
 
@@ -7,7 +7,7 @@ Episodic + Semantic Memory ADK Agent (config-driven)
 """
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 import os
 
 try:
@@ -18,28 +18,24 @@ import json
 
 from google.adk.agents import Agent
 
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
+from agent_tools import TOOL_REGISTRY, ToolGuard
+from model_client import MODEL_CLIENT
 
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except ImportError:
-        pass
+# Per-tool timeouts, concurrency limits and circuit breakers, configured from YAML
+_TOOL_GUARD = ToolGuard()
 
 @dataclass
 class AgentConfig:
     """Configuration schema."""
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
     architecture: str = "single"
+    tool_limits: Dict[str, Any] = field(default_factory=dict)
+    tool_timeouts: Dict[str, Any] = field(default_factory=dict)
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
 
     @staticmethod
     def from_file(path: str) -> "AgentConfig":
@@ -53,19 +49,15 @@ class AgentConfig:
         return AgentConfig(**{k: v for k, v in data.items() if k in AgentConfig.__annotations__})
 
 def resolve_tools(names: List[str]) -> List[Any]:
-    _maybe_import_builtin_tools()
-    tools = []
-    for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
-    return tools
+    """Looks tools up in the shared registry; unknown names raise when the agent is built."""
+    return [_TOOL_GUARD.wrap(n, TOOL_REGISTRY.get(n)) for n in names]
 
 # Load configuration
 cfg_path = os.path.join(os.path.dirname(__file__), "config", "episodic_semantic_agent.yaml")
 if not os.path.exists(cfg_path):
     raise FileNotFoundError(f"Configuration file not found: {cfg_path}")
 cfg = AgentConfig.from_file(cfg_path)
+_TOOL_GUARD.configure(cfg.tool_limits, cfg.tool_timeouts)
 
 # Resolve tools
 tool_impls = resolve_tools(cfg.tools)
@@ -73,7 +65,7 @@ tool_impls = resolve_tools(cfg.tools)
 # The root agent is a simple LlmAgent
 root_agent = Agent(
     name=cfg.name,
-    model=cfg.model,
+    model=MODEL_CLIENT.model(cfg.model, cfg.priority, cfg.tier),
     instruction=cfg.instruction,
     tools=tool_impls if tool_impls else [],
 )
@@ -9,36 +9,30 @@ from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
 from google.genai import types
 
+from agent_tools import TOOL_REGISTRY, ToolGuard
+from model_client import MODEL_CLIENT
+from structured_output import StructuredOutputs
+
 # --- Memory Simulation ---
 EPISODIC_MEMORY = []  # Simulates a log of conversation turns
 SEMANTIC_MEMORY = {}  # Simulates a graph store: {entity: {relationship: [entity]}}
 
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
-
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except ImportError:
-        pass
-    try:
-        from google.adk.tools import code_executor
-        _BUILTIN_TOOL_REGISTRY["code_executor"] = code_executor
-    except ImportError:
-        pass
+# Per-tool timeouts, concurrency limits and circuit breakers, configured from YAML
+_TOOL_GUARD = ToolGuard()
+
+# JSON outputs of sub-agents (`output_schema:`), parsed tolerantly and counted
+_OUTPUTS = StructuredOutputs()
 
 @dataclass
 class SubAgentConfig:
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
     output_key: Optional[str] = None
+    output_schema: Dict[str, Any] = field(default_factory=dict)
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
 
 @dataclass
 class WorkflowAgentConfig:
@@ -95,22 +89,20 @@ class EpisodicWithSemanticAgent(BaseAgent):
         async for event in self.updater.run_async(ctx):
             yield event
             
-        memory_update_output = ctx.session.state.get(self.updater.output_key, "{}")
-        try:
-            memory_update = json.loads(memory_update_output)
-            if "episodic" in memory_update:
-                EPISODIC_MEMORY.append(memory_update["episodic"])
-            if "semantic" in memory_update:
-                for rel in memory_update["semantic"]:
-                    if len(rel) == 3:
-                        entity1, relationship, entity2 = rel
-                        if entity1 not in SEMANTIC_MEMORY:
-                            SEMANTIC_MEMORY[entity1] = {}
-                        if relationship not in SEMANTIC_MEMORY[entity1]:
-                            SEMANTIC_MEMORY[entity1][relationship] = []
-                        SEMANTIC_MEMORY[entity1][relationship].append(entity2)
-        except (json.JSONDecodeError, AttributeError):
-            pass
+        memory_update = _OUTPUTS.parse(
+            self.updater.output_key, ctx.session.state.get(self.updater.output_key, "{}"), dict
+        ) or {}
+        if "episodic" in memory_update:
+            EPISODIC_MEMORY.append(memory_update["episodic"])
+        if "semantic" in memory_update:
+            for rel in memory_update["semantic"]:
+                if len(rel) == 3:
+                    entity1, relationship, entity2 = rel
+                    if entity1 not in SEMANTIC_MEMORY:
+                        SEMANTIC_MEMORY[entity1] = {}
+                    if relationship not in SEMANTIC_MEMORY[entity1]:
+                        SEMANTIC_MEMORY[entity1][relationship] = []
+                    SEMANTIC_MEMORY[entity1][relationship].append(entity2)
 
         # Return final response with proper Event creation
         yield Event(
@@ -125,10 +117,13 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
     if isinstance(config, SubAgentConfig):
         return Agent(
             name=config.name,
-            model=config.model,
+            model=MODEL_CLIENT.model(config.model, config.priority, config.tier),
             instruction=config.instruction,
             tools=resolve_tools(config.tools),
             output_key=config.output_key,
+            generate_content_config=_OUTPUTS.register(
+                config.name, config.output_key, config.output_schema, has_tools=bool(config.tools)
+            ),
         )
     
     sub_agents = [build_agent_from_config(sub) for sub in config.sub_agents]
@@ -149,13 +144,8 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
         raise ValueError(f"Unknown architecture: {config.architecture}")
 
 def resolve_tools(names: List[str]) -> List[Any]:
-    _maybe_import_builtin_tools()
-    tools = []
-    for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
-    return tools
+    """Looks tools up in the shared registry; unknown names raise when the agent is built."""
+    return [_TOOL_GUARD.wrap(n, TOOL_REGISTRY.get(n)) for n in names]
 
 def create_agent(
     config_file_path: Optional[str] = None
@@ -166,6 +156,7 @@ def create_agent(
 
     with open(config_file_path, "r", encoding="utf-8") as file:
         config_yaml = yaml.safe_load(file)
+    _TOOL_GUARD.configure(config_yaml.get("tool_limits"), config_yaml.get("tool_timeouts"))
     
     config = WorkflowAgentConfig.from_dict(config_yaml)
 
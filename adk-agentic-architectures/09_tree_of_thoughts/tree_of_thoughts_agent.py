@@ -17,32 +17,27 @@ from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
 from google.genai import types
 
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
-
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except ImportError:
-        pass
-    try:
-        from google.adk.tools import code_executor
-        _BUILTIN_TOOL_REGISTRY["code_executor"] = code_executor
-    except ImportError:
-        pass
+from agent_tools import TOOL_REGISTRY, ToolGuard
+from model_client import MODEL_CLIENT
+from session_state import StateConfig
+from structured_output import StructuredOutputs
+
+# Per-tool timeouts, concurrency limits and circuit breakers, configured from YAML
+_TOOL_GUARD = ToolGuard()
+
+# JSON outputs of sub-agents (`output_schema:`), parsed tolerantly and counted
+_OUTPUTS = StructuredOutputs()
 
 @dataclass
 class SubAgentConfig:
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
     output_key: Optional[str] = None
+    output_schema: Dict[str, Any] = field(default_factory=dict)
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
 
 @dataclass
 class WorkflowAgentConfig:
@@ -50,6 +45,7 @@ class WorkflowAgentConfig:
     architecture: str
     sub_agents: List[Union[SubAgentConfig, "WorkflowAgentConfig"]] = field(default_factory=list)
     max_iterations: Optional[int] = None
+    state: Dict[str, Any] = field(default_factory=dict)
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "WorkflowAgentConfig":
@@ -64,7 +60,8 @@ class WorkflowAgentConfig:
             name=data["name"],
             architecture=data["architecture"],
             sub_agents=sub_agent_configs,
-            max_iterations=data.get("max_iterations")
+            max_iterations=data.get("max_iterations"),
+            state=data.get("state") or {},
         )
 
 class TreeOfThoughtsAgent(BaseAgent):
@@ -72,12 +69,14 @@ class TreeOfThoughtsAgent(BaseAgent):
     evaluator: Optional[Agent] = None
     responder: Optional[Agent] = None
     max_iterations: int = 3
+    state_config: Optional[StateConfig] = None
     
-    def __init__(self, name: str, sub_agents: Dict[str, Agent]):
+    def __init__(self, name: str, sub_agents: Dict[str, Agent], state_config: Optional[StateConfig] = None):
         super().__init__(name=name)
         self.generator = sub_agents["ThoughtGenerator"]
         self.evaluator = sub_agents["StateEvaluator"]
         self.responder = sub_agents["ResponseGenerator"]
+        self.state_config = state_config or StateConfig()
 
     async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
         active_paths = [""]
@@ -87,34 +86,31 @@ class TreeOfThoughtsAgent(BaseAgent):
             for path in active_paths:
                 ctx.session.state["current_path"] = path
                 async for event in self.generator.run_async(ctx):
-                    yield event
+                    yield self.state_config.compact(ctx, event)
                 
-                thoughts_output = ctx.session.state.get(self.generator.output_key, "[]")
-                try:
-                    thoughts = json.loads(thoughts_output)
-                    for thought in thoughts:
-                        new_paths.append(path + "\n" + thought)
-                except (json.JSONDecodeError, AttributeError):
-                    pass
+                thoughts = _OUTPUTS.parse(
+                    self.generator.output_key, ctx.session.state.get(self.generator.output_key, "[]"), list
+                ) or []
+                for thought in thoughts:
+                    new_paths.append(path + "\n" + str(thought))
             
             ctx.session.state["thoughts"] = json.dumps(new_paths)
             async for event in self.evaluator.run_async(ctx):
-                yield event
+                yield self.state_config.compact(ctx, event)
             
-            best_thought_output = ctx.session.state.get(self.evaluator.output_key, "{}")
-            try:
-                best_thought = json.loads(best_thought_output).get("best_thought")
-                if best_thought:
-                    active_paths = [best_thought]
-                else:
-                    active_paths = new_paths[:1] # Fallback to the first new path
-            except (json.JSONDecodeError, AttributeError):
+            evaluation = _OUTPUTS.parse(
+                self.evaluator.output_key, ctx.session.state.get(self.evaluator.output_key, "{}"), dict
+            ) or {}
+            best_thought = evaluation.get("best_thought")
+            if best_thought:
+                active_paths = [best_thought]
+            else:
                 active_paths = new_paths[:1] # Fallback to the first new path
         
         final_path = active_paths[0] if active_paths else ""
         ctx.session.state["final_path"] = final_path
         async for event in self.responder.run_async(ctx):
-            yield event
+            yield self.state_config.compact(ctx, event)
             
         response = ctx.session.state.get(self.responder.output_key, "")
         yield Event(
@@ -129,10 +125,13 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
     if isinstance(config, SubAgentConfig):
         return Agent(
             name=config.name,
-            model=config.model,
+            model=MODEL_CLIENT.model(config.model, config.priority, config.tier),
             instruction=config.instruction,
             tools=resolve_tools(config.tools),
             output_key=config.output_key,
+            generate_content_config=_OUTPUTS.register(
+                config.name, config.output_key, config.output_schema, has_tools=bool(config.tools)
+            ),
         )
     
     sub_agents = [build_agent_from_config(sub) for sub in config.sub_agents]
@@ -148,18 +147,14 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
         return TreeOfThoughtsAgent(
             name=config.name,
             sub_agents=sub_agents_map,
+            state_config=StateConfig.from_dict(config.state),
         )
     else:
         raise ValueError(f"Unknown architecture: {config.architecture}")
 
 def resolve_tools(names: List[str]) -> List[Any]:
-    _maybe_import_builtin_tools()
-    tools = []
-    for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
-    return tools
+    """Looks tools up in the shared registry; unknown names raise when the agent is built."""
+    return [_TOOL_GUARD.wrap(n, TOOL_REGISTRY.get(n)) for n in names]
 
 def create_agent(
     config_file_path: Optional[str] = None
@@ -170,6 +165,7 @@ def create_agent(
 
     with open(config_file_path, "r", encoding="utf-8") as file:
         config_yaml = yaml.safe_load(file)
+    _TOOL_GUARD.configure(config_yaml.get("tool_limits"), config_yaml.get("tool_timeouts"))
     
     config = WorkflowAgentConfig.from_dict(config_yaml)
 
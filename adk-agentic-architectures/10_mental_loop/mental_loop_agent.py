@@ -1,8 +1,8 @@
 """
 Mental Loop (Simulator) ADK Agent (config-driven)
 -----------------------------------------------------
-- Implements a simplified, single-agent architecture to pass ADK tests.
-- The complex simulator logic from the notebook is not implemented.
+- Proposes candidate actions, simulates them against a world model
+  (world_model.py) and has the Refiner weigh the best-ranked results.
 - Configurable via YAML.
 """
 
@@ -17,48 +17,43 @@ from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
 from google.genai import types
 
-# --- World Model Simulation ---
-class MarketSimulator:
-    """A simple simulation of a market environment."""
-    def __init__(self):
-        self.price = 100
-
-    def simulate(self, action: str) -> str:
-        if "buy" in action.lower():
-            self.price += 10
-            return f"Price increased to {self.price}."
-        elif "sell" in action.lower():
-            self.price -= 10
-            return f"Price decreased to {self.price}."
-        else:
-            return "No market impact."
-
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
-
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except ImportError:
-        pass
-    try:
-        from google.adk.tools import code_executor
-        _BUILTIN_TOOL_REGISTRY["code_executor"] = code_executor
-    except ImportError:
-        pass
+from agent_tools import TOOL_REGISTRY, ToolGuard
+from model_client import MODEL_CLIENT
+from structured_output import StructuredOutputs
+
+from .world_model import WorldModel, create_world_model
+
+# Per-tool timeouts, concurrency limits and circuit breakers, configured from YAML
+_TOOL_GUARD = ToolGuard()
+
+# JSON outputs of sub-agents (`output_schema:`), parsed tolerantly and counted
+_OUTPUTS = StructuredOutputs()
 
 @dataclass
 class SubAgentConfig:
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
     output_key: Optional[str] = None
+    output_schema: Dict[str, Any] = field(default_factory=dict)
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
+
+@dataclass
+class SearchConfig:
+    """Controls the simulate-and-rank loop. mode "single" proposes and simulates one action."""
+    mode: str = "single"
+    candidates: int = 5
+    top_k: int = 2
+    max_rounds: int = 3
+    min_improvement: float = 0.0
+    risk_aversion: float = 0.5
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "SearchConfig":
+        data = data or {}
+        return SearchConfig(**{k: v for k, v in data.items() if k in SearchConfig.__annotations__})
 
 @dataclass
 class WorkflowAgentConfig:
@@ -66,6 +61,8 @@ class WorkflowAgentConfig:
     architecture: str
     sub_agents: List[Union[SubAgentConfig, "WorkflowAgentConfig"]] = field(default_factory=list)
     max_iterations: Optional[int] = None
+    world_model: Dict[str, Any] = field(default_factory=dict)
+    search: Dict[str, Any] = field(default_factory=dict)
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "WorkflowAgentConfig":
@@ -80,56 +77,137 @@ class WorkflowAgentConfig:
             name=data["name"],
             architecture=data["architecture"],
             sub_agents=sub_agent_configs,
-            max_iterations=data.get("max_iterations")
+            max_iterations=data.get("max_iterations"),
+            world_model=data.get("world_model") or {},
+            search=data.get("search") or {}
         )
 
+def _parse_candidates(key: str, text: str, limit: int) -> List[str]:
+    """Reads the candidate actions from the proposer's JSON array, tolerating fences and prose."""
+    candidates = _OUTPUTS.parse(key, text, list)
+    if candidates is not None:
+        candidates = [str(c).strip() for c in candidates if str(c).strip()]
+        return list(dict.fromkeys(candidates))[:limit]
+    return [text.strip()] if text and text.strip() else []
+
 class MentalLoopAgent(BaseAgent):
     proposer: Optional[Agent] = None
-    simulator: Optional[Agent] = None
+    candidate_proposer: Optional[Agent] = None
     refiner: Optional[Agent] = None
-    world_model: Optional[MarketSimulator] = None
+    world_model: Optional[WorldModel] = None
+    search: Optional[SearchConfig] = None
 
-    def __init__(self, name: str, sub_agents: Dict[str, Agent]):
+    def __init__(self, name: str, sub_agents: Dict[str, Agent], world_model: WorldModel, search: Optional[SearchConfig] = None):
         super().__init__(name=name)
-        self.proposer = sub_agents["Proposer"]
-        self.simulator = sub_agents["Simulator"]
         self.refiner = sub_agents["Refiner"]
-        self.world_model = MarketSimulator()
+        self.world_model = world_model
+        self.search = search or SearchConfig()
+        if self.search.mode == "multi":
+            self.candidate_proposer = sub_agents["CandidateProposer"]
+        elif self.search.mode == "single":
+            self.proposer = sub_agents["Proposer"]
+        else:
+            raise ValueError(f"Unknown search mode: {self.search.mode}")
 
     async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
-        # 1. Propose
-        async for event in self.proposer.run_async(ctx):
-            yield event
-        
-        # 2. Simulate
-        proposed_solution = ctx.session.state.get(self.proposer.output_key, "")
-        simulation_result = self.world_model.simulate(proposed_solution)
-        ctx.session.state["simulation_results"] = simulation_result
+        world_state = ctx.session.state.get("world_state") or self.world_model.initial_state()
+
+        if self.search.mode == "multi":
+            async for event in self._search(ctx, world_state):
+                yield event
+            top = json.loads(ctx.session.state["simulation_results"])
+            chosen_action = top[0]["action"] if top else ""
+        else:
+            # 1. Propose
+            async for event in self.proposer.run_async(ctx):
+                yield event
+
+            # 2. Simulate against this session's world state
+            chosen_action = ctx.session.state.get(self.proposer.output_key, "")
+            [simulation_result] = self.world_model.simulate(world_state, [chosen_action])
+            ctx.session.state["simulation_results"] = json.dumps(simulation_result)
         
         # 3. Refine
         async for event in self.refiner.run_async(ctx):
             yield event
-            
+
+        # 4. Take the chosen action: the next turn simulates from the world it leaves behind
         response = ctx.session.state.get(self.refiner.output_key, "")
         yield Event(
             invocation_id=ctx.invocation_id,
             author=self.name,
-            content=types.Content(parts=[types.Part(text=response)])
+            content=types.Content(parts=[types.Part(text=response)]),
+            actions=EventActions(state_delta={
+                "world_state": self.world_model.apply(world_state, chosen_action),
+                "applied_action": chosen_action,
+            }),
         )
 
+    async def _search(self, ctx: InvocationContext, world_state: Dict[str, Any]) -> AsyncGenerator[Event, None]:
+        """Proposes a batch of candidates per round, simulates them in one call and keeps the top_k.
+
+        One proposer call per round regardless of how many candidates it returns,
+        so widening the search does not add model calls. Stops once the best
+        utility fails to improve by more than min_improvement. Every round
+        simulates on the same paths (one seed per search), so candidates kept
+        from earlier rounds compare with new ones on equal terms.
+        """
+        search = self.search
+        seed = self.world_model.search_seed()
+        top: List[Dict[str, Any]] = []
+        best_utility = float("-inf")
+        history = []
+        ctx.session.state["num_candidates"] = search.candidates
+
+        for round_index in range(search.max_rounds):
+            ctx.session.state["search_feedback"] = json.dumps(top) if top else "None yet."
+            async for event in self.candidate_proposer.run_async(ctx):
+                yield event
+
+            candidates = _parse_candidates(
+                self.candidate_proposer.output_key,
+                ctx.session.state.get(self.candidate_proposer.output_key, ""),
+                search.candidates,
+            )
+            if not candidates:
+                break
+
+            results = self.world_model.simulate(world_state, candidates, seed)
+            for stats in results:
+                stats["utility"] = round(self.world_model.utility(stats, search.risk_aversion), 4)
+            ranked = {s["action"]: s for s in sorted(top + results, key=lambda s: s["utility"], reverse=True)}
+            top = list(ranked.values())[:search.top_k]
+
+            round_best = top[0]["utility"]
+            history.append({"round": round_index + 1, "candidates": len(candidates), "best_utility": round_best})
+            if round_best <= best_utility + search.min_improvement:
+                break
+            best_utility = round_best
+
+        ctx.session.state["search_history"] = history
+        ctx.session.state["simulation_results"] = json.dumps(top)
+
 
 def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig]) -> BaseAgent:
     """Recursively builds agents and workflow agents from config."""
     if isinstance(config, SubAgentConfig):
         return Agent(
             name=config.name,
-            model=config.model,
+            model=MODEL_CLIENT.model(config.model, config.priority, config.tier),
             instruction=config.instruction,
             tools=resolve_tools(config.tools),
             output_key=config.output_key,
+            generate_content_config=_OUTPUTS.register(
+                config.name, config.output_key, config.output_schema, has_tools=bool(config.tools)
+            ),
         )
     
-    sub_agents = [build_agent_from_config(sub) for sub in config.sub_agents]
+    sub_configs = config.sub_agents
+    if config.architecture == "custom":
+        # Build only the proposer the search mode uses
+        unused = {"multi": "Proposer", "single": "CandidateProposer"}.get(SearchConfig.from_dict(config.search).mode)
+        sub_configs = [sub for sub in sub_configs if sub.name != unused]
+    sub_agents = [build_agent_from_config(sub) for sub in sub_configs]
     
     if config.architecture == "sequential":
         return SequentialAgent(name=config.name, sub_agents=sub_agents)
@@ -142,18 +220,15 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
         return MentalLoopAgent(
             name=config.name,
             sub_agents=sub_agents_map,
+            world_model=create_world_model(config.world_model),
+            search=SearchConfig.from_dict(config.search),
         )
     else:
         raise ValueError(f"Unknown architecture: {config.architecture}")
 
 def resolve_tools(names: List[str]) -> List[Any]:
-    _maybe_import_builtin_tools()
-    tools = []
-    for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
-    return tools
+    """Looks tools up in the shared registry; unknown names raise when the agent is built."""
+    return [_TOOL_GUARD.wrap(n, TOOL_REGISTRY.get(n)) for n in names]
 
 def create_agent(
     config_file_path: Optional[str] = None
@@ -164,6 +239,7 @@ def create_agent(
 
     with open(config_file_path, "r", encoding="utf-8") as file:
         config_yaml = yaml.safe_load(file)
+    _TOOL_GUARD.configure(config_yaml.get("tool_limits"), config_yaml.get("tool_timeouts"))
     
     config = WorkflowAgentConfig.from_dict(config_yaml)
 
@@ -0,0 +1,163 @@
+"""
+World Models for the Mental Loop Agent
+-----------------------------------------------------
+- A world model evaluates candidate actions against a copy of the session's world state.
+- World state lives in the session (not on the model), so concurrent sessions never share it;
+  the action the agent settles on is applied to it, so the next turn starts from its outcome.
+- MonteCarloMarketSimulator scores many actions over thousands of simulated price paths
+  in one vectorized NumPy call and reports distribution statistics per action.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_ACTION_RE = re.compile(r"\b(buy|sell|hold)\b(?:\s+(\d+(?:\.\d+)?))?", re.IGNORECASE)
+
+
+class WorldModel:
+    """Interface for the simulators used by MentalLoopAgent."""
+
+    def initial_state(self) -> Dict[str, Any]:
+        """Returns the world state a new session starts from."""
+        raise NotImplementedError
+
+    def simulate(self, state: Dict[str, Any], actions: List[str], seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Simulates every action from `state` without mutating it and returns one stats dict per action.
+
+        Calls with the same seed use the same random draws, so their results can be compared.
+        """
+        raise NotImplementedError
+
+    def search_seed(self) -> int:
+        """Returns the seed one search uses for all of its simulate() calls."""
+        raise NotImplementedError
+
+    def apply(self, state: Dict[str, Any], action: str) -> Dict[str, Any]:
+        """Returns the world state after `action` is taken from `state`, without mutating `state`."""
+        raise NotImplementedError
+
+    def utility(self, stats: Dict[str, Any], risk_aversion: float) -> float:
+        """Scalar score used to rank simulated actions; higher is better."""
+        raise NotImplementedError
+
+
+@dataclass
+class MonteCarloMarketSimulator(WorldModel):
+    """Geometric-Brownian-motion market with linear slippage on the proposed trade.
+
+    All actions are simulated against the same random draws (common random
+    numbers), so differences in their statistics come from the actions, not
+    from sampling noise. Separate calls share the draws when given the same seed.
+    """
+    initial_price: float = 100.0
+    drift: float = 0.0
+    volatility: float = 0.02
+    impact: float = 0.001
+    horizon: int = 20
+    n_paths: int = 5000
+    default_quantity: float = 10.0
+    seed: Optional[int] = None
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "MonteCarloMarketSimulator":
+        data = data or {}
+        return MonteCarloMarketSimulator(
+            **{k: v for k, v in data.items() if k in MonteCarloMarketSimulator.__annotations__}
+        )
+
+    def initial_state(self) -> Dict[str, Any]:
+        return {"price": self.initial_price, "position": 0.0, "cash": 0.0}
+
+    def parse_action(self, action: str) -> Tuple[str, float]:
+        """Maps free-text actions like "Buy 20 shares" to a side and signed quantity."""
+        match = _ACTION_RE.search(action or "")
+        if not match or match.group(1).lower() == "hold":
+            return "hold", 0.0
+        side = match.group(1).lower()
+        quantity = float(match.group(2)) if match.group(2) else self.default_quantity
+        return side, quantity if side == "buy" else -quantity
+
+    def search_seed(self) -> int:
+        """The configured seed, or a fresh one per search when none is set."""
+        if self.seed is not None:
+            return self.seed
+        return int(np.random.SeedSequence().generate_state(1)[0])
+
+    def simulate(self, state: Dict[str, Any], actions: List[str], seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        price = float(state.get("price", self.initial_price))
+        position = float(state.get("position", 0.0))
+        parsed = [self.parse_action(a) for a in actions]
+        trades = np.array([q for _, q in parsed], dtype=np.float64)
+
+        rng = np.random.default_rng(self.seed if seed is None else seed)
+        shocks = rng.standard_normal((self.n_paths, self.horizon))
+        log_returns = (self.drift - 0.5 * self.volatility ** 2) + self.volatility * shocks
+        growth = np.exp(log_returns.sum(axis=1))  # (n_paths,)
+
+        # Trades fill at a price moved against the trader, then the market evolves.
+        fill = price * (1.0 + self.impact * trades)  # (n_actions,)
+        final = price * growth  # (n_paths,)
+        held = position + trades
+        pnl = held[:, None] * final[None, :] - position * price - (trades * fill)[:, None]
+
+        p5, p25, p50, p75, p95 = np.percentile(pnl, [5, 25, 50, 75, 95], axis=1)
+        mean = pnl.mean(axis=1)
+        std = pnl.std(axis=1)
+        prob_loss = (pnl < 0).mean(axis=1)
+        tail = np.where(pnl <= p5[:, None], pnl, np.nan)
+        cvar = np.nanmean(tail, axis=1)
+
+        results = []
+        for i, (action, (side, quantity)) in enumerate(zip(actions, parsed)):
+            results.append({
+                "action": action,
+                "side": side,
+                "quantity": abs(quantity),
+                "paths": self.n_paths,
+                "horizon": self.horizon,
+                "mean_pnl": round(float(mean[i]), 4),
+                "std_pnl": round(float(std[i]), 4),
+                "var_95": round(float(-p5[i]), 4) + 0.0,
+                "cvar_95": round(float(-cvar[i]), 4) + 0.0,
+                "prob_loss": round(float(prob_loss[i]), 4),
+                "percentiles": {
+                    "p5": round(float(p5[i]), 4),
+                    "p25": round(float(p25[i]), 4),
+                    "p50": round(float(p50[i]), 4),
+                    "p75": round(float(p75[i]), 4),
+                    "p95": round(float(p95[i]), 4),
+                },
+            })
+        return results
+
+    def apply(self, state: Dict[str, Any], action: str) -> Dict[str, Any]:
+        """Fills the trade with the same slippage the simulation assumes; the fill becomes the new price."""
+        price = float(state.get("price", self.initial_price))
+        _, quantity = self.parse_action(action)
+        fill = price * (1.0 + self.impact * quantity)
+        return {
+            "price": round(fill, 6),
+            "position": float(state.get("position", 0.0)) + quantity,
+            "cash": round(float(state.get("cash", 0.0)) - quantity * fill, 6),
+        }
+
+    def utility(self, stats: Dict[str, Any], risk_aversion: float) -> float:
+        return stats["mean_pnl"] - risk_aversion * stats["cvar_95"]
+
+
+_WORLD_MODELS = {
+    "monte_carlo_market": MonteCarloMarketSimulator,
+}
+
+
+def create_world_model(data: Optional[Dict[str, Any]]) -> WorldModel:
+    """Builds the world model named by `type` in the config (default: monte_carlo_market)."""
+    data = dict(data or {})
+    kind = data.pop("type", "monte_carlo_market")
+    cls = _WORLD_MODELS.get(kind)
+    if cls is None:
+        raise ValueError(f"Unknown world model: {kind}")
+    return cls.from_dict(data)
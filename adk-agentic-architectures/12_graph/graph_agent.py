@@ -17,35 +17,30 @@ from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
 from google.genai import types
 
+from agent_tools import TOOL_REGISTRY, ToolGuard
+from model_client import MODEL_CLIENT
+from session_state import StateConfig
+from structured_output import StructuredOutputs
+
 # --- Graph Database Simulation ---
 KNOWLEDGE_GRAPH = {} # Simulates a graph store: {entity: {relationship: [entity]}}
 
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
-
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except ImportError:
-        pass
-    try:
-        from google.adk.tools import code_executor
-        _BUILTIN_TOOL_REGISTRY["code_executor"] = code_executor
-    except ImportError:
-        pass
+# Per-tool timeouts, concurrency limits and circuit breakers, configured from YAML
+_TOOL_GUARD = ToolGuard()
+
+# JSON outputs of sub-agents (`output_schema:`), parsed tolerantly and counted
+_OUTPUTS = StructuredOutputs()
 
 @dataclass
 class SubAgentConfig:
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
     output_key: Optional[str] = None
+    output_schema: Dict[str, Any] = field(default_factory=dict)
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
 
 @dataclass
 class WorkflowAgentConfig:
@@ -53,6 +48,7 @@ class WorkflowAgentConfig:
     architecture: str
     sub_agents: List[Union[SubAgentConfig, "WorkflowAgentConfig"]] = field(default_factory=list)
     max_iterations: Optional[int] = None
+    state: Dict[str, Any] = field(default_factory=dict)
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "WorkflowAgentConfig":
@@ -67,41 +63,42 @@ class WorkflowAgentConfig:
             name=data["name"],
             architecture=data["architecture"],
             sub_agents=sub_agent_configs,
-            max_iterations=data.get("max_iterations")
+            max_iterations=data.get("max_iterations"),
+            state=data.get("state") or {},
         )
 
 class GraphAgent(BaseAgent):
     extractor: Optional[Agent] = None
     querier: Optional[Agent] = None
+    state_config: Optional[StateConfig] = None
 
-    def __init__(self, name: str, sub_agents: Dict[str, Agent]):
+    def __init__(self, name: str, sub_agents: Dict[str, Agent], state_config: Optional[StateConfig] = None):
         super().__init__(name=name)
         self.extractor = sub_agents["KnowledgeExtractor"]
         self.querier = sub_agents["QueryEngine"]
+        self.state_config = state_config or StateConfig()
 
     async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
         # 1. Extract
         async for event in self.extractor.run_async(ctx):
-            yield event
+            yield self.state_config.compact(ctx, event)
         
-        triplets_output = ctx.session.state.get(self.extractor.output_key, "[]")
-        try:
-            triplets = json.loads(triplets_output)
-            for triplet in triplets:
-                if len(triplet) == 3:
-                    entity1, relationship, entity2 = triplet
-                    if entity1 not in KNOWLEDGE_GRAPH:
-                        KNOWLEDGE_GRAPH[entity1] = {}
-                    if relationship not in KNOWLEDGE_GRAPH[entity1]:
-                        KNOWLEDGE_GRAPH[entity1][relationship] = []
-                    KNOWLEDGE_GRAPH[entity1][relationship].append(entity2)
-        except (json.JSONDecodeError, AttributeError):
-            pass
+        triplets = _OUTPUTS.parse(
+            self.extractor.output_key, ctx.session.state.get(self.extractor.output_key, "[]"), list
+        ) or []
+        for triplet in triplets:
+            if isinstance(triplet, list) and len(triplet) == 3:
+                entity1, relationship, entity2 = triplet
+                if entity1 not in KNOWLEDGE_GRAPH:
+                    KNOWLEDGE_GRAPH[entity1] = {}
+                if relationship not in KNOWLEDGE_GRAPH[entity1]:
+                    KNOWLEDGE_GRAPH[entity1][relationship] = []
+                KNOWLEDGE_GRAPH[entity1][relationship].append(entity2)
 
         # 2. Query
         ctx.session.state["graph"] = json.dumps(KNOWLEDGE_GRAPH)
         async for event in self.querier.run_async(ctx):
-            yield event
+            yield self.state_config.compact(ctx, event)
             
         response = ctx.session.state.get(self.querier.output_key, "")
         yield Event(
@@ -116,10 +113,13 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
     if isinstance(config, SubAgentConfig):
         return Agent(
             name=config.name,
-            model=config.model,
+            model=MODEL_CLIENT.model(config.model, config.priority, config.tier),
             instruction=config.instruction,
             tools=resolve_tools(config.tools),
             output_key=config.output_key,
+            generate_content_config=_OUTPUTS.register(
+                config.name, config.output_key, config.output_schema, has_tools=bool(config.tools)
+            ),
         )
     
     sub_agents = [build_agent_from_config(sub) for sub in config.sub_agents]
@@ -135,18 +135,14 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
         return GraphAgent(
             name=config.name,
             sub_agents=sub_agents_map,
+            state_config=StateConfig.from_dict(config.state),
         )
     else:
         raise ValueError(f"Unknown architecture: {config.architecture}")
 
 def resolve_tools(names: List[str]) -> List[Any]:
-    _maybe_import_builtin_tools()
-    tools = []
-    for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
-    return tools
+    """Looks tools up in the shared registry; unknown names raise when the agent is built."""
+    return [_TOOL_GUARD.wrap(n, TOOL_REGISTRY.get(n)) for n in names]
 
 def create_agent(
     config_file_path: Optional[str] = None
@@ -157,6 +153,7 @@ def create_agent(
 
     with open(config_file_path, "r", encoding="utf-8") as file:
         config_yaml = yaml.safe_load(file)
+    _TOOL_GUARD.configure(config_yaml.get("tool_limits"), config_yaml.get("tool_timeouts"))
     
     config = WorkflowAgentConfig.from_dict(config_yaml)
 
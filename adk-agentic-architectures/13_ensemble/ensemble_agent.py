@@ -1,13 +1,16 @@
 """
 Ensemble ADK Agent (config-driven)
 -----------------------------------------------------
-- Implements a simplified, single-agent architecture to pass ADK tests.
-- The complex ensemble logic from the notebook is not implemented.
+- Implements the Ensemble architecture using a custom EnsembleAgent.
+- Specialists run concurrently; optionally, a weighted quorum of agreeing answers ends the run early.
 - Configurable via YAML.
 """
 
+import asyncio
 import json
+import logging
 import os
+import re
 import yaml
 from typing import Any, Dict, List, Union, Optional, AsyncGenerator
 from dataclasses import dataclass, field
@@ -15,33 +18,45 @@ from dataclasses import dataclass, field
 from google.adk.agents import Agent, BaseAgent, LlmAgent, SequentialAgent, LoopAgent, ParallelAgent
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
+from google.genai import types
 
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
-
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except ImportError:
-        pass
-    try:
-        from google.adk.tools import code_executor
-        _BUILTIN_TOOL_REGISTRY["code_executor"] = code_executor
-    except ImportError:
-        pass
+from agent_tools import TOOL_REGISTRY, ToolGuard
+from model_client import MODEL_CLIENT
+from prompt_budget import PromptBudget
+
+logger = logging.getLogger(__name__)
+
+# Per-tool timeouts, concurrency limits and circuit breakers, configured from YAML
+_TOOL_GUARD = ToolGuard()
 
 @dataclass
 class SubAgentConfig:
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
     output_key: Optional[str] = None
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
+
+@dataclass
+class EnsembleConfig:
+    """Weighted-vote early exit. Specialists agree when their normalized answers are equal
+    or their token overlap (Jaccard) reaches similarity_threshold; once the agreeing
+    weight reaches quorum, the rest are cancelled and the synthesizer is skipped.
+
+    Only meaningful when the specialists answer the same question. Specialists with
+    different roles give answers that are not comparable, so leave early_exit off.
+    """
+    early_exit: bool = False
+    quorum: float = 2.0
+    similarity_threshold: float = 0.8
+    weights: Dict[str, float] = field(default_factory=dict)
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "EnsembleConfig":
+        data = data or {}
+        return EnsembleConfig(**{k: v for k, v in data.items() if k in EnsembleConfig.__annotations__})
 
 @dataclass
 class WorkflowAgentConfig:
@@ -49,6 +64,8 @@ class WorkflowAgentConfig:
     architecture: str
     sub_agents: List[Union[SubAgentConfig, "WorkflowAgentConfig"]] = field(default_factory=list)
     max_iterations: Optional[int] = None
+    prompt_budget: Dict[str, Any] = field(default_factory=dict)
+    ensemble: Dict[str, Any] = field(default_factory=dict)
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "WorkflowAgentConfig":
@@ -63,21 +80,142 @@ class WorkflowAgentConfig:
             name=data["name"],
             architecture=data["architecture"],
             sub_agents=sub_agent_configs,
-            max_iterations=data.get("max_iterations")
+            max_iterations=data.get("max_iterations"),
+            prompt_budget=data.get("prompt_budget") or {},
+            ensemble=data.get("ensemble") or {}
         )
 
-def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig]) -> BaseAgent:
+def _normalize_answer(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", (text or "").lower()).split())
+
+def _answers_agree(a: str, b: str, threshold: float) -> bool:
+    if not a or not b:
+        return False
+    if a == b:
+        return True
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b) >= threshold
+
+class EnsembleAgent(BaseAgent):
+    specialists: List[Agent] = []
+    synthesizer: Optional[Agent] = None
+    ensemble: Optional[EnsembleConfig] = None
+
+    def __init__(self, name: str, specialists: List[Agent], synthesizer: Agent, ensemble: EnsembleConfig):
+        super().__init__(name=name)
+        self.specialists = specialists
+        self.synthesizer = synthesizer
+        self.ensemble = ensemble
+
+    def _branch_ctx(self, ctx: InvocationContext, specialist: Agent) -> InvocationContext:
+        branch_ctx = ctx.model_copy()
+        suffix = f"{self.name}.{specialist.name}"
+        branch_ctx.branch = f"{ctx.branch}.{suffix}" if ctx.branch else suffix
+        return branch_ctx
+
+    def _quorum(self, answers: Dict[str, str]) -> Optional[List[str]]:
+        """Returns the names of a group of agreeing specialists whose weight meets the quorum."""
+        weights = self.ensemble.weights
+        normalized = {name: _normalize_answer(text) for name, text in answers.items()}
+        for name, answer in normalized.items():
+            group = [
+                other for other, other_answer in normalized.items()
+                if _answers_agree(answer, other_answer, self.ensemble.similarity_threshold)
+            ]
+            if sum(weights.get(member, 1.0) for member in group) >= self.ensemble.quorum:
+                return group
+        return None
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run_specialist(specialist: Agent) -> None:
+            error: Optional[str] = None
+            try:
+                async for event in specialist.run_async(self._branch_ctx(ctx, specialist)):
+                    consumed = asyncio.Event()
+                    await queue.put((specialist, event, consumed))
+                    # Wait until the event is yielded (and its state delta applied) before continuing.
+                    await consumed.wait()
+            except Exception as e:
+                logger.warning("Specialist %s failed: %r", specialist.name, e)
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                await queue.put((specialist, None, error))
+
+        # 1. Stream specialist events as they arrive, checking for a quorum after each finishes
+        tasks = [asyncio.create_task(run_specialist(s)) for s in self.specialists]
+        answers: Dict[str, str] = {}
+        failed: Dict[str, str] = {}
+        agreeing: Optional[List[str]] = None
+        pending = len(tasks)
+        try:
+            while pending:
+                specialist, event, consumed = await queue.get()
+                if event is None:
+                    pending -= 1
+                    # A failed specialist has no answer, so it can neither vote nor be the agreed answer;
+                    # the synthesizer is told it failed instead of finding its placeholder missing.
+                    if consumed is not None:
+                        failed[specialist.name] = consumed
+                        yield Event(
+                            invocation_id=ctx.invocation_id,
+                            author=self.name,
+                            branch=self._branch_ctx(ctx, specialist).branch,
+                            actions=EventActions(state_delta={
+                                specialist.output_key: f"[{specialist.name} failed: {consumed}]"
+                            }),
+                        )
+                        continue
+                    answers[specialist.name] = str(ctx.session.state.get(specialist.output_key, ""))
+                    agreeing = self._quorum(answers) if self.ensemble.early_exit else None
+                    if agreeing:
+                        break
+                    continue
+                yield event
+                consumed.set()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        cancelled = [s.name for s in self.specialists if s.name not in answers and s.name not in failed]
+        ctx.session.state["ensemble_metrics"] = {
+            "early_exit": bool(agreeing),
+            "agreeing": agreeing or [],
+            "cancelled": cancelled,
+            "failed": failed,
+        }
+
+        # 2. Agreement makes the synthesizer unnecessary; otherwise synthesize as before
+        if agreeing:
+            response = answers[agreeing[0]]
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                content=types.Content(parts=[types.Part(text=response)]),
+                actions=EventActions(state_delta={self.synthesizer.output_key: response})
+            )
+            return
+
+        async for event in self.synthesizer.run_async(ctx):
+            yield event
+
+
+def build_agent_from_config(
+    config: Union[SubAgentConfig, WorkflowAgentConfig], prompt_budget: Optional[PromptBudget] = None
+) -> BaseAgent:
     """Recursively builds agents and workflow agents from config."""
     if isinstance(config, SubAgentConfig):
         return Agent(
             name=config.name,
-            model=config.model,
-            instruction=config.instruction,
+            model=MODEL_CLIENT.model(config.model, config.priority, config.tier),
+            instruction=prompt_budget.instruction(config.name, config.instruction) if prompt_budget else config.instruction,
             tools=resolve_tools(config.tools),
             output_key=config.output_key,
         )
     
-    sub_agents = [build_agent_from_config(sub) for sub in config.sub_agents]
+    sub_agents = [build_agent_from_config(sub, prompt_budget) for sub in config.sub_agents]
     
     if config.architecture == "sequential":
         return SequentialAgent(name=config.name, sub_agents=sub_agents)
@@ -85,17 +223,23 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
         return LoopAgent(name=config.name, sub_agents=sub_agents, max_iterations=config.max_iterations)
     elif config.architecture == "parallel":
         return ParallelAgent(name=config.name, sub_agents=sub_agents)
+    elif config.architecture == "custom":
+        specialists = [agent for agent in sub_agents if agent.name != "Synthesizer"]
+        synthesizer = next((agent for agent in sub_agents if agent.name == "Synthesizer"), None)
+        if synthesizer is None:
+            raise ValueError("A 'Synthesizer' agent must be defined in the config.")
+        return EnsembleAgent(
+            name=config.name,
+            specialists=specialists,
+            synthesizer=synthesizer,
+            ensemble=EnsembleConfig.from_dict(config.ensemble),
+        )
     else:
         raise ValueError(f"Unknown architecture: {config.architecture}")
 
 def resolve_tools(names: List[str]) -> List[Any]:
-    _maybe_import_builtin_tools()
-    tools = []
-    for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
-    return tools
+    """Looks tools up in the shared registry; unknown names raise when the agent is built."""
+    return [_TOOL_GUARD.wrap(n, TOOL_REGISTRY.get(n)) for n in names]
 
 def create_agent(
     config_file_path: Optional[str] = None
@@ -106,9 +250,10 @@ def create_agent(
 
     with open(config_file_path, "r", encoding="utf-8") as file:
         config_yaml = yaml.safe_load(file)
+    _TOOL_GUARD.configure(config_yaml.get("tool_limits"), config_yaml.get("tool_timeouts"))
     
     config = WorkflowAgentConfig.from_dict(config_yaml)
 
-    return build_agent_from_config(config)
+    return build_agent_from_config(config, PromptBudget.from_dict(config.prompt_budget))
 
 root_agent = create_agent()
@@ -1,15 +1,19 @@
 """
 Dry Run Harness ADK Agent (config-driven)
 -----------------------------------------------------
-- Implements a simplified, single-agent architecture to pass ADK tests.
-- The complex dry run logic from the notebook is not implemented.
+- A Proposer drafts a plan; its Python code blocks are dry-run in the local
+  sandbox (sandbox.py), anything else by the DryRunExecutor model.
+- Approval rules decide from the structured dry-run result first; plans they
+  cannot settle go to the Approver model. Approved plans reach the FinalExecutor.
 - Configurable via YAML.
 """
 
 import json
 import os
+import re
+import sys
 import yaml
-from typing import Any, Dict, List, Union, Optional, AsyncGenerator
+from typing import Any, Dict, List, Union, Optional, AsyncGenerator, Tuple
 from dataclasses import dataclass, field
 
 from google.adk.agents import Agent, BaseAgent, LlmAgent, SequentialAgent, LoopAgent, ParallelAgent
@@ -17,32 +21,81 @@ from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
 from google.genai import types
 
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
-
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except ImportError:
-        pass
-    try:
-        from google.adk.tools import code_executor
-        _BUILTIN_TOOL_REGISTRY["code_executor"] = code_executor
-    except ImportError:
-        pass
+from agent_tools import TOOL_REGISTRY, ToolGuard
+from model_client import MODEL_CLIENT
+
+from .sandbox import DryRunResult, LocalDryRunExecutor, SandboxConfig, code_blocks, extract_code, unexecuted_blocks
+
+# Per-tool timeouts, concurrency limits and circuit breakers, configured from YAML
+_TOOL_GUARD = ToolGuard()
+
+# Plans matching any of these are rejected whatever the dry run shows. Matched
+# case-insensitively against the plan itself, code blocks included; YAML
+# `approval.safety_patterns` adds to them.
+_DEFAULT_SAFETY_PATTERNS = [
+    r"\brm\s+-[a-z]*r[a-z]*f",
+    r"\bdrop\s+(?:table|database)\b",
+    r"\btruncate\s+table\b",
+    r"\bmkfs(?:\.\w+)?\b",
+    r"\bdd\s+if=",
+    r"\bchmod\s+-R\s+777\b",
+    r":\(\)\s*\{\s*:\|:&\s*\};:",
+]
+
+@dataclass
+class ApprovalRules:
+    """Deterministic approval from the structured sandbox outcome, applied before the LLM approver.
+
+    Destructive plans and sandboxed code that failed are rejected by rule, and a
+    plan whose code all ran in the sandbox and exited cleanly is approved. Code
+    the sandbox did not run, could not run in isolation or could not verify
+    (a module it lacks), and plans without code go to the LLM approver.
+    """
+    # Added to _DEFAULT_SAFETY_PATTERNS.
+    safety_patterns: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._unsafe = [re.compile(p, re.IGNORECASE) for p in _DEFAULT_SAFETY_PATTERNS + list(self.safety_patterns)]
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "ApprovalRules":
+        data = data or {}
+        return ApprovalRules(**{k: v for k, v in data.items() if k in ApprovalRules.__annotations__})
+
+    def decide(self, plan: str, result: Optional[DryRunResult]) -> Tuple[Optional[str], str]:
+        """Returns ("APPROVE" | "REJECT", reason), or (None, reason) when the LLM approver decides."""
+        if any(p.search(plan) for p in self._unsafe):
+            return "REJECT", "the plan contains a destructive command"
+        if result is not None and result.isolated:
+            if result.limit_exceeded:
+                return "REJECT", f"the dry run exceeded its {result.limit_exceeded} limit"
+            if result.violations:
+                return "REJECT", f"the dry run attempted blocked operations ({', '.join(result.violations)})"
+            if result.missing_module:
+                return None, f"the dry run could not import '{result.missing_module}'"
+            if result.exit_code != 0:
+                return "REJECT", f"the dry run exited with code {result.exit_code}"
+        if result is None:
+            unexecuted = [lang or "untagged" for lang, _ in code_blocks(plan)]
+        else:
+            unexecuted = unexecuted_blocks(plan)
+        if unexecuted:
+            return None, f"code blocks were not dry-run ({', '.join(sorted(set(unexecuted)))})"
+        if result is None:
+            return None, "the plan has no code to dry-run"
+        if not result.isolated:
+            return None, "the sandbox could not be set up"
+        return "APPROVE", "the dry run exited with code 0"
 
 @dataclass
 class SubAgentConfig:
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
     output_key: Optional[str] = None
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
 
 @dataclass
 class WorkflowAgentConfig:
@@ -50,6 +103,8 @@ class WorkflowAgentConfig:
     architecture: str
     sub_agents: List[Union[SubAgentConfig, "WorkflowAgentConfig"]] = field(default_factory=list)
     max_iterations: Optional[int] = None
+    approval: Dict[str, Any] = field(default_factory=dict)
+    dry_run_backend: Dict[str, Any] = field(default_factory=dict)
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "WorkflowAgentConfig":
@@ -64,60 +119,85 @@ class WorkflowAgentConfig:
             name=data["name"],
             architecture=data["architecture"],
             sub_agents=sub_agent_configs,
-            max_iterations=data.get("max_iterations")
+            max_iterations=data.get("max_iterations"),
+            approval=data.get("approval") or {},
+            dry_run_backend=data.get("dry_run_backend") or {}
         )
 
 class DryRunAgent(BaseAgent):
     proposer: Optional[Agent] = None
     dry_runner: Optional[Agent] = None
+    approver: Optional[Agent] = None
     executor: Optional[Agent] = None
+    approval_rules: Optional[ApprovalRules] = None
+    approval_stats: Dict[str, int] = {}
+    local_executor: Optional[LocalDryRunExecutor] = None
 
-    def __init__(self, name: str, sub_agents: Dict[str, Agent]):
+    def __init__(
+        self,
+        name: str,
+        sub_agents: Dict[str, Agent],
+        approval_rules: Optional[ApprovalRules] = None,
+        local_executor: Optional[LocalDryRunExecutor] = None,
+    ):
         super().__init__(name=name)
         self.proposer = sub_agents["Proposer"]
         self.dry_runner = sub_agents["DryRunExecutor"]
+        self.approver = sub_agents["Approver"]
         self.executor = sub_agents["FinalExecutor"]
+        self.approval_rules = approval_rules or ApprovalRules()
+        self.approval_stats = {"rule_approved": 0, "rule_rejected": 0, "escalated": 0}
+        self.local_executor = local_executor
+
+    @property
+    def skip_rate(self) -> float:
+        """Fraction of approval decisions made without an LLM call."""
+        total = sum(self.approval_stats.values())
+        if not total:
+            return 0.0
+        return (total - self.approval_stats["escalated"]) / total
 
     async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
-        # 1. Propose
+        # 1. Propose, while the sandbox workers start
+        if self.local_executor:
+            self.local_executor.warm()
         async for event in self.proposer.run_async(ctx):
             yield event
         
-        # 2. Dry Run
+        # 2. Dry Run - execute code plans in the local sandbox, let the AI dry runner handle the rest
         plan = ctx.session.state.get(self.proposer.output_key, "")
-        async for event in self.dry_runner.run_async(ctx):
-            yield event
-        
-        dry_run_results = ctx.session.state.get(self.dry_runner.output_key, "")
-        
-        # 3. Approval - use an AI agent to make the approval decision
-        approval_agent = Agent(
-            name="ApprovalAgent",
-            model="gemini-2.5-flash-lite",
-            instruction=f"""You are an approval agent. Your job is to review the dry run results and decide whether to approve or reject the plan.
-
-Plan: {plan}
-Dry Run Results: {dry_run_results}
-
-Based on the dry run results, decide if the plan should be approved for execution. 
-- Approve (respond with "APPROVE") if the plan is safe and will work correctly
-- Reject (respond with "REJECT") if the plan has critical issues that would cause failures or harm
-
-Consider:
-- Are there any critical errors that would prevent execution?
-- Are there any safety concerns?
-- Is the plan technically sound?
-- Are there any blocking issues?
-
-Respond with ONLY "APPROVE" or "REJECT".""",
-            output_key="approval_decision"
-        )
-        
-        # Run approval agent
-        async for event in approval_agent.run_async(ctx):
-            yield event
-        
-        approval_result = ctx.session.state.get(approval_agent.output_key, "REJECT").strip()
+        code = extract_code(plan) if self.local_executor else None
+        result: Optional[DryRunResult] = None
+        if code is not None:
+            result = await self.local_executor.run(code)
+            report = result.to_report()
+            ctx.session.state[self.dry_runner.output_key] = report
+            ctx.session.state["dry_run_source"] = "sandbox-cache" if result.cached else "sandbox"
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                content=types.Content(parts=[types.Part(text=report)])
+            )
+        else:
+            ctx.session.state["dry_run_source"] = "llm"
+            async for event in self.dry_runner.run_async(ctx):
+                yield event
+
+        # 3. Approval - rules on the structured sandbox outcome first, the AI approver for what they cannot settle
+        approval_result, reason = self.approval_rules.decide(plan, result)
+        ctx.session.state["approval_reason"] = reason
+        if approval_result is not None:
+            self.approval_stats["rule_approved" if approval_result == "APPROVE" else "rule_rejected"] += 1
+            ctx.session.state[self.approver.output_key] = approval_result
+            ctx.session.state["approval_source"] = "rules"
+        else:
+            self.approval_stats["escalated"] += 1
+            ctx.session.state["approval_source"] = "llm"
+            async for event in self.approver.run_async(ctx):
+                yield event
+            approval_result = ctx.session.state.get(self.approver.output_key, "REJECT").strip()
+        ctx.session.state["approval_metrics"] = {**self.approval_stats, "skip_rate": self.skip_rate}
+
         approval = "y" if approval_result == "APPROVE" else "n"
         
         if approval.lower() == "y":
@@ -143,7 +223,7 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
     if isinstance(config, SubAgentConfig):
         return Agent(
             name=config.name,
-            model=config.model,
+            model=MODEL_CLIENT.model(config.model, config.priority, config.tier),
             instruction=config.instruction,
             tools=resolve_tools(config.tools),
             output_key=config.output_key,
@@ -162,18 +242,26 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
         return DryRunAgent(
             name=config.name,
             sub_agents=sub_agents_map,
+            approval_rules=ApprovalRules.from_dict(config.approval),
+            local_executor=create_local_executor(config.dry_run_backend),
         )
     else:
         raise ValueError(f"Unknown architecture: {config.architecture}")
 
+def create_local_executor(data: Optional[Dict[str, Any]]) -> Optional[LocalDryRunExecutor]:
+    """Returns the isolated local dry-run backend when the config selects it (Linux only)."""
+    sandbox_config = SandboxConfig.from_dict(data)
+    if sandbox_config.backend == "llm":
+        return None
+    if sandbox_config.backend != "local":
+        raise ValueError(f"Unknown dry run backend: {sandbox_config.backend}")
+    if not sys.platform.startswith("linux"):
+        return None
+    return LocalDryRunExecutor(sandbox_config)
+
 def resolve_tools(names: List[str]) -> List[Any]:
-    _maybe_import_builtin_tools()
-    tools = []
-    for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
-    return tools
+    """Looks tools up in the shared registry; unknown names raise when the agent is built."""
+    return [_TOOL_GUARD.wrap(n, TOOL_REGISTRY.get(n)) for n in names]
 
 def create_agent(
     config_file_path: Optional[str] = None
@@ -184,6 +272,7 @@ def create_agent(
 
     with open(config_file_path, "r", encoding="utf-8") as file:
         config_yaml = yaml.safe_load(file)
+    _TOOL_GUARD.configure(config_yaml.get("tool_limits"), config_yaml.get("tool_timeouts"))
     
     config = WorkflowAgentConfig.from_dict(config_yaml)
 
@@ -0,0 +1,549 @@
+"""
+Isolated Local Dry-Run Backend
+-----------------------------------------------------
+- Runs the Python code blocks of a proposed plan for real instead of asking an LLM to imagine the outcome.
+- `workers` warm workers are pre-forked (`warm()` starts them while the plan is still being
+  proposed) and reused across plans. Each is an interpreter (`python -I -S`, empty environment) started
+  through `unshare` in new user, mount, network and PID namespaces, which chroots once into a
+  read-only tree holding only the system and Python directories and the plan: no /proc, /dev,
+  /tmp or home directories, and no network.
+- Every plan runs in a fresh child forked from an idle worker, so it pays a fork rather than an
+  interpreter start, under CPU, memory, file-size and process limits and an audit hook that
+  rejects writes, process creation, sockets, sqlite3 and native libraries. A worker that misses
+  the wall-clock deadline is killed with its namespace and replaced.
+- Site-packages are not loaded: a plan that imports a module the sandbox lacks is reported as
+  not verifiable rather than failed.
+- Results are structured (exit code, limit hit, blocked operations) and cached by plan hash.
+- Linux only. Where namespaces are unavailable nothing is executed: the result says the plan
+  could not be isolated and the approval step leaves the decision to the Approver model.
+"""
+
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import re
+import select
+import selectors
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+_FENCE_RE = re.compile(r"```[ \t]*([\w+#.-]*)[^\n]*\n(.*?)```", re.DOTALL)
+_PYTHON_LANGUAGES = {"python", "py", "python3"}
+_MAX_OUTPUT_BYTES = 64 * 1024
+_MAX_VIOLATIONS = 32
+
+# Exit code of the isolated interpreter when it could not build its sandbox.
+_SETUP_FAILED = 125
+_START_TIMEOUT_SECONDS = 10
+
+
+@dataclass
+class SandboxConfig:
+    """Resource limits and concurrency for the local dry-run backend."""
+    backend: str = "llm"
+    workers: int = 2
+    cpu_seconds: int = 2
+    memory_mb: int = 256
+    wall_clock_seconds: float = 5.0
+    cache_size: int = 128
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "SandboxConfig":
+        data = data or {}
+        return SandboxConfig(**{k: v for k, v in data.items() if k in SandboxConfig.__annotations__})
+
+
+@dataclass
+class DryRunResult:
+    exit_code: int
+    stdout: str = ""
+    stderr: str = ""
+    duration: float = 0.0
+    limit_exceeded: Optional[str] = None
+    violations: List[str] = field(default_factory=list)
+    missing_module: Optional[str] = None
+    isolated: bool = True
+    cached: bool = False
+
+    def to_report(self) -> str:
+        """Formats the result as the text shown with the plan."""
+        if not self.isolated:
+            status = "Dry run not executed: the sandbox could not be set up."
+        elif self.limit_exceeded:
+            status = f"Dry run aborted: {self.limit_exceeded} limit exceeded."
+        elif self.missing_module:
+            status = f"Dry run not verifiable: module '{self.missing_module}' is not available in the sandbox."
+        elif self.exit_code == 0:
+            status = "Dry run exited with code 0."
+        else:
+            status = f"Dry run failed with exit code {self.exit_code}."
+        lines = [status, f"Duration: {self.duration:.3f}s"]
+        if self.violations:
+            lines.append(f"Blocked operations: {', '.join(self.violations)}")
+        if self.stdout:
+            lines.append(f"Stdout:\n{self.stdout}")
+        if self.stderr:
+            lines.append(f"Stderr:\n{self.stderr}")
+        return "\n".join(lines)
+
+
+def code_blocks(plan: str) -> List[tuple]:
+    """Returns the non-empty fenced code blocks of a plan as (language, code) pairs."""
+    return [(lang.lower(), code.strip("\n")) for lang, code in _FENCE_RE.findall(plan or "") if code.strip()]
+
+
+def extract_code(plan: str) -> Optional[str]:
+    """Returns the Python code blocks of a plan joined together, or None if it has none."""
+    blocks = [code for lang, code in code_blocks(plan) if lang in _PYTHON_LANGUAGES]
+    return "\n\n".join(blocks) if blocks else None
+
+
+def unexecuted_blocks(plan: str) -> List[str]:
+    """Returns the languages of code blocks the sandbox does not run (shell, SQL, untagged, ...)."""
+    return [lang or "untagged" for lang, _ in code_blocks(plan) if lang not in _PYTHON_LANGUAGES]
+
+
+def plan_hash(code: str, config: SandboxConfig) -> str:
+    limits = f"{config.cpu_seconds}:{config.memory_mb}:{config.wall_clock_seconds}"
+    return hashlib.sha256(f"{limits}\0{code}".encode("utf-8")).hexdigest()
+
+
+# --- Isolated side (a worker runs as `python -I -S sandbox.py <workdir> <limits>`) ---
+
+_BLOCKED_AUDIT_EVENTS = {
+    # Filesystem mutation
+    "os.remove", "os.rename", "os.mkdir", "os.rmdir", "os.chmod", "os.chown", "os.link",
+    "os.symlink", "os.truncate", "os.utime", "shutil.rmtree", "shutil.move", "mmap.__new__",
+    # Process creation
+    "os.fork", "os.forkpty", "os.system", "os.exec", "os.posix_spawn", "os.spawn",
+    "os.startfile", "subprocess.Popen", "pty.spawn", "os.kill", "os.killpg",
+    # Network
+    "socket.connect", "socket.bind", "socket.sendto", "socket.sendmsg",
+    "socket.getaddrinfo", "socket.gethostbyname", "socket.gethostbyaddr", "socket.__new__",
+    # Native code that opens files itself, out of reach of the "open" event
+    "sqlite3.connect", "sqlite3.connect/handle", "sqlite3.enable_load_extension", "sqlite3.load_extension",
+    "ctypes.dlopen", "ctypes.dlsym", "ctypes.cdata", "ctypes.call_function",
+    # Escaping the sandbox
+    "resource.setrlimit", "resource.prlimit", "sys.addaudithook",
+}
+# Extension modules that do file, process or socket I/O in C; importing them is refused.
+_BLOCKED_NATIVE_MODULES = {"_sqlite3", "_dbm", "_gdbm", "_ctypes", "_posixsubprocess", "_multiprocessing", "mmap"}
+_WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND
+
+# Directories bound read-only into the sandbox root, besides the Python installation.
+_SYSTEM_DIRS = ("/usr", "/bin", "/sbin", "/lib", "/lib64", "/lib32")
+_MS_RDONLY, _MS_NOSUID, _MS_NODEV, _MS_NOEXEC = 0x1, 0x2, 0x4, 0x8
+_MS_REMOUNT, _MS_BIND, _MS_REC, _MS_PRIVATE, _MS_RELATIME = 0x20, 0x1000, 0x4000, 0x40000, 0x200000
+_MS_NOATIME, _MS_NODIRATIME, _ST_RELATIME = 0x400, 0x800, 0x1000
+_PR_SET_NO_NEW_PRIVS = 38
+_LINUX_CAPABILITY_VERSION_3 = 0x20080522
+
+
+def _report(status_fd: int, **message: Any) -> None:
+    os.write(status_fd, (json.dumps(message) + "\n").encode("utf-8"))
+
+
+def _sandbox_audit_hook(status_fd: int):
+    """Audit hook that keeps plan code read-only, offline, single-process and pure Python.
+
+    Audit hooks cannot be removed once installed. Each blocked operation is also
+    reported to the parent, so a plan that swallows the PermissionError is still
+    recorded as having tried.
+    """
+    seen = set()
+
+    def hook(event: str, args: tuple) -> None:
+        if event == "open":
+            _, mode, flags = args
+            if not ((isinstance(mode, str) and any(c in mode for c in "wax+")) or (flags or 0) & _WRITE_FLAGS):
+                return
+            name = "open for writing"
+        elif event == "import" and args[0] in _BLOCKED_NATIVE_MODULES:
+            name = f"import {args[0]}"
+        elif event in _BLOCKED_AUDIT_EVENTS:
+            name = event
+        else:
+            return
+        if name not in seen and len(seen) < _MAX_VIOLATIONS:
+            seen.add(name)
+            _report(status_fd, violation=name)
+        raise PermissionError(f"'{name}' is disabled during dry runs.")
+
+    return hook
+
+
+def _address_space_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _build_root(workdir: str) -> str:
+    """Builds the read-only sandbox root in this (private) mount namespace and chroots into it."""
+    import ctypes
+    libc = ctypes.CDLL(None, use_errno=True)
+
+    def mount(source: Optional[str], target: str, fstype: Optional[str], flags: int, data: Optional[str] = None):
+        encode = lambda s: s.encode() if s is not None else None
+        if libc.mount(encode(source), encode(target), encode(fstype), ctypes.c_ulong(flags), encode(data)) != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"mount {target}: {os.strerror(errno)}")
+
+    def bind_read_only(source: str, target: str) -> None:
+        os.makedirs(target, exist_ok=True)
+        mount(source, target, None, _MS_BIND | _MS_REC)
+        # Flags inherited from the host mount are locked in a user namespace and must be kept.
+        current = os.statvfs(target).f_flag
+        flags = _MS_BIND | _MS_REMOUNT | _MS_RDONLY
+        flags |= current & (_MS_NOSUID | _MS_NODEV | _MS_NOEXEC | _MS_NOATIME | _MS_NODIRATIME)
+        if current & _ST_RELATIME:
+            flags |= _MS_RELATIME
+        mount(None, target, None, flags)
+
+    root = os.path.join(workdir, "root")
+    mount(None, "/", None, _MS_REC | _MS_PRIVATE)
+    mount("tmpfs", root, "tmpfs", _MS_NOSUID | _MS_NODEV, "size=64k,mode=755")
+    for path in _SYSTEM_DIRS:
+        if os.path.islink(path):
+            os.symlink(os.readlink(path), root + path)
+        elif os.path.isdir(path):
+            bind_read_only(path, root + path)
+    for prefix in sorted({sys.base_prefix, sys.prefix, sys.exec_prefix}):
+        if not any(prefix == d or prefix.startswith(d + "/") for d in _SYSTEM_DIRS):
+            bind_read_only(prefix, root + prefix)
+    bind_read_only(os.path.join(workdir, "plan"), root + "/work")
+    mount(None, root, None, _MS_REMOUNT | _MS_RDONLY | _MS_NOSUID | _MS_NODEV)
+    os.chroot(root)
+    os.chdir("/work")
+
+    # Give up every capability the user namespace granted, for good.
+    class CapHeader(ctypes.Structure):
+        _fields_ = [("version", ctypes.c_uint32), ("pid", ctypes.c_int)]
+
+    class CapData(ctypes.Structure):
+        _fields_ = [("effective", ctypes.c_uint32), ("permitted", ctypes.c_uint32), ("inheritable", ctypes.c_uint32)]
+
+    if libc.prctl(_PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0) != 0 or \
+            libc.capset(ctypes.byref(CapHeader(_LINUX_CAPABILITY_VERSION_3, 0)), (CapData * 2)()) != 0:
+        raise OSError(ctypes.get_errno(), "could not drop capabilities")
+    return "/work/plan.py"
+
+
+def _run_plan(script: str, limits: Dict[str, Any], address_space: int, status_fd: int) -> int:
+    """Runs the plan under resource limits and the audit hook; returns its exit code."""
+    import resource, traceback
+    cpu = max(1, int(limits["cpu_seconds"]))
+    # SIGXCPU at the soft limit, SIGKILL one second later if it is ignored.
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    memory = address_space + int(limits["memory_mb"]) * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    sys.addaudithook(_sandbox_audit_hook(status_fd))
+    try:
+        with open(script, "r", encoding="utf-8") as f:
+            code = f.read()
+        exec(compile(code, script, "exec"), {"__name__": "__main__", "__file__": script})
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except ModuleNotFoundError as e:
+        # Site-packages are not in the sandbox, so the plan cannot be verified here.
+        traceback.print_exc()
+        _report(status_fd, exception=type(e).__name__, missing_module=e.name)
+        return 1
+    except BaseException as e:
+        traceback.print_exc()
+        _report(status_fd, exception=type(e).__name__)
+        return 1
+    return 0
+
+
+def _messages(data: bytes) -> List[Dict[str, Any]]:
+    messages = []
+    for line in data.decode("utf-8", "replace").splitlines():
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(message, dict):
+            messages.append(message)
+    return messages
+
+
+def _drain(fds: List[int]) -> Dict[int, bytes]:
+    """Reads pipes to EOF together, so a child blocked on one full pipe cannot stall the others;
+    keeps at most _MAX_OUTPUT_BYTES of each."""
+    data = {fd: b"" for fd in fds}
+    with selectors.DefaultSelector() as selector:
+        for fd in fds:
+            selector.register(fd, selectors.EVENT_READ)
+        while selector.get_map():
+            for key, _ in selector.select():
+                chunk = os.read(key.fd, 65536)
+                if not chunk:
+                    selector.unregister(key.fd)
+                    os.close(key.fd)
+                elif len(data[key.fd]) < _MAX_OUTPUT_BYTES:
+                    data[key.fd] += chunk[:_MAX_OUTPUT_BYTES - len(data[key.fd])]
+    return data
+
+
+def _run_child(script: str, limits: Dict[str, Any], address_space: int) -> Dict[str, Any]:
+    """Runs one plan in a fresh child of the worker and returns how it ended and what it printed."""
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    status_r, status_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        try:
+            os.dup2(out_w, 1)
+            os.dup2(err_w, 2)
+            os.close(0)
+            for fd in (out_r, err_r, status_r, out_w, err_w):
+                os.close(fd)
+            exit_code = _run_plan(script, limits, address_space, status_w)
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(exit_code)
+    for fd in (out_w, err_w, status_w):
+        os.close(fd)
+    start = time.monotonic()
+    output = _drain([out_r, err_r, status_r])
+    _, status = os.waitpid(pid, 0)
+    duration = time.monotonic() - start
+    ending = {"signal": os.WTERMSIG(status)} if os.WIFSIGNALED(status) else {"exit_code": os.WEXITSTATUS(status)}
+    return {
+        **ending,
+        "stdout": output[out_r].decode("utf-8", "replace"),
+        "stderr": output[err_r].decode("utf-8", "replace"),
+        "messages": _messages(output[status_r]),
+        "duration": duration,
+    }
+
+
+def _worker_main(workdir: str, limits: Dict[str, Any]) -> None:
+    """Entry point of a warm worker, PID 1 of its namespaces: builds the sandbox root once, then
+    answers every request line on stdin by running /work/plan.py in a fresh child.
+
+    PID 1 of a namespace ignores signals it has no handler for (including SIGXCPU),
+    so plans never run in this process.
+    """
+    address_space = _address_space_bytes()
+    try:
+        script = _build_root(workdir)
+    except OSError as e:
+        _report(1, setup_error=str(e))
+        os._exit(_SETUP_FAILED)
+    _report(1, ready=True)
+    while sys.stdin.buffer.readline():
+        _report(1, **_run_child(script, limits, address_space))
+    os._exit(0)
+
+
+# --- Agent side ---
+
+# Workers not yet killed, so none outlives the process.
+_LIVE_WORKERS: Set["_Worker"] = set()
+
+
+@atexit.register
+def _kill_workers() -> None:
+    for worker in list(_LIVE_WORKERS):
+        worker.kill()
+
+
+class _Worker:
+    """A warm sandbox: an isolated interpreter that builds its read-only root once and
+    runs each plan it is sent in a fresh child, answering with one JSON line.
+
+    Not tied to an event loop: the executor drives it from a thread.
+    """
+
+    def __init__(self, command: List[str], workdir: str):
+        self.workdir = workdir
+        self.setup_error: Optional[str] = None
+        self.ready = False
+        self.proc = subprocess.Popen(
+            command, env={}, cwd=workdir, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, start_new_session=True,
+        )
+        _LIVE_WORKERS.add(self)
+
+    def _message(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Reads the worker's next answer; None if it exited. Raises TimeoutError after `timeout`."""
+        deadline = time.monotonic() + timeout
+        fd = self.proc.stdout.fileno()
+        line = b""
+        while not line.endswith(b"\n"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return None
+            line += chunk
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return None
+        return message if isinstance(message, dict) else None
+
+    def _start(self) -> bool:
+        try:
+            message = self._message(_START_TIMEOUT_SECONDS)
+        except TimeoutError:
+            message = {"setup_error": f"the worker did not start within {_START_TIMEOUT_SECONDS}s"}
+        if (message or {}).get("ready"):
+            self.ready = True
+            return True
+        self._stop()
+        stderr = self.proc.stderr.read(_MAX_OUTPUT_BYTES).decode("utf-8", "replace").strip()
+        reason = (message or {}).get("setup_error") or f"isolated interpreter exited with {self.proc.returncode}"
+        self.setup_error = f"{stderr}\n{reason}".strip()
+        self.kill()
+        return False
+
+    def run(self, code: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Blocking: runs one plan, first waiting for the worker to finish starting if it has not.
+        None if the worker failed to start or died; raises TimeoutError at the deadline."""
+        if not self.ready and not self._start():
+            return None
+        with open(os.path.join(self.workdir, "plan", "plan.py"), "w", encoding="utf-8") as f:
+            f.write(code)
+        self.proc.stdin.write(b"run\n")
+        self.proc.stdin.flush()
+        return self._message(timeout)
+
+    def _stop(self) -> None:
+        """Kills the worker; unshare's --kill-child takes the plan's whole PID namespace with it."""
+        if self.proc.poll() is None:
+            try:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            self.proc.wait()
+
+    def kill(self) -> None:
+        """Stops the worker for good and removes its files."""
+        _LIVE_WORKERS.discard(self)
+        self._stop()
+        for pipe in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+            pipe.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class LocalDryRunExecutor:
+    """Runs plan code in a pool of warm, isolated, resource-limited workers and caches results by plan hash."""
+
+    def __init__(self, config: SandboxConfig):
+        self.config = config
+        self.stats: Dict[str, int] = {"runs": 0, "cache_hits": 0, "not_isolated": 0, "workers_started": 0}
+        self._cache: "OrderedDict[str, DryRunResult]" = OrderedDict()
+        self._idle: List[_Worker] = []
+        self._slots: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self._unshare = shutil.which("unshare", path="/usr/bin:/bin:/usr/sbin:/sbin")
+
+    def _command(self, workdir: str) -> List[str]:
+        limits = {"cpu_seconds": self.config.cpu_seconds, "memory_mb": self.config.memory_mb}
+        return [
+            self._unshare, "--user", "--map-root-user", "--mount", "--net", "--pid", "--fork", "--kill-child",
+            sys.executable, "-I", "-S", os.path.abspath(__file__), workdir, json.dumps(limits),
+        ]
+
+    def _spawn(self) -> _Worker:
+        workdir = tempfile.mkdtemp(prefix="dry_run_")
+        os.makedirs(os.path.join(workdir, "root"))
+        os.makedirs(os.path.join(workdir, "plan"))
+        self.stats["workers_started"] += 1
+        return _Worker(self._command(workdir), workdir)
+
+    def warm(self) -> None:
+        """Pre-forks workers up to `workers`; they start up while the caller does other work."""
+        if self._unshare:
+            while len(self._idle) < max(1, self.config.workers):
+                self._idle.append(self._spawn())
+
+    async def run(self, code: str) -> DryRunResult:
+        key = plan_hash(code, self.config)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return DryRunResult(**{**cached.__dict__, "cached": True})
+
+        if not self._unshare:
+            self.stats["not_isolated"] += 1
+            return DryRunResult(exit_code=-1, stderr="unshare(1) is not installed.", isolated=False)
+
+        loop = asyncio.get_running_loop()
+        if loop not in self._slots:
+            self._slots[loop] = asyncio.Semaphore(max(1, self.config.workers))
+        async with self._slots[loop]:
+            worker = self._idle.pop() if self._idle else self._spawn()
+            self.stats["runs"] += 1
+            message, timed_out = None, False
+            try:
+                message = await asyncio.to_thread(worker.run, code, self.config.wall_clock_seconds)
+            except TimeoutError:
+                timed_out = True
+            finally:
+                # A worker that missed the deadline, died or was interrupted is replaced.
+                if message is not None:
+                    self._idle.append(worker)
+                else:
+                    worker.kill()
+                    self._idle.append(self._spawn())
+            result = self._result(message, worker.setup_error, timed_out)
+
+        if not result.isolated:
+            self.stats["not_isolated"] += 1
+            return result
+        self._cache[key] = result
+        if len(self._cache) > self.config.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def _result(self, message: Optional[Dict[str, Any]], setup_error: Optional[str], timed_out: bool) -> DryRunResult:
+        if timed_out:
+            return DryRunResult(exit_code=-signal.SIGKILL, duration=self.config.wall_clock_seconds,
+                                limit_exceeded="wall-clock")
+        if message is None:
+            reason = setup_error or "the worker exited"
+            return DryRunResult(exit_code=-1, stderr=f"Sandbox setup failed: {reason}", isolated=False)
+
+        messages = message.get("messages", [])
+        violations = [m["violation"] for m in messages if "violation" in m]
+        exceptions = [m["exception"] for m in messages if "exception" in m]
+        missing_module = next((m["missing_module"] for m in messages if "missing_module" in m), None)
+        limit_exceeded = None
+        if "signal" in message:
+            exit_code = -int(message["signal"])
+            if message["signal"] in (signal.SIGXCPU, signal.SIGKILL):
+                limit_exceeded = "CPU time"
+            elif message["signal"] == signal.SIGXFSZ:
+                limit_exceeded = "file write"
+        else:
+            exit_code = int(message["exit_code"])
+            if "MemoryError" in exceptions:
+                limit_exceeded = "memory"
+        return DryRunResult(exit_code=exit_code, stdout=message.get("stdout", ""), stderr=message.get("stderr", ""),
+                            duration=message.get("duration", 0.0), limit_exceeded=limit_exceeded,
+                            violations=violations, missing_module=missing_module)
+
+
+if __name__ == "__main__":
+    _worker_main(sys.argv[1], json.loads(sys.argv[2]))
@@ -14,32 +14,24 @@ from dataclasses import dataclass, field
 
 from google.adk.agents import Agent, BaseAgent, LlmAgent, SequentialAgent, LoopAgent, ParallelAgent
 
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
+from agent_tools import TOOL_REGISTRY, ToolGuard
+from dataflow import DataflowAgent, DataflowGraph, Step, staged_agent
+from model_client import MODEL_CLIENT
+from prompt_budget import PromptBudget
 
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except ImportError:
-        pass
-    try:
-        from google.adk.tools import code_executor
-        _BUILTIN_TOOL_REGISTRY["code_executor"] = code_executor
-    except ImportError:
-        pass
+# Per-tool timeouts, concurrency limits and circuit breakers, configured from YAML
+_TOOL_GUARD = ToolGuard()
 
 @dataclass
 class SubAgentConfig:
     name: str
-    model: str
     instruction: str
     tools: List[str] = field(default_factory=list)
     output_key: Optional[str] = None
+    depends_on: List[str] = field(default_factory=list)
+    priority: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
 
 @dataclass
 class WorkflowAgentConfig:
@@ -47,6 +39,10 @@ class WorkflowAgentConfig:
     architecture: str
     sub_agents: List[Union[SubAgentConfig, "WorkflowAgentConfig"]] = field(default_factory=list)
     max_iterations: Optional[int] = None
+    prompt_budget: Dict[str, Any] = field(default_factory=dict)
+    schedule: str = "sequential"
+    inputs: List[str] = field(default_factory=list)
+    depends_on: List[str] = field(default_factory=list)
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "WorkflowAgentConfig":
@@ -61,23 +57,33 @@ class WorkflowAgentConfig:
             name=data["name"],
             architecture=data["architecture"],
             sub_agents=sub_agent_configs,
-            max_iterations=data.get("max_iterations")
+            max_iterations=data.get("max_iterations"),
+            prompt_budget=data.get("prompt_budget") or {},
+            schedule=data.get("schedule", "sequential"),
+            inputs=data.get("inputs") or [],
+            depends_on=data.get("depends_on") or [],
         )
 
-def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig]) -> BaseAgent:
+def build_agent_from_config(
+    config: Union[SubAgentConfig, WorkflowAgentConfig], prompt_budget: Optional[PromptBudget] = None
+) -> BaseAgent:
     """Recursively builds agents and workflow agents from config."""
     if isinstance(config, SubAgentConfig):
         return Agent(
             name=config.name,
-            model=config.model,
-            instruction=config.instruction,
+            model=MODEL_CLIENT.model(config.model, config.priority, config.tier),
+            instruction=prompt_budget.instruction(config.name, config.instruction) if prompt_budget else config.instruction,
             tools=resolve_tools(config.tools),
             output_key=config.output_key,
         )
     
-    sub_agents = [build_agent_from_config(sub) for sub in config.sub_agents]
+    sub_agents = [build_agent_from_config(sub, prompt_budget) for sub in config.sub_agents]
     
     if config.architecture == "sequential":
+        if config.schedule == "dataflow":
+            return DataflowAgent(name=config.name, sub_agents=sub_agents, graph=DataflowGraph.of(config))
+        if config.schedule == "stages":
+            return staged_agent(config.name, [Step.of(sub) for sub in config.sub_agents], sub_agents)
         return SequentialAgent(name=config.name, sub_agents=sub_agents)
     elif config.architecture == "loop":
         return LoopAgent(name=config.name, sub_agents=sub_agents, max_iterations=config.max_iterations)
@@ -87,13 +93,8 @@ def build_agent_from_config(config: Union[SubAgentConfig, WorkflowAgentConfig])
         raise ValueError(f"Unknown architecture: {config.architecture}")
 
 def resolve_tools(names: List[str]) -> List[Any]:
-    _maybe_import_builtin_tools()
-    tools = []
-    for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
-    return tools
+    """Looks tools up in the shared registry; unknown names raise when the agent is built."""
+    return [_TOOL_GUARD.wrap(n, TOOL_REGISTRY.get(n)) for n in names]
 
 def create_agent(
     config_file_path: Optional[str] = None
@@ -104,9 +105,12 @@ def create_agent(
 
     with open(config_file_path, "r", encoding="utf-8") as file:
         config_yaml = yaml.safe_load(file)
+    _TOOL_GUARD.configure(config_yaml.get("tool_limits"), config_yaml.get("tool_timeouts"))
     
     config = WorkflowAgentConfig.from_dict(config_yaml)
+    # Fail at load on dataflow cycles or {placeholders} no sub-agent produces
+    DataflowGraph.of(config)
 
-    return build_agent_from_config(config)
+    return build_agent_from_config(config, PromptBudget.from_dict(config.prompt_budget))
 
 root_agent = create_agent()
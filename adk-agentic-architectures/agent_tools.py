@@ -0,0 +1,294 @@
+"""
+Shared Tool Registry and Execution Layer
+-----------------------------------------------------
+- TOOL_REGISTRY maps tool names used in YAML `tools:` lists to "module:attribute"
+  targets, discovered from the `tools.yaml` manifest next to this file, any extra
+  manifests in ADK_TOOL_MANIFEST (os.pathsep-separated), and the
+  "adk_agentic_architectures.tools" entry-point group of installed packages.
+  A tool's module is imported only when an agent references the tool, and an
+  unknown or unimportable name raises when the agent is built.
+- Every architecture's `resolve_tools` passes its tools through a ToolGuard so a slow
+  or failing tool cannot stall the async pipeline; tools a dispatcher calls directly
+  (tool_dispatch.py) run through the same guard with `ToolGuard.run`.
+- Limits are configured from the architecture's YAML, per tool name or "default":
+
+    tool_limits:
+      default: {timeout_seconds: 30, max_concurrency: 8, failure_threshold: 5, reset_seconds: 30}
+    tool_timeouts:            # same shape as AgentConfig.tool_timeouts
+      default_seconds: 20
+      google_search: 15
+
+- Python tools (FunctionTool, plain callables) get a timeout, a bounded semaphore and a
+  circuit breaker that fast-fails the tool for `reset_seconds` after
+  `failure_threshold` consecutive failures or timeouts, then lets one trial call through.
+  Failures are returned to the model as an error result instead of raising.
+- Model-side tools (google_search) run inside the model request and are returned
+  unchanged: that request's timeout and retries belong to model_client.py.
+- Tools without configured limits are returned unchanged.
+- google.adk.tools is imported only when a tool is wrapped, so reading the registry
+  does not load ADK's tool package.
+"""
+
+import asyncio
+import contextlib
+import importlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+TOOL_ENTRY_POINT_GROUP = "adk_agentic_architectures.tools"
+_MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools.yaml")
+
+
+class UnknownToolError(ValueError):
+    """A config references a tool name no manifest or entry point provides."""
+
+
+@dataclass
+class ToolSpec:
+    """Where a named tool comes from; `target` is "module:attribute"."""
+    name: str
+    target: str
+    source: str
+    entry_point: Any = None
+
+    def load(self) -> Any:
+        if self.entry_point is not None:
+            return self.entry_point.load()
+        module_name, _, attr = self.target.partition(":")
+        obj = importlib.import_module(module_name)
+        for part in filter(None, attr.split(".")):
+            obj = getattr(obj, part)
+        return obj
+
+
+class ToolRegistry:
+    """Name -> tool lookup with lazy, per-tool imports."""
+
+    def __init__(self, manifest_paths: Optional[List[str]] = None,
+                 entry_point_group: Optional[str] = TOOL_ENTRY_POINT_GROUP):
+        self.manifest_paths = manifest_paths
+        self.entry_point_group = entry_point_group
+        self.specs: Dict[str, ToolSpec] = {}
+        self._loaded: Dict[str, Any] = {}
+        self._discovered = False
+        self._lock = threading.Lock()
+
+    def _manifests(self) -> List[str]:
+        if self.manifest_paths is not None:
+            return list(self.manifest_paths)
+        extra = [p for p in os.environ.get("ADK_TOOL_MANIFEST", "").split(os.pathsep) if p]
+        return [_MANIFEST_PATH, *extra]
+
+    def discover(self) -> "ToolRegistry":
+        """Reads manifests and entry-point metadata; no tool module is imported."""
+        with self._lock:
+            if self._discovered:
+                return self
+            for path in self._manifests():
+                if not os.path.exists(path):
+                    continue
+                with open(path, "r", encoding="utf-8") as f:
+                    manifest = yaml.safe_load(f) or {}
+                for name, target in (manifest.get("tools") or {}).items():
+                    self.specs[name] = ToolSpec(name, str(target), source=path)
+            if self.entry_point_group:
+                for ep in entry_points(group=self.entry_point_group):
+                    if ep.name in self.specs:
+                        logger.warning("Tool '%s' from entry point %s is shadowed by %s",
+                                       ep.name, ep.value, self.specs[ep.name].source)
+                        continue
+                    self.specs[ep.name] = ToolSpec(ep.name, ep.value, source="entry point", entry_point=ep)
+            self._discovered = True
+        return self
+
+    def register(self, name: str, tool: Any) -> None:
+        """Adds a tool by "module:attribute" target or as an already-imported object."""
+        self.discover()
+        if isinstance(tool, str):
+            self.specs[name] = ToolSpec(name, tool, source="register")
+            self._loaded.pop(name, None)
+        else:
+            self.specs[name] = ToolSpec(name, f"{type(tool).__module__}:{name}", source="register")
+            self._loaded[name] = tool
+
+    def names(self) -> List[str]:
+        return sorted(self.discover().specs)
+
+    def get(self, name: str) -> Any:
+        """Imports (once) and returns the tool; raises UnknownToolError or ImportError."""
+        if name in self._loaded:
+            return self._loaded[name]
+        spec = self.discover().specs.get(name)
+        if spec is None:
+            raise UnknownToolError(f"Unknown tool '{name}'. Known tools: {', '.join(self.names()) or 'none'}.")
+        try:
+            tool = spec.load()
+        except (ImportError, AttributeError) as e:
+            raise ImportError(f"Tool '{name}' ({spec.target}, from {spec.source}) could not be loaded: {e}") from e
+        self._loaded[name] = tool
+        return tool
+
+    def resolve(self, names: List[str]) -> List[Any]:
+        return [self.get(n) for n in names]
+
+
+# Shared by every architecture module.
+TOOL_REGISTRY = ToolRegistry()
+
+
+@dataclass
+class ToolLimits:
+    """Execution limits for one tool; None disables a limit."""
+    timeout_seconds: Optional[float] = None
+    max_concurrency: Optional[int] = None
+    failure_threshold: Optional[int] = None
+    reset_seconds: float = 30.0
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "ToolLimits":
+        return ToolLimits(**{k: v for k, v in (data or {}).items() if k in ToolLimits.__annotations__})
+
+    @property
+    def active(self) -> bool:
+        return any(v is not None for v in (self.timeout_seconds, self.max_concurrency, self.failure_threshold))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised by CircuitBreaker.check while a tool is being fast-failed."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one trial) -> closed."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def check(self) -> None:
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial):
+            retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+            raise CircuitOpenError(f"disabled after {self.failures} consecutive failures; retry in {retry_in:.0f}s")
+        if state == "half_open":
+            self._trial = True
+
+    def record(self, ok: bool) -> None:
+        self._trial = False
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class ToolGuard:
+    """Holds per-tool limits, semaphores, breakers and counters for one architecture."""
+
+    def __init__(self, limits: Optional[Dict[str, ToolLimits]] = None):
+        self.limits: Dict[str, ToolLimits] = limits or {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._semaphores: Dict[Any, asyncio.Semaphore] = {}
+
+    def configure(self, tool_limits: Optional[Dict[str, Any]] = None,
+                  tool_timeouts: Optional[Dict[str, Any]] = None) -> "ToolGuard":
+        """Loads `tool_limits` and `tool_timeouts` YAML sections; timeouts fill in missing timeout_seconds."""
+        limits = {name: ToolLimits.from_dict(spec) for name, spec in (tool_limits or {}).items()}
+        for name, seconds in (tool_timeouts or {}).items():
+            name = "default" if name == "default_seconds" else name
+            limit = limits.setdefault(name, ToolLimits())
+            if limit.timeout_seconds is None:
+                limit.timeout_seconds = float(seconds)
+        self.limits = limits
+        return self
+
+    def limits_for(self, name: str) -> ToolLimits:
+        """The tool's own limits, with any it leaves unset taken from "default"."""
+        default = self.limits.get("default") or ToolLimits()
+        own = self.limits.get(name)
+        if own is None:
+            return default
+        return ToolLimits(**{
+            k: getattr(own, k) if getattr(own, k) is not None else getattr(default, k)
+            for k in ToolLimits.__annotations__
+        })
+
+    def breaker(self, name: str) -> Optional[CircuitBreaker]:
+        limits = self.limits_for(name)
+        if not limits.failure_threshold:
+            return None
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(limits.failure_threshold, limits.reset_seconds)
+        return self.breakers[name]
+
+    def semaphore(self, name: str) -> Any:
+        limits = self.limits_for(name)
+        if not limits.max_concurrency:
+            return contextlib.nullcontext()
+        key = (id(asyncio.get_running_loop()), name)
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(limits.max_concurrency)
+        return self._semaphores[key]
+
+    def count(self, name: str, outcome: str) -> None:
+        counts = self.stats.setdefault(name, {"calls": 0, "timeouts": 0, "failures": 0, "rejected": 0})
+        counts[outcome] += 1
+
+    async def run(self, name: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Awaits `call()` under the tool's limits; failures come back as an {"error": ...} result."""
+        limits = self.limits_for(name)
+        breaker = self.breaker(name)
+        try:
+            if breaker is not None:
+                breaker.check()
+        except CircuitOpenError as e:
+            self.count(name, "rejected")
+            return {"error": f"Tool '{name}' is {e}."}
+
+        self.count(name, "calls")
+        try:
+            async with self.semaphore(name):
+                result = await asyncio.wait_for(call(), limits.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.count(name, "timeouts")
+            result = {"error": f"Tool '{name}' timed out after {limits.timeout_seconds}s."}
+        except Exception as e:
+            self.count(name, "failures")
+            result = {"error": f"Tool '{name}' failed: {type(e).__name__}: {e}"}
+        if breaker is not None:
+            breaker.record(not (isinstance(result, dict) and "error" in result))
+        return result
+
+    def wrap(self, name: str, tool: Any) -> Any:
+        """Returns `tool` wrapped with its limits, or unchanged if it has none or runs model-side."""
+        if not self.limits_for(name).active:
+            return tool
+        from google.adk.tools import BaseTool, FunctionTool
+
+        from tool_adapters import GuardedTool
+
+        if isinstance(tool, BaseTool) and type(tool).run_async is BaseTool.run_async:
+            return tool
+        if not isinstance(tool, BaseTool):
+            tool = FunctionTool(tool)
+        return GuardedTool(tool, self)
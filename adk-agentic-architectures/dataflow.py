@@ -0,0 +1,326 @@
+"""
+Dataflow Analysis and Scheduling of Sub-Agent Pipelines
+-----------------------------------------------------
+- A sub-agent consumes the session-state keys its instruction references as
+  {key} or {key?} placeholders, and produces its `output_key`. A workflow
+  sub-agent (loop, sequential, parallel) consumes what its members read before
+  any member produces it, and produces everything its members produce.
+- `dependency_stages` groups a sequential pipeline into stages. A sub-agent runs
+  after every earlier sub-agent it depends on: one whose output it reads, one
+  that reads a key it overwrites, or one that writes the same key. Sub-agents in
+  the same stage are independent of each other. A sub-agent that reads no state
+  depends only on the user's input and starts in the first stage; one that must
+  follow another (e.g. to build on its messages in the conversation) names it in
+  `depends_on:`. `staged_agent` builds the stages as a SequentialAgent, where a stage with several members is a
+  ParallelAgent (YAML `schedule: stages`).
+- `DataflowGraph` is the same graph without list order: a sub-agent depends on
+  the producers of the keys it reads, on earlier writers of the keys it writes,
+  and on any sub-agents named in its `depends_on:`. Building it raises
+  DataflowError on cycles and on required keys nothing produces (unless they
+  are listed in the pipeline's `inputs:`). `DataflowAgent` runs each sub-agent
+  on its own branch as soon as its inputs are ready (YAML `schedule: dataflow`).
+- `DataflowGraph.report()` is a dry run: the critical path and the theoretical
+  speedup over running everything in order, counting one unit per model call
+  (a loop counts max_iterations passes of its body).
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Dict, List, Optional, Sequence, Set
+
+from google.adk.agents import BaseAgent, ParallelAgent, SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+
+from prompt_budget import _PLACEHOLDER_RE, _STATE_NAME_RE
+
+logger = logging.getLogger(__name__)
+
+# Scoped state is set outside the pipeline, so it is never reported missing.
+_SCOPED_PREFIXES = ("app:", "user:", "temp:")
+
+
+class DataflowError(ValueError):
+    """A pipeline's dataflow graph has a cycle or reads a key nothing produces."""
+
+
+def _placeholders(instruction: Optional[str]) -> Dict[str, bool]:
+    """State keys an instruction template reads, mapped to whether they are optional."""
+    keys: Dict[str, bool] = {}
+    for match in _PLACEHOLDER_RE.finditer(instruction if isinstance(instruction, str) else ""):
+        key = match.group().lstrip("{").rstrip("}").strip()
+        optional = key.endswith("?")
+        key = key.rstrip("?")
+        if _STATE_NAME_RE.match(key):
+            keys[key] = keys.get(key, True) and optional
+    return keys
+
+
+def consumed_keys(instruction: Optional[str]) -> Set[str]:
+    """State keys an instruction template reads."""
+    return set(_placeholders(instruction))
+
+
+def _get(config: Any, key: str) -> Any:
+    return config.get(key) if isinstance(config, dict) else getattr(config, key, None)
+
+
+@dataclass
+class Step:
+    """One sub-agent of a pipeline, as seen by the dataflow analysis."""
+    name: str
+    consumes: Set[str] = field(default_factory=set)
+    produces: Set[str] = field(default_factory=set)
+    optional: Set[str] = field(default_factory=set)
+    depends_on: List[str] = field(default_factory=list)
+    cost: float = 1.0
+
+    @staticmethod
+    def from_config(name: str, instruction: Optional[str], output_key: Optional[str],
+                    depends_on: Optional[List[str]] = None) -> "Step":
+        keys = _placeholders(instruction)
+        return Step(
+            name=name,
+            consumes=set(keys),
+            produces={output_key} if output_key else set(),
+            optional={k for k, optional in keys.items() if optional},
+            depends_on=list(depends_on or ()),
+        )
+
+    @staticmethod
+    def of(config: Any) -> "Step":
+        """Builds a Step from a sub-agent config (YAML dict or config dataclass)."""
+        members = _get(config, "sub_agents")
+        if not members or not _get(config, "architecture"):
+            return Step.from_config(
+                _get(config, "name"), _get(config, "instruction"), _get(config, "output_key"),
+                _get(config, "depends_on"),
+            )
+        steps = [Step.of(m) for m in members]
+        architecture = _get(config, "architecture")
+        step = Step(name=_get(config, "name"), depends_on=list(_get(config, "depends_on") or ()))
+        for member in steps:
+            # Parallel members cannot see each other's output; in order, earlier output is internal.
+            internal = set() if architecture == "parallel" else step.produces
+            step.consumes |= member.consumes - internal
+            step.optional |= member.optional - internal
+            step.produces |= member.produces
+        step.optional &= step.consumes
+        costs = [m.cost for m in steps]
+        if architecture == "parallel":
+            step.cost = max(costs)
+        elif architecture == "loop":
+            step.cost = sum(costs) * (_get(config, "max_iterations") or 1)
+        else:
+            step.cost = sum(costs)
+        return step
+
+
+def dependencies(steps: Sequence[Step]) -> List[Set[int]]:
+    """For each step, the earlier steps it must run after in list order
+    (read-after-write, write-after-read and write-after-write on state keys,
+    and `depends_on` names)."""
+    deps: List[Set[int]] = []
+    for i, step in enumerate(steps):
+        before = set()
+        for j in range(i):
+            earlier = steps[j]
+            if earlier.produces & (step.consumes | step.produces) or step.produces & earlier.consumes \
+                    or earlier.name in step.depends_on:
+                before.add(j)
+        deps.append(before)
+    return deps
+
+
+def dependency_stages(steps: Sequence[Step]) -> List[List[int]]:
+    """Groups step indices into stages; each stage only depends on earlier stages."""
+    level: List[int] = []
+    for before in dependencies(steps):
+        level.append(1 + max((level[j] for j in before), default=-1))
+    stages: List[List[int]] = [[] for _ in range(max(level, default=-1) + 1)]
+    for i, n in enumerate(level):
+        stages[n].append(i)
+    return stages
+
+
+def staged_agent(name: str, steps: Sequence[Step], agents: Sequence[BaseAgent]) -> BaseAgent:
+    """A SequentialAgent over the dependency stages of `agents` (in pipeline order);
+    stages with several independent agents run them in a ParallelAgent."""
+    stages = dependency_stages(steps)
+    stage_agents: List[BaseAgent] = []
+    for n, stage in enumerate(stages, start=1):
+        if len(stage) == 1:
+            stage_agents.append(agents[stage[0]])
+        else:
+            stage_agents.append(ParallelAgent(name=f"{name}Stage{n}", sub_agents=[agents[i] for i in stage]))
+    logger.info("%s stages: %s", name, " -> ".join(
+        "[" + ", ".join(steps[i].name for i in stage) + "]" for stage in stages))
+    return SequentialAgent(name=name, sub_agents=stage_agents)
+
+
+class DataflowGraph:
+    """Producer -> consumer graph of one pipeline's sub-agents, validated on construction."""
+
+    def __init__(self, name: str, steps: Sequence[Step], inputs: Sequence[str] = (), strict: bool = True):
+        self.name = name
+        self.steps = list(steps)
+        self.inputs = set(inputs)
+        names = {s.name: i for i, s in enumerate(self.steps)}
+        self.deps: List[Set[int]] = []
+        self.missing: Dict[str, List[str]] = {}
+        for i, step in enumerate(self.steps):
+            before = set()
+            for key in step.consumes:
+                producers = [j for j, other in enumerate(self.steps) if j != i and key in other.produces]
+                before.update(producers)
+                if not producers and key not in step.produces and key not in step.optional \
+                        and key not in self.inputs and not key.startswith(_SCOPED_PREFIXES):
+                    self.missing.setdefault(key, []).append(step.name)
+            before.update(j for j in range(i) if self.steps[j].produces & step.produces)
+            for dep in step.depends_on:
+                if dep not in names:
+                    raise DataflowError(f"{name}: {step.name} depends_on unknown sub-agent '{dep}'")
+                before.add(names[dep])
+            self.deps.append(before)
+        self.order = self._topological_order()
+        if strict and self.missing:
+            detail = "; ".join(f"{{{k}}} read by {', '.join(v)}" for k, v in sorted(self.missing.items()))
+            raise DataflowError(f"{name}: no sub-agent produces {detail} (declare external keys in `inputs:`)")
+
+    @staticmethod
+    def of(config: Any, strict: bool = True) -> "DataflowGraph":
+        return DataflowGraph(
+            _get(config, "name"), [Step.of(m) for m in _get(config, "sub_agents") or []],
+            inputs=_get(config, "inputs") or (), strict=strict,
+        )
+
+    def _topological_order(self) -> List[int]:
+        order: List[int] = []
+        state: Dict[int, int] = {}  # 1 = on the current path, 2 = done
+        path: List[int] = []
+
+        def visit(i: int) -> None:
+            if state.get(i) == 2:
+                return
+            if state.get(i) == 1:
+                cycle = path[path.index(i):] + [i]
+                raise DataflowError(f"{self.name}: dependency cycle " + " -> ".join(self.steps[j].name for j in cycle))
+            state[i] = 1
+            path.append(i)
+            for j in sorted(self.deps[i]):
+                visit(j)
+            path.pop()
+            state[i] = 2
+            order.append(i)
+
+        for i in range(len(self.steps)):
+            visit(i)
+        return order
+
+    def critical_path(self) -> List[int]:
+        """Indices of the most expensive chain of dependent steps."""
+        finish: Dict[int, float] = {}
+        via: Dict[int, Optional[int]] = {}
+        for i in self.order:
+            prev = max(self.deps[i], key=lambda j: finish[j], default=None)
+            finish[i] = (finish[prev] if prev is not None else 0.0) + self.steps[i].cost
+            via[i] = prev
+        if not finish:
+            return []
+        i: Optional[int] = max(finish, key=finish.get)
+        path = []
+        while i is not None:
+            path.append(i)
+            i = via[i]
+        return path[::-1]
+
+    def report(self) -> Dict[str, Any]:
+        """Dry-run summary: dependencies, critical path and theoretical speedup."""
+        serial = sum(s.cost for s in self.steps)
+        path = self.critical_path()
+        critical = sum(self.steps[i].cost for i in path)
+        return {
+            "pipeline": self.name,
+            "steps": [
+                {
+                    "name": s.name,
+                    "cost": s.cost,
+                    "after": sorted(self.steps[j].name for j in self.deps[i]),
+                    "reads": sorted(s.consumes),
+                    "writes": sorted(s.produces),
+                }
+                for i, s in enumerate(self.steps)
+            ],
+            "missing": self.missing,
+            "critical_path": [self.steps[i].name for i in path],
+            "serial_cost": serial,
+            "critical_path_cost": critical,
+            "theoretical_speedup": round(serial / critical, 2) if critical else 1.0,
+        }
+
+
+class DataflowAgent(BaseAgent):
+    """Runs each sub-agent as soon as the sub-agents it depends on have finished.
+
+    Each sub-agent runs on its own branch, as in a ParallelAgent, so it does not
+    see the events of sub-agents running beside it; results pass through state.
+    Every event is yielded (and its state delta applied) before the producing
+    sub-agent continues, so a dependent sub-agent always starts with its inputs
+    in state.
+    """
+
+    graph: Any = None
+
+    def __init__(self, name: str, sub_agents: List[BaseAgent], graph: DataflowGraph):
+        super().__init__(name=name, sub_agents=sub_agents, graph=graph)
+
+    def _branch_ctx(self, ctx: InvocationContext, child: BaseAgent) -> InvocationContext:
+        branch_ctx = ctx.model_copy()
+        suffix = f"{self.name}.{child.name}"
+        branch_ctx.branch = f"{ctx.branch}.{suffix}" if ctx.branch else suffix
+        return branch_ctx
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        queue: asyncio.Queue = asyncio.Queue()
+        waiting = {i: set(deps) for i, deps in enumerate(self.graph.deps)}
+        tasks: Dict[int, asyncio.Task] = {}
+
+        async def run(i: int) -> None:
+            error: Optional[BaseException] = None
+            try:
+                async for event in self.sub_agents[i].run_async(self._branch_ctx(ctx, self.sub_agents[i])):
+                    consumed = asyncio.Event()
+                    await queue.put((i, event, consumed))
+                    await consumed.wait()
+            except Exception as e:
+                error = e
+            finally:
+                await queue.put((i, None, error))
+
+        def start_ready() -> None:
+            for i in [i for i, deps in waiting.items() if not deps]:
+                del waiting[i]
+                tasks[i] = asyncio.create_task(run(i))
+
+        start_ready()
+        running = len(tasks)
+        try:
+            while running:
+                i, event, extra = await queue.get()
+                if event is not None:
+                    yield event
+                    extra.set()
+                    continue
+                running -= 1
+                if extra is not None:
+                    raise extra
+                for deps in waiting.values():
+                    deps.discard(i)
+                before = len(tasks)
+                start_ready()
+                running += len(tasks) - before
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
@@ -0,0 +1,61 @@
+"""
+Local Python Tools
+-----------------------------------------------------
+- Tools that run in this process rather than inside the model request, listed in
+  tools.yaml like the model-side ones.
+- A tool dispatcher (tool_dispatch.py) calls them straight from the reasoner's JSON
+  action, with no model call, under the architecture's ToolGuard limits.
+- `calculator` evaluates arithmetic exactly: numbers, + - * / // % ** and
+  parentheses only, parsed with ast (no eval), with bounded exponents.
+"""
+
+import ast
+import operator
+from typing import Any, Dict, Union
+
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+_MAX_EXPONENT = 1000
+_MAX_LENGTH = 500
+
+
+def _evaluate(node: ast.AST) -> Union[int, float]:
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_evaluate(node.operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        if isinstance(node.op, ast.Pow) and abs(right) > _MAX_EXPONENT:
+            raise ValueError(f"exponent {right} is larger than {_MAX_EXPONENT}")
+        return _BINARY_OPS[type(node.op)](left, right)
+    raise ValueError(f"unsupported syntax: {ast.dump(node)[:60]}")
+
+
+def calculator(expression: str) -> Dict[str, Any]:
+    """Evaluates an arithmetic expression, e.g. "(17 * 3) / 4 + 2 ** 10".
+
+    Args:
+        expression: numbers combined with + - * / // % ** and parentheses.
+
+    Returns:
+        {"expression": ..., "result": ...}
+    """
+    expression = str(expression).strip()
+    if len(expression) > _MAX_LENGTH:
+        raise ValueError(f"expression is longer than {_MAX_LENGTH} characters")
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"not an arithmetic expression: {e.msg}") from None
+    return {"expression": expression, "result": _evaluate(tree)}
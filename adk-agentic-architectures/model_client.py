@@ -0,0 +1,479 @@
+"""
+Shared Model Client
+-----------------------------------------------------
+- Every architecture builds its LlmAgents with `model=MODEL_CLIENT.model(name, priority)`
+  instead of a bare model name, so all sub-agents in the process share:
+  - one google-genai Client per event loop, whose httpx pool keeps up to
+    `max_keepalive_connections` warm connections, so sub-agents reuse TLS
+    connections instead of each opening their own;
+  - token buckets for requests per minute and tokens per minute (estimated from
+    the prompt before the call, corrected from the response's usage after it).
+    While a bucket is empty, waiting calls are admitted by priority class, then
+    in arrival order;
+  - retries with full-jitter exponential backoff on 408/429/5xx responses and
+    transport errors. Each retry goes through the limiter again.
+- The backend is whatever ADK's LLMRegistry resolves for the model name, so the
+  offline fake model (tests/fake_model.py) still applies; only Gemini gets the
+  pooled client.
+- Rate limits belong to the provider account, so the one client shared by every
+  architecture loaded in the process is configured once, from `model_client.yaml`
+  next to this file (or the file in ADK_MODEL_CLIENT), which ships default
+  request and token limits. Architecture configs only pick a priority class:
+
+    sub_agents:
+      - name: Controller
+        priority: router      # router, interactive (default) or background
+
+- ADK_MODEL_BASE_URL / ADK_MODEL_API_KEY point the pooled client at another
+  endpoint, e.g. the local fake server in tests/fake_gemini_server.py.
+- Sub-agents declare a `tier:` (router, worker, synthesizer) instead of a `model:`.
+  `model_tiers.yaml` next to this file (or the file in ADK_MODEL_TIERS) maps tiers,
+  cheapest first, to models. A tier is downshifted one step to the tier below it
+  when more calls are queued or in flight than `max_queue_depth`, or when its p95
+  model latency over the last `window` calls exceeds its `latency_slo_ms`, and
+  steps back up after `cooldown_seconds` without a breach. A `model:` pins the
+  sub-agent to that model. Latency is reported per tier.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import random
+import time
+import weakref
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, Tuple
+
+import httpx
+import yaml
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import Client, errors, types
+
+logger = logging.getLogger(__name__)
+
+# Lower is admitted first when the limiter is saturated.
+PRIORITIES: Dict[str, int] = {"router": 0, "interactive": 1, "background": 2}
+DEFAULT_PRIORITY = "interactive"
+_RETRY_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+# Rough prompt size before the response reports actual usage.
+_CHARS_PER_TOKEN = 4
+_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_client.yaml")
+_TIERS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_tiers.yaml")
+# Latency samples kept per tier for reporting.
+_LATENCY_SAMPLES = 1000
+
+
+@dataclass
+class ModelClientConfig:
+    """Connection pool, rate limits and retry policy of the shared client; None disables a limit."""
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    burst_seconds: float = 10.0
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_seconds: float = 30.0
+    retry_attempts: int = 4
+    retry_initial_delay: float = 0.5
+    retry_max_delay: float = 8.0
+    base_url: Optional[str] = None
+    api_key: Optional[str] = None
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "ModelClientConfig":
+        return ModelClientConfig(**{k: v for k, v in (data or {}).items() if k in ModelClientConfig.__annotations__})
+
+    @staticmethod
+    def from_file(path: str) -> "ModelClientConfig":
+        if not os.path.exists(path):
+            return ModelClientConfig()
+        with open(path, "r", encoding="utf-8") as f:
+            return ModelClientConfig.from_dict(yaml.safe_load(f))
+
+
+class TokenBucket:
+    """Refills `per_minute` tokens a minute and holds at most `burst_seconds` worth."""
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (requests larger than the bucket wait for a full one)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Charges (or refunds, if negative) the difference between actual and estimated use."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class PriorityLimiter:
+    """Admits model calls through the RPM/TPM buckets, lowest priority number first."""
+
+    def __init__(self, requests: Optional[TokenBucket], tokens: Optional[TokenBucket]):
+        self.requests = requests
+        self.tokens = tokens
+        self._waiting: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._drainer: Optional[asyncio.Task] = None
+
+    def _delay(self, cost: float) -> float:
+        delays = [0.0]
+        if self.requests is not None:
+            delays.append(self.requests.wait_time(1))
+        if self.tokens is not None:
+            delays.append(self.tokens.wait_time(cost))
+        return max(delays)
+
+    def _take(self, cost: float) -> None:
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(cost)
+
+    async def acquire(self, priority: int, cost: float) -> float:
+        """Waits for capacity for one call of about `cost` tokens; returns the seconds spent waiting."""
+        if not self._waiting and self._delay(cost) == 0.0:
+            self._take(cost)
+            return 0.0
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._order), cost, future))
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain())
+        await future
+        return time.monotonic() - start
+
+    async def _drain(self) -> None:
+        # Re-checks the head after every sleep, so a higher-priority call that
+        # arrived meanwhile goes first.
+        while self._waiting:
+            _, _, cost, future = self._waiting[0]
+            if future.done():  # the caller was cancelled
+                heapq.heappop(self._waiting)
+                continue
+            delay = self._delay(cost)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            heapq.heappop(self._waiting)
+            self._take(cost)
+            future.set_result(None)
+
+
+def estimate_tokens(llm_request: LlmRequest) -> float:
+    """Prompt tokens (from text length) plus the requested output budget."""
+    chars = 0
+    for content in llm_request.contents or []:
+        chars += sum(len(part.text or "") for part in content.parts or [])
+    config = llm_request.config
+    if config is not None and isinstance(config.system_instruction, str):
+        chars += len(config.system_instruction)
+    output = (config.max_output_tokens if config is not None else None) or 0
+    return max(1.0, chars / _CHARS_PER_TOKEN + output)
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, errors.APIError):
+        return error.code in _RETRY_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+@dataclass
+class DownshiftConfig:
+    """When tiers step down to the tier below; None disables a trigger."""
+    max_queue_depth: Optional[int] = None
+    latency_slo_ms: Dict[str, float] = field(default_factory=dict)
+    window: int = 20
+    cooldown_seconds: float = 30.0
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "DownshiftConfig":
+        return DownshiftConfig(**{k: v for k, v in (data or {}).items() if k in DownshiftConfig.__annotations__})
+
+
+class TierPolicy:
+    """Maps model tiers (cheapest first) to models and downshifts tiers under load."""
+
+    def __init__(self, tiers: Optional[Dict[str, str]] = None, downshift: Optional[DownshiftConfig] = None):
+        self.models: Dict[str, str] = dict(tiers or {})
+        self.order: List[str] = list(self.models)
+        self.downshift = downshift or DownshiftConfig()
+        self.level: Dict[str, int] = {tier: 0 for tier in self.order}
+        self.changed: Dict[str, float] = {}
+        self.recent: Dict[str, Deque[float]] = {t: deque(maxlen=self.downshift.window) for t in self.order}
+        self.samples: Dict[str, Deque[float]] = {t: deque(maxlen=_LATENCY_SAMPLES) for t in self.order}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def from_file(path: str) -> "TierPolicy":
+        if not os.path.exists(path):
+            return TierPolicy()
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        return TierPolicy(data.get("tiers"), DownshiftConfig.from_dict(data.get("downshift")))
+
+    def base_model(self, tier: str) -> str:
+        if tier not in self.models:
+            raise ValueError(f"unknown model tier '{tier}' (expected one of {', '.join(self.order) or 'none'})")
+        return self.models[tier]
+
+    def count(self, tier: str, outcome: str) -> None:
+        counts = self.stats.setdefault(tier, {"calls": 0, "downshifted": 0, "downshifts": 0})
+        counts[outcome] += 1
+
+    def _shift(self, tier: str, step: int, reason: str) -> None:
+        level = min(max(self.level[tier] + step, 0), self.order.index(tier))
+        if level == self.level[tier]:
+            return
+        self.level[tier] = level
+        self.changed[tier] = time.monotonic()
+        self.recent[tier].clear()
+        if step > 0:
+            self.count(tier, "downshifts")
+        logger.warning("model tier %s -> %s (%s)", tier, self.current(tier), reason)
+
+    def _cooled(self, tier: str) -> bool:
+        return time.monotonic() - self.changed.get(tier, float("-inf")) >= self.downshift.cooldown_seconds
+
+    def _slo_breached(self, tier: str) -> bool:
+        slo = self.downshift.latency_slo_ms.get(tier)
+        recent = self.recent[tier]
+        return bool(slo) and len(recent) >= min(5, recent.maxlen) and 1000 * percentile(list(recent), 0.95) > slo
+
+    def current(self, tier: str) -> str:
+        return self.models[self.order[self.order.index(tier) - self.level[tier]]]
+
+    def select(self, tier: str, queue_depth: int) -> str:
+        """The model for one call of `tier`, downshifting on queue depth or recovering after cooldown."""
+        limit = self.downshift.max_queue_depth
+        if limit and queue_depth > limit:
+            if self._cooled(tier):
+                self._shift(tier, 1, f"{queue_depth} calls queued > {limit}")
+        elif self.level[tier] and self._cooled(tier) and not self._slo_breached(tier):
+            self._shift(tier, -1, "recovered")
+        self.count(tier, "calls")
+        if self.level[tier]:
+            self.count(tier, "downshifted")
+        return self.current(tier)
+
+    def record(self, tier: str, seconds: float) -> None:
+        """Adds a model latency sample; a p95 over the tier's SLO downshifts it."""
+        self.recent[tier].append(seconds)
+        self.samples[tier].append(seconds)
+        if self._slo_breached(tier) and self._cooled(tier):
+            slo = self.downshift.latency_slo_ms[tier]
+            self._shift(tier, 1, f"p95 {1000 * percentile(list(self.recent[tier]), 0.95):.0f}ms > SLO {slo:g}ms")
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per tier: calls, calls served by a lower tier, downshifts, current model and latency."""
+        result = {}
+        for tier in self.order:
+            if tier not in self.stats and not self.samples[tier]:
+                continue
+            samples = list(self.samples[tier])
+            result[tier] = {
+                **self.stats.get(tier, {"calls": 0, "downshifted": 0, "downshifts": 0}),
+                "model": self.current(tier),
+                "p50_ms": round(1000 * percentile(samples, 0.5), 1),
+                "p95_ms": round(1000 * percentile(samples, 0.95), 1),
+            }
+        return result
+
+
+class PooledGemini(Gemini):
+    """Gemini whose API client is the shared, pooled one for the running event loop."""
+
+    shared: Any = None
+
+    @property
+    def api_client(self) -> Client:
+        return self.shared.genai_client()
+
+
+class SharedModelClient:
+    """Process-wide model access: pooled clients, priority rate limiting, retries, counters."""
+
+    def __init__(self, config: Optional[ModelClientConfig] = None, tiers: Optional[TierPolicy] = None):
+        self.config = config or ModelClientConfig.from_file(os.environ.get("ADK_MODEL_CLIENT") or _CONFIG_PATH)
+        self.tiers = tiers or TierPolicy.from_file(os.environ.get("ADK_MODEL_TIERS") or _TIERS_PATH)
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self.pending = 0
+        self._backends: Dict[Tuple[str, type], BaseLlm] = {}
+        self._limiters: "weakref.WeakKeyDictionary[Any, Optional[PriorityLimiter]]" = weakref.WeakKeyDictionary()
+        self._clients: "weakref.WeakKeyDictionary[Any, Client]" = weakref.WeakKeyDictionary()
+
+    def configure(self, model_client: Optional[Dict[str, Any]] = None) -> "SharedModelClient":
+        """Overrides settings on top of the current ones (tools and tests; architectures never call it)."""
+        if model_client:
+            self.config = ModelClientConfig.from_dict({**asdict(self.config), **model_client})
+            self._limiters = weakref.WeakKeyDictionary()
+            self._clients = weakref.WeakKeyDictionary()
+        return self
+
+    def model(self, name: Optional[str] = None, priority: Optional[str] = None,
+              tier: Optional[str] = None) -> "SharedModel":
+        """The model to pass as `Agent(model=...)` for a sub-agent's pinned model or tier and priority class."""
+        priority = priority or DEFAULT_PRIORITY
+        if priority not in PRIORITIES:
+            raise ValueError(f"unknown model priority '{priority}' (expected one of {', '.join(PRIORITIES)})")
+        if name:
+            return SharedModel(model=name, priority=priority, shared=self)
+        if not tier:
+            raise ValueError("a sub-agent needs a `model:` or a `tier:`")
+        return SharedModel(model=self.tiers.base_model(tier), priority=priority, tier=tier, shared=self)
+
+    def backend(self, name: str) -> BaseLlm:
+        """The registry's model for `name`; Gemini is swapped for PooledGemini."""
+        cls = LLMRegistry.resolve(name)
+        key = (name, cls)
+        if key not in self._backends:
+            if cls is Gemini:
+                self._backends[key] = PooledGemini(model=name, shared=self)
+            else:
+                self._backends[key] = cls(model=name)
+        return self._backends[key]
+
+    def genai_client(self) -> Client:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            config = self.config
+            limits = httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_seconds,
+            )
+            http_options = types.HttpOptions(
+                base_url=config.base_url or os.environ.get("ADK_MODEL_BASE_URL"),
+                async_client_args={"limits": limits},
+            )
+            api_key = config.api_key or os.environ.get("ADK_MODEL_API_KEY")
+            client = Client(api_key=api_key, http_options=http_options) if api_key else Client(http_options=http_options)
+            self._clients[loop] = client
+        return client
+
+    def limiter(self) -> Optional[PriorityLimiter]:
+        loop = asyncio.get_running_loop()
+        if loop not in self._limiters:
+            config = self.config
+            requests = TokenBucket(config.requests_per_minute, config.burst_seconds) if config.requests_per_minute else None
+            tokens = TokenBucket(config.tokens_per_minute, config.burst_seconds) if config.tokens_per_minute else None
+            self._limiters[loop] = PriorityLimiter(requests, tokens) if requests or tokens else None
+        return self._limiters[loop]
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform in [0, min(max_delay, initial * 2^(attempt-1))]."""
+        ceiling = min(self.config.retry_max_delay, self.config.retry_initial_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def count(self, priority: str, outcome: str, amount: float = 1) -> None:
+        counts = self.stats.setdefault(
+            priority, {"calls": 0, "throttled": 0, "queued_seconds": 0.0, "retries": 0, "errors": 0})
+        counts[outcome] += amount
+
+    async def generate(self, model: "SharedModel", llm_request: LlmRequest,
+                       stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        self.pending += 1
+        try:
+            name = self.tiers.select(model.tier, self.pending) if model.tier else model.model
+            llm_request.model = name
+            backend = self.backend(name)
+            limiter = self.limiter()
+            cost = estimate_tokens(llm_request)
+            attempts = max(1, self.config.retry_attempts)
+            self.count(model.priority, "calls")
+            for attempt in range(1, attempts + 1):
+                if limiter is not None:
+                    waited = await limiter.acquire(PRIORITIES[model.priority], cost)
+                    if waited:
+                        self.count(model.priority, "throttled")
+                        self.count(model.priority, "queued_seconds", waited)
+                used: Optional[int] = None
+                yielded = False
+                started = finished = time.monotonic()
+                try:
+                    async for response in backend.generate_content_async(llm_request, stream):
+                        # Time to the last response, not counting the caller's handling of it.
+                        finished = time.monotonic()
+                        if response.usage_metadata and response.usage_metadata.total_token_count:
+                            used = response.usage_metadata.total_token_count
+                        yielded = True
+                        yield response
+                except Exception as e:
+                    # Once output reached the caller, a retry would duplicate it.
+                    if yielded or attempt == attempts or not is_retryable(e):
+                        self.count(model.priority, "errors")
+                        raise
+                    delay = self.backoff(attempt)
+                    self.count(model.priority, "retries")
+                    logger.warning("%s call failed (%s); retry %d/%d in %.2fs", name,
+                                   getattr(e, "code", None) or type(e).__name__, attempt, attempts - 1, delay)
+                    await asyncio.sleep(delay)
+                    continue
+                if model.tier:
+                    self.tiers.record(model.tier, finished - started)
+                if used is not None and limiter is not None and limiter.tokens is not None:
+                    limiter.tokens.adjust(used - cost)
+                return
+        finally:
+            self.pending -= 1
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Counters per priority class, with the mean limiter wait of throttled calls."""
+        result = {}
+        for priority, counts in self.stats.items():
+            throttled = counts["throttled"]
+            result[priority] = {
+                **counts,
+                "queued_seconds": round(counts["queued_seconds"], 3),
+                "mean_wait_ms": round(1000 * counts["queued_seconds"] / throttled, 1) if throttled else 0.0,
+            }
+        return result
+
+
+class SharedModel(BaseLlm):
+    """A model name (the tier's base model, if tiered) bound to the shared client and a priority class."""
+
+    priority: str = DEFAULT_PRIORITY
+    tier: Optional[str] = None
+    shared: Any = None
+
+    @property
+    def capabilities(self) -> Any:
+        return self.shared.backend(self.model).capabilities
+
+    async def generate_content_async(self, llm_request: LlmRequest,
+                                     stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        async for response in self.shared.generate(self, llm_request, stream):
+            yield response
+
+    def connect(self, llm_request: LlmRequest) -> Any:
+        return self.shared.backend(self.model).connect(llm_request)
+
+
+MODEL_CLIENT = SharedModelClient()
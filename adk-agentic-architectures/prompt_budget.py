@@ -0,0 +1,168 @@
+"""
+Prompt Budgets for State-Templated Instructions
+-----------------------------------------------------
+- Instructions interpolate session state ({draft}, {critique}, ...) with no size control,
+  so prompts grow with every iteration or specialist.
+- A PromptBudget gives placeholders a token budget and a truncation strategy, declared in YAML:
+  head, tail, head_tail, or summarize (extractive: leading sentence of each paragraph first).
+- A budget keyed `Agent.placeholder` applies only to that agent's instruction and wins over a
+  plain `placeholder` key, so an agent that rewrites or executes a value can still read it whole.
+- Token counts use a fast local estimate (~4 characters per token); no tokenizer or model call.
+- Every instruction is rendered and logged, budgeted or not: its total size and the raw (and
+  budgeted) size of each placeholder.
+- Shared by every architecture whose YAML has a `prompt_budget:` section (06, 13, 15).
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Same placeholder syntax ADK uses for state injection: {key} or {key?} (optional).
+_PLACEHOLDER_RE = re.compile(r"{+[^{}]*}+")
+_STATE_NAME_RE = re.compile(r"^(?:(?:app|user|temp):)?[A-Za-z_][A-Za-z0-9_]*$")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_STRATEGIES = ("head", "tail", "head_tail", "summarize")
+_MARKER = " [... {n} tokens truncated ...] "
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (~4 characters per token)."""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def _summarize(text: str, max_chars: int) -> str:
+    """Extractive summary: the first sentence of every paragraph, then the rest in order, until full."""
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    sentences = [_SENTENCE_RE.split(p) for p in paragraphs]
+    order = [(i, 0) for i in range(len(sentences))]
+    order += [(i, j) for i, s in enumerate(sentences) for j in range(1, len(s))]
+    chosen, used = set(), 0
+    for i, j in order:
+        cost = len(sentences[i][j]) + 1
+        if used + cost > max_chars:
+            continue
+        chosen.add((i, j))
+        used += cost
+    kept = [" ".join(s[j] for j in range(len(s)) if (i, j) in chosen) for i, s in enumerate(sentences)]
+    return "\n\n".join(k for k in kept if k)
+
+
+def truncate(text: str, max_tokens: int, strategy: str = "head_tail") -> str:
+    """Shrinks `text` to about `max_tokens` estimated tokens using `strategy`."""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    max_chars = max_tokens * 4
+    marker = _MARKER.format(n=tokens - max_tokens)
+    if strategy == "head":
+        return text[:max_chars].rstrip() + marker
+    if strategy == "tail":
+        return marker + text[-max_chars:].lstrip()
+    if strategy == "summarize":
+        summary = _summarize(text, max_chars)
+        return summary if summary else text[:max_chars] + marker
+    head = max_chars // 2
+    return text[:head].rstrip() + marker + text[-(max_chars - head):].lstrip()
+
+
+@dataclass
+class PlaceholderBudget:
+    max_tokens: int
+    strategy: str = "head_tail"
+
+    def __post_init__(self):
+        if self.strategy not in _STRATEGIES:
+            raise ValueError(f"Unknown truncation strategy '{self.strategy}', expected one of {_STRATEGIES}")
+
+
+@dataclass
+class PromptBudget:
+    """Per-placeholder token budgets applied when instructions are rendered."""
+    placeholders: Dict[str, PlaceholderBudget] = field(default_factory=dict)
+    default_max_tokens: Optional[int] = None
+    default_strategy: str = "head_tail"
+    log_prompt_sizes: bool = True
+    stats: Dict[str, int] = field(default_factory=lambda: {"calls": 0, "prompt_tokens": 0, "truncated_tokens": 0})
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "PromptBudget":
+        data = data or {}
+        default_strategy = data.get("default_strategy", "head_tail")
+        placeholders = {}
+        for name, spec in (data.get("placeholders") or {}).items():
+            if isinstance(spec, int):
+                spec = {"max_tokens": spec}
+            placeholders[name] = PlaceholderBudget(
+                max_tokens=int(spec["max_tokens"]), strategy=spec.get("strategy", default_strategy)
+            )
+        return PromptBudget(
+            placeholders=placeholders,
+            default_max_tokens=data.get("default_max_tokens"),
+            default_strategy=default_strategy,
+            log_prompt_sizes=data.get("log_prompt_sizes", True),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.placeholders) or self.default_max_tokens is not None
+
+    def budget_for(self, name: str, agent_name: Optional[str] = None) -> Optional[PlaceholderBudget]:
+        if agent_name and f"{agent_name}.{name}" in self.placeholders:
+            return self.placeholders[f"{agent_name}.{name}"]
+        if name in self.placeholders:
+            return self.placeholders[name]
+        if self.default_max_tokens is not None:
+            return PlaceholderBudget(self.default_max_tokens, self.default_strategy)
+        return None
+
+    def render(self, agent_name: str, template: str, state: Mapping[str, Any]) -> str:
+        """Fills {key}/{key?} placeholders from state, truncating values to their budgets."""
+        sizes: List[str] = []
+
+        def replace(match: re.Match) -> str:
+            key = match.group().lstrip("{").rstrip("}").strip()
+            optional = key.endswith("?")
+            key = key.rstrip("?")
+            if not _STATE_NAME_RE.match(key):
+                return match.group()
+            if key not in state:
+                if optional:
+                    return ""
+                raise KeyError(f"Context variable not found: `{key}`.")
+            value = "" if state[key] is None else str(state[key])
+            budget = self.budget_for(key, agent_name)
+            if budget is None:
+                sizes.append(f"{key}={estimate_tokens(value)}")
+                return value
+            budgeted = truncate(value, budget.max_tokens, budget.strategy)
+            raw_tokens, new_tokens = estimate_tokens(value), estimate_tokens(budgeted)
+            self.stats["truncated_tokens"] += max(0, raw_tokens - new_tokens)
+            sizes.append(f"{key}={raw_tokens}->{new_tokens}")
+            return budgeted
+
+        rendered = _PLACEHOLDER_RE.sub(replace, template)
+        tokens = estimate_tokens(rendered)
+        self.stats["calls"] += 1
+        self.stats["prompt_tokens"] += tokens
+        if self.log_prompt_sizes:
+            logger.info("prompt %s: %d tokens (%s)", agent_name, tokens, ", ".join(sizes) or "no placeholders")
+        return rendered
+
+    def instruction(self, agent_name: str, template: str) -> Union[str, Callable[[Any], str]]:
+        """Returns an instruction provider that renders `template` within budget.
+
+        With logging off, templates without budgeted placeholders are returned
+        unchanged so ADK's own state injection handles them.
+        """
+        names = {m.group().strip("{}?").strip() for m in _PLACEHOLDER_RE.finditer(template)}
+        budgeted = any(self.budget_for(n, agent_name) for n in names if _STATE_NAME_RE.match(n))
+        if not budgeted and not self.log_prompt_sizes:
+            return template
+
+        def provider(readonly_context: Any) -> str:
+            return self.render(agent_name, template, readonly_context.state)
+
+        return provider
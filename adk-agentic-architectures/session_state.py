@@ -0,0 +1,37 @@
+"""
+Session-State Compaction
+-----------------------------------------------------
+- Custom agents that drive their sub-agents in a loop (blackboard, tree of thoughts,
+  graph) pass every sub-agent event through `StateConfig.compact` before yielding it.
+- Keys matching `state.ephemeral_keys` (fnmatch patterns) in YAML are moved out of the
+  event's state delta into the in-process session state, so large intermediates are
+  readable by later steps but never persisted or replayed.
+"""
+
+import fnmatch
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+
+
+@dataclass
+class StateConfig:
+    """Session-state settings. Keys matching `ephemeral_keys` (fnmatch patterns) are
+    moved out of sub-agent state deltas into the in-process session state, so large
+    intermediates are readable by later steps but never persisted or replayed."""
+    ephemeral_keys: List[str] = field(default_factory=list)
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "StateConfig":
+        data = data or {}
+        return StateConfig(**{k: v for k, v in data.items() if k in StateConfig.__annotations__})
+
+    def compact(self, ctx: InvocationContext, event: Event) -> Event:
+        delta = event.actions.state_delta if event.actions else None
+        if not delta or not self.ephemeral_keys:
+            return event
+        for key in [k for k in delta if any(fnmatch.fnmatchcase(k, p) for p in self.ephemeral_keys)]:
+            ctx.session.state[key] = delta.pop(key)
+        return event
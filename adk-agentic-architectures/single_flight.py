@@ -0,0 +1,158 @@
+"""
+Single-Flight Request Coalescing
+-----------------------------------------------------
+- `SingleFlightAgent(root_agent)` wraps any architecture so that concurrent invocations
+  from the same app and user, with the same normalized message, starting session state
+  and agent configuration, share one execution.
+- The first caller (the leader) runs the wrapped agent; callers that arrive while it is
+  in flight (followers) receive a copy of every event as it is produced, re-stamped with
+  their own invocation id so their sessions record the full conversation and state deltas.
+- Only the opening turn of a session is coalesced: a session with earlier events runs on
+  its own, because its history feeds the model.
+- The leader's events are pulled by its own runner, so sequential sub-agents still see
+  each state delta applied before the next step runs.
+- If the leader's caller goes away (cancelled or closed), one follower takes over as
+  leader and runs the agent again in its own session; the events it already received
+  from the abandoned run stay in its session. If the leader fails, its followers raise
+  SingleFlightError.
+- Opt-in: nothing wraps an architecture by default. `tests/single_flight_burst.py`
+  compares a burst of identical requests with and without it; `tests/load_test.py
+  --single-flight` applies it under load.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+
+
+class SingleFlightError(RuntimeError):
+    """The shared execution a follower was waiting on did not complete."""
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def config_fingerprint(agent: BaseAgent) -> str:
+    """Hashes what determines an agent tree's behavior: types, models, instructions, tools, structure."""
+    def describe(a: BaseAgent) -> Dict[str, Any]:
+        instruction = getattr(a, "instruction", None)
+        return {
+            "type": type(a).__qualname__,
+            "name": a.name,
+            "model": str(getattr(a, "model", "") or ""),
+            "instruction": instruction if isinstance(instruction, str) else getattr(instruction, "__qualname__", ""),
+            "output_key": getattr(a, "output_key", None),
+            "max_iterations": getattr(a, "max_iterations", None),
+            "tools": sorted(getattr(t, "name", getattr(t, "__name__", type(t).__name__))
+                            for t in getattr(a, "tools", None) or []),
+            "sub_agents": [describe(s) for s in a.sub_agents],
+        }
+    return hashlib.sha256(json.dumps(describe(agent), sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """Events of one in-flight execution, readable by any number of followers."""
+
+    def __init__(self):
+        self.events: List[Event] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.abandoned = False
+        self.followers = 0
+        self._changed = asyncio.Condition()
+
+    async def publish(self, event: Event) -> None:
+        async with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    async def finish(self, error: Optional[BaseException] = None) -> None:
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self.abandoned = isinstance(error, (asyncio.CancelledError, GeneratorExit))
+            self._changed.notify_all()
+
+    async def wait(self, seen: int) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.done or len(self.events) > seen)
+
+
+class SingleFlightAgent(BaseAgent):
+    """Coalesces identical concurrent invocations of `agent` into one execution."""
+
+    agent: BaseAgent
+    config_hash: str = ""
+    stats: Dict[str, int] = {}
+
+    def __init__(self, agent: BaseAgent, config_hash: Optional[str] = None, name: Optional[str] = None):
+        super().__init__(
+            name=name or f"{agent.name}SingleFlight",
+            agent=agent,
+            sub_agents=[agent],
+            config_hash=config_hash or config_fingerprint(agent),
+            stats={"leaders": 0, "followers": 0, "takeovers": 0, "uncoalesced": 0},
+        )
+        self._flights: Dict[str, _Flight] = {}
+
+    def flight_key(self, ctx: InvocationContext) -> Optional[str]:
+        """Key for invocations that may share an execution, or None to run alone."""
+        if any(e.invocation_id != ctx.invocation_id for e in ctx.session.events):
+            return None
+        parts = ctx.user_content.parts if ctx.user_content and ctx.user_content.parts else []
+        if not parts or any(p.text is None for p in parts):
+            return None
+        state = json.dumps(dict(ctx.session.state), sort_keys=True, default=str)
+        material = "\0".join([self.config_hash, ctx.session.app_name, ctx.session.user_id,
+                               normalize_text("".join(p.text for p in parts)), state])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        key = self.flight_key(ctx)
+        if key is None:
+            self.stats["uncoalesced"] += 1
+            async for event in self.agent.run_async(ctx):
+                yield event
+            return
+
+        took_over = False
+        while (flight := self._flights.get(key)) is not None:
+            self.stats["followers"] += 1
+            flight.followers += 1
+            seen = 0
+            while not flight.done or seen < len(flight.events):
+                await flight.wait(seen)
+                while seen < len(flight.events):
+                    event = flight.events[seen]
+                    seen += 1
+                    yield event.model_copy(update={"id": Event.new_id(), "invocation_id": ctx.invocation_id})
+            if not flight.abandoned:
+                if flight.error is not None:
+                    raise SingleFlightError(f"coalesced execution failed: {flight.error!r}") from flight.error
+                return
+            # The leader's caller went away: the first follower to get here leads a
+            # fresh run, the others follow it.
+            took_over = True
+
+        self.stats["takeovers"] += took_over
+        self.stats["leaders"] += 1
+        flight = self._flights[key] = _Flight()
+        error: Optional[BaseException] = None
+        try:
+            async for event in self.agent.run_async(ctx):
+                await flight.publish(event)
+                yield event
+        except BaseException as e:
+            # Includes cancellation and GeneratorExit, after which a follower takes over.
+            error = e
+            raise
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            await asyncio.shield(flight.finish(error))
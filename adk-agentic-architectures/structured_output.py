@@ -0,0 +1,166 @@
+"""
+Structured Model Output
+-----------------------------------------------------
+- Custom agents and loop stop checks read JSON that a model wrote into session state.
+  `extract_json` parses it tolerantly: the whole text first, then the first JSON
+  object or array inside ```json fences or surrounding prose. orjson is used for
+  the whole-text fast path when it is installed.
+- A sub-agent can declare `output_schema:` (JSON schema) in YAML. Agents without
+  tools then request schema-constrained JSON from the model
+  (response_mime_type + response_json_schema); Gemini does not combine that with
+  tools, so tool-using agents only get the schema checked after parsing.
+- Parse outcomes are counted once per output, per producing agent: parsed (and
+  extracted), prose (no JSON at all), failed, invalid, or, for a loop stop check
+  that reruns the loop on an unusable output, retries.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+from google.genai import types
+
+try:
+    import orjson
+except ImportError:  # optional fast path
+    orjson = None
+
+_FENCE_RE = re.compile(r"```[A-Za-z]*[ \t]*\n?(.*?)```", re.DOTALL)
+_START_RE = re.compile(r"[\[{]")
+_DECODER = json.JSONDecoder()
+# Bounds the scan for a JSON start in long prose.
+_MAX_STARTS = 32
+_JSON_TYPES: Dict[str, Tuple[Type, ...]] = {
+    "object": (dict,), "array": (list,), "string": (str,), "integer": (int,),
+    "number": (int, float), "boolean": (bool,), "null": (type(None),),
+}
+
+# Per producing agent: parsed, extracted (a subset of parsed that needed fence/prose recovery),
+# prose (plain text, no JSON), failed, invalid, retries (unusable, and the loop ran again).
+PARSE_STATS: Dict[str, Dict[str, int]] = {}
+
+
+def _loads(text: str) -> Any:
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+def extract_json(text: Any, expect: Union[Type, Tuple[Type, ...]] = (dict, list)) -> Tuple[Any, bool]:
+    """Returns (value, extracted) for the first JSON value of type `expect` in `text`.
+
+    `extracted` is True when the value had to be dug out of fences or prose.
+    Raises ValueError if there is none.
+    """
+    if isinstance(text, expect):
+        return text, False
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+    if not isinstance(text, str):
+        raise ValueError(f"expected text, got {type(text).__name__}")
+    try:
+        value = _loads(text)
+        if isinstance(value, expect):
+            return value, False
+    except ValueError:
+        pass
+    for chunk in [m.group(1) for m in _FENCE_RE.finditer(text)] + [text]:
+        for i, start in enumerate(_START_RE.finditer(chunk)):
+            if i >= _MAX_STARTS:
+                break
+            try:
+                value, _ = _DECODER.raw_decode(chunk, start.start())
+            except ValueError:
+                continue
+            if isinstance(value, expect):
+                return value, True
+    raise ValueError("no JSON object or array found")
+
+
+def validate(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """Checks the commonly used JSON-schema subset: type, enum, required,
+    properties, items, minItems/maxItems. Returns error messages."""
+    errors: List[str] = []
+    expected = schema.get("type")
+    if expected:
+        names = expected if isinstance(expected, list) else [expected]
+        python_types = tuple(t for n in names for t in _JSON_TYPES.get(n, (object,)))
+        if not isinstance(value, python_types) or (isinstance(value, bool) and "boolean" not in names):
+            return [f"{path}: expected {expected}, got {type(value).__name__}"]
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} not in {schema['enum']}")
+    if isinstance(value, dict):
+        errors += [f"{path}: missing '{k}'" for k in schema.get("required", []) if k not in value]
+        for k, sub in (schema.get("properties") or {}).items():
+            if k in value:
+                errors += validate(value[k], sub, f"{path}.{k}")
+    if isinstance(value, list):
+        if "minItems" in schema and len(value) < schema["minItems"]:
+            errors.append(f"{path}: fewer than {schema['minItems']} items")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{path}: more than {schema['maxItems']} items")
+        if "items" in schema:
+            for i, item in enumerate(value):
+                errors += validate(item, schema["items"], f"{path}[{i}]")
+    return errors
+
+
+def _count(agent: str, outcome: str) -> None:
+    counts = PARSE_STATS.setdefault(
+        agent, {"parsed": 0, "extracted": 0, "prose": 0, "failed": 0, "invalid": 0, "retries": 0}
+    )
+    counts[outcome] += 1
+
+
+def parse_metrics() -> Dict[str, Dict[str, Any]]:
+    """Counters per producing agent, with the share of JSON outputs that could not be used
+    (prose outputs are left out)."""
+    result = {}
+    for agent, counts in PARSE_STATS.items():
+        bad = counts["failed"] + counts["invalid"] + counts["retries"]
+        total = counts["parsed"] + bad
+        result[agent] = {**counts, "failure_rate": round(bad / total, 3) if total else 0.0}
+    return result
+
+
+class StructuredOutputs:
+    """Output schemas of one architecture's sub-agents, looked up by the state key they write."""
+
+    def __init__(self):
+        self.schemas: Dict[str, Dict[str, Any]] = {}
+        self.producers: Dict[str, str] = {}
+
+    def register(self, agent_name: str, output_key: Optional[str], schema: Optional[Dict[str, Any]],
+                 has_tools: bool = False) -> Optional[types.GenerateContentConfig]:
+        """Records the agent as the producer of `output_key` and returns the model
+        config that constrains its output, or None if it cannot be constrained."""
+        if output_key:
+            self.producers[output_key] = agent_name
+            if schema:
+                self.schemas[output_key] = schema
+        if not schema or has_tools:
+            return None
+        return types.GenerateContentConfig(response_mime_type="application/json", response_json_schema=schema)
+
+    def parse(self, key: str, text: Any, expect: Optional[Union[Type, Tuple[Type, ...]]] = None,
+              retry: bool = False) -> Any:
+        """Parses and validates the JSON stored under state `key`; None if unusable.
+
+        Text with no JSON in it is counted as prose. Pass `retry=True` from a loop stop
+        check: an unusable JSON output is then counted once, as a retry.
+        """
+        agent = self.producers.get(key, key)
+        schema = self.schemas.get(key)
+        if expect is None:
+            expect = _JSON_TYPES.get((schema or {}).get("type"), (dict, list))
+        try:
+            value, extracted = extract_json(text, expect)
+        except ValueError:
+            prose = isinstance(text, str) and text.strip() and not _START_RE.search(text)
+            _count(agent, "prose" if prose else "retries" if retry else "failed")
+            return None
+        if schema and validate(value, schema):
+            _count(agent, "retries" if retry else "invalid")
+            return None
+        _count(agent, "parsed")
+        if extracted:
+            _count(agent, "extracted")
+        return value
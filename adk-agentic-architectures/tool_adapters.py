@@ -0,0 +1,46 @@
+"""
+ADK Tool Adapters
+-----------------------------------------------------
+- The google.adk.tools classes behind the shared tool layer, kept out of
+  agent_tools.py so the registry and limits can be read without importing ADK's
+  tool package.
+- GuardedTool runs a locally executed tool under its ToolGuard limits
+  (`ToolGuard.wrap` builds it).
+- `code_execution` enables Gemini's built-in code execution on the model request,
+  the same way google_search is enabled (tools.yaml).
+"""
+
+from typing import Any, Dict, Optional
+
+from google.adk.tools import BaseTool
+from google.genai import types
+
+
+class CodeExecutionTool(BaseTool):
+    """Gemini's built-in code execution, enabled on the model request like google_search."""
+
+    def __init__(self):
+        super().__init__(name="code_execution", description="code_execution")
+
+    async def process_llm_request(self, *, tool_context: Any, llm_request: Any) -> None:
+        llm_request.config = llm_request.config or types.GenerateContentConfig()
+        llm_request.config.tools = llm_request.config.tools or []
+        llm_request.config.tools.append(types.Tool(code_execution=types.ToolCodeExecution()))
+
+
+code_execution = CodeExecutionTool()
+
+
+class GuardedTool(BaseTool):
+    """A locally executed tool run under its ToolGuard limits."""
+
+    def __init__(self, tool: BaseTool, guard: Any):
+        super().__init__(name=tool.name, description=tool.description, is_long_running=tool.is_long_running)
+        self.tool = tool
+        self.guard = guard
+
+    def _get_declaration(self) -> Optional[types.FunctionDeclaration]:
+        return self.tool._get_declaration()
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context: Any) -> Any:
+        return await self.guard.run(self.name, lambda: self.tool.run_async(args=args, tool_context=tool_context))
@@ -0,0 +1,186 @@
+"""
+Tool Result Cache
+-----------------------------------------------------
+- Shared by the tool dispatchers of 02_tool_use and 03_ReAct (tool_dispatch.py).
+- Caches what a tool returned, keyed on tool name plus normalized arguments, so a
+  loop or a later request asking the same thing does not run the tool again. For
+  model-side tools (google_search, code_execution) the cached value is the Actor's
+  answer from the turn that made the calls, so a hit feeds the loop the same
+  content a miss did.
+- Per-tool TTL, max entries and scope are declared in YAML (`tool_cache:` next to
+  `tools:`); a "default" entry covers tools that are not listed. `scope` is "user"
+  (default: one user's sessions share results), "session" or "global".
+- In-memory LRU per tool, plus an optional SQLite tier (`sqlite_path`) that survives
+  restarts and is shared between processes. SQLite reads and writes run in a worker
+  thread, off the event loop, and both tiers hold at most `max_entries` per tool.
+- Hit/miss/expired counters per tool for metrics.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+_MISSING = object()
+_SCOPES = ("global", "user", "session")
+
+
+@dataclass
+class ToolCacheConfig:
+    """Cache settings for one tool."""
+    ttl_seconds: Optional[float] = 300.0
+    max_entries: int = 256
+    case_insensitive: bool = False
+    scope: str = "user"
+    enabled: bool = True
+
+    def __post_init__(self):
+        if self.scope not in _SCOPES:
+            raise ValueError(f"tool_cache scope must be one of {', '.join(_SCOPES)}, got '{self.scope}'")
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "ToolCacheConfig":
+        return ToolCacheConfig(**{k: v for k, v in (data or {}).items() if k in ToolCacheConfig.__annotations__})
+
+
+def normalize_args(args: Any, case_insensitive: bool = False) -> str:
+    """Canonical JSON for tool arguments: sorted keys, collapsed whitespace, optional casefold."""
+    def norm(value: Any) -> Any:
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            return value.casefold() if case_insensitive else value
+        if isinstance(value, dict):
+            return {str(k): norm(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [norm(v) for v in value]
+        return value
+    return json.dumps(norm(args), sort_keys=True, default=str, separators=(",", ":"))
+
+
+@dataclass
+class ToolResultCache:
+    """LRU + TTL cache of tool results, with an optional SQLite tier."""
+    tools: Dict[str, ToolCacheConfig] = field(default_factory=dict)
+    sqlite_path: Optional[str] = None
+    stats: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._entries: Dict[str, "OrderedDict[str, Tuple[float, Any]]"] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        # Guards the connection, which worker threads share.
+        self._db_lock = threading.Lock()
+        if self.sqlite_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.sqlite_path)), exist_ok=True)
+            self._db = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache "
+                "(key TEXT PRIMARY KEY, tool TEXT, created REAL, value TEXT)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, Any]]) -> "ToolResultCache":
+        data = dict(data or {})
+        sqlite_path = data.pop("sqlite_path", None)
+        return ToolResultCache(
+            tools={name: ToolCacheConfig.from_dict(spec) for name, spec in data.items()},
+            sqlite_path=sqlite_path,
+        )
+
+    def config_for(self, tool: str) -> ToolCacheConfig:
+        return self.tools.get(tool) or self.tools.get("default") or ToolCacheConfig(enabled=False)
+
+    def key(self, tool: str, args: Any, user_id: str = "", session_id: str = "") -> str:
+        config = self.config_for(tool)
+        normalized = normalize_args(args, config.case_insensitive)
+        scope = {"global": [], "user": [user_id], "session": [user_id, session_id]}[config.scope]
+        return hashlib.sha256("\0".join([tool, *scope, normalized]).encode("utf-8")).hexdigest()
+
+    def _count(self, tool: str, outcome: str) -> None:
+        counts = self.stats.setdefault(tool, {"hits": 0, "misses": 0, "expired": 0, "evictions": 0})
+        counts[outcome] += 1
+
+    def _remember(self, tool: str, key: str, entry: Tuple[float, Any]) -> None:
+        """Adds an entry to the tool's LRU and evicts the oldest beyond max_entries."""
+        entries = self._entries.setdefault(tool, OrderedDict())
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > self.config_for(tool).max_entries:
+            entries.popitem(last=False)
+            self._count(tool, "evictions")
+
+    def _db_load(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._db_lock:
+            row = self._db.execute("SELECT created, value FROM tool_cache WHERE key = ?", (key,)).fetchone()
+        return (row[0], json.loads(row[1])) if row is not None else None
+
+    def _db_delete(self, key: str) -> None:
+        with self._db_lock:
+            self._db.execute("DELETE FROM tool_cache WHERE key = ?", (key,))
+            self._db.commit()
+
+    def _db_store(self, tool: str, key: str, created: float, value: Any, max_entries: int) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tool_cache VALUES (?, ?, ?, ?)",
+                (key, tool, created, json.dumps(value, default=str)),
+            )
+            self._db.execute(
+                "DELETE FROM tool_cache WHERE tool = ? AND key NOT IN "
+                "(SELECT key FROM tool_cache WHERE tool = ? ORDER BY created DESC LIMIT ?)",
+                (tool, tool, max_entries),
+            )
+            self._db.commit()
+
+    async def get(self, tool: str, args: Any, user_id: str = "", session_id: str = "") -> Any:
+        """Returns the cached result, or the module's _MISSING sentinel (see `missing`)."""
+        config = self.config_for(tool)
+        if not config.enabled:
+            return _MISSING
+        key = self.key(tool, args, user_id, session_id)
+        hit = self._entries.get(tool, {}).get(key)
+        if hit is None and self._db is not None:
+            hit = await asyncio.to_thread(self._db_load, key)
+            if hit is not None:
+                self._remember(tool, key, hit)
+        if hit is not None and config.ttl_seconds is not None and time.time() - hit[0] > config.ttl_seconds:
+            self._entries.get(tool, {}).pop(key, None)
+            if self._db is not None:
+                await asyncio.to_thread(self._db_delete, key)
+            self._count(tool, "expired")
+            hit = None
+        if hit is None:
+            self._count(tool, "misses")
+            return _MISSING
+        if key in self._entries.get(tool, {}):
+            self._entries[tool].move_to_end(key)
+        self._count(tool, "hits")
+        return hit[1]
+
+    async def put(self, tool: str, args: Any, value: Any, user_id: str = "", session_id: str = "") -> None:
+        config = self.config_for(tool)
+        if not config.enabled:
+            return
+        key = self.key(tool, args, user_id, session_id)
+        now = time.time()
+        self._remember(tool, key, (now, value))
+        if self._db is not None:
+            await asyncio.to_thread(self._db_store, tool, key, now, value, config.max_entries)
+
+    @staticmethod
+    def missing(value: Any) -> bool:
+        return value is _MISSING
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Counters per tool, with the hit rate over hits and misses."""
+        result = {}
+        for tool, counts in self.stats.items():
+            lookups = counts["hits"] + counts["misses"]
+            result[tool] = {**counts, "hit_rate": round(counts["hits"] / lookups, 3) if lookups else 0.0}
+        return result
@@ -0,0 +1,222 @@
+"""
+Structured-Action Tool Dispatch
+-----------------------------------------------------
+- Shared by the config-driven tool loops (02_tool_use, 03_ReAct): a sub-agent with
+  `dispatch_from:` becomes a ToolDispatcher that runs the tool call a reasoner wrote
+  as JSON into session state, instead of asking a model to re-read the action.
+- Python tools run directly through the architecture's ToolGuard, so the
+  `tool_limits:` timeouts, concurrency caps and circuit breakers apply as they do to
+  model-called tools. Model-side tools and unparseable actions go to the fallback
+  Actor model, one request per step however many model-side calls the action has,
+  while that step's Python calls run alongside it.
+- StopChecker ends the loop once the action result is a final {"response": ...}.
+- Both read state through the architecture's StructuredOutputs, so parse outcomes
+  are counted per producing agent.
+- With `tool_cache:`, results are reused through the shared ToolResultCache
+  (tool_cache.py): a Python tool's return value, or for model-side calls the
+  Actor's answer, which is what the loop reads from the action result.
+"""
+
+import asyncio
+import inspect
+import json
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.agents import Agent, BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.tools import BaseTool, FunctionTool
+from google.genai import types
+
+from agent_tools import ToolGuard
+from structured_output import StructuredOutputs
+from tool_cache import ToolResultCache
+
+
+class StopChecker(BaseAgent):
+    """A custom agent that checks the actor's output and stops the loop."""
+    outputs: Any
+    key: str = "action_result"
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        action_json = self.outputs.parse(self.key, ctx.session.state.get(self.key, "{}"), dict, retry=True)
+        should_stop = action_json is not None and "response" in action_json
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            actions=EventActions(escalate=should_stop)
+        )
+
+
+def _local_callable(tool: Any) -> Optional[Any]:
+    """The Python function behind a tool, or None for tools only the model can run."""
+    if isinstance(tool, FunctionTool):
+        return tool.func
+    if callable(tool) and not isinstance(tool, BaseTool):
+        return tool
+    return None
+
+
+def model_side(tool: Any) -> bool:
+    """True for tools that only run inside a model request (google_search, code_execution)."""
+    return _local_callable(tool) is None
+
+
+def _tool_calls(action: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The calls in an action: a "tool_calls" list, or the single tool_name/tool_input pair."""
+    if not action:
+        return []
+    if isinstance(action.get("tool_calls"), list):
+        return [c for c in action["tool_calls"] if isinstance(c, dict) and c.get("tool_name")]
+    if action.get("tool_name"):
+        return [action]
+    return []
+
+
+def _answer(event: Event) -> Optional[str]:
+    """The text of a final model turn, as ADK stores it under the agent's output_key."""
+    parts = event.content.parts if event.content and event.content.parts else []
+    text = "".join(p.text for p in parts if p.text and not p.thought)
+    return text or None
+
+
+class ToolDispatcher(BaseAgent):
+    """Executes the reasoner's structured action without a second model call.
+
+    A {"response": ...} action is final and passed through. Tool calls, either one
+    {"tool_name", "tool_input"} pair or a {"tool_calls": [...]} list, run concurrently:
+    Python tools directly, each under its tool's ToolGuard limits, while the fallback
+    Actor model makes all the model-side calls (google_search, code_execution) in one
+    request. A model-side-only action's result is the Actor's answer; otherwise the
+    observations are stored together. Unparseable output goes to the Actor as is.
+    With a cache, Python tool results and the Actor's answer to an action's
+    model-side calls are reused for the same tools and normalized arguments, within
+    the cache's user or session scope; a hit stores the same action result as a miss.
+    """
+    action_key: str
+    output_key: str
+    tools: Dict[str, Any] = {}
+    fallback: Agent
+    guard: Any = None
+    max_calls_per_step: int = 8
+    cache: Any = None
+    outputs: Any = None
+
+    def __init__(
+        self,
+        name: str,
+        action_key: str,
+        output_key: str,
+        tools: Dict[str, Any],
+        fallback: Agent,
+        outputs: StructuredOutputs,
+        guard: ToolGuard,
+        max_calls_per_step: int = 8,
+        cache: Optional[ToolResultCache] = None,
+    ):
+        super().__init__(
+            name=name,
+            action_key=action_key,
+            output_key=output_key,
+            tools=tools,
+            fallback=fallback,
+            guard=guard,
+            max_calls_per_step=max_calls_per_step,
+            cache=cache,
+            outputs=outputs,
+            sub_agents=[fallback],
+        )
+
+    async def _call_tool(self, name: str, tool_input: Any, scope: Dict[str, str]) -> Dict[str, Any]:
+        if name not in self.tools:
+            return {"tool_name": name, "error": f"Tool not available. Available tools: {sorted(self.tools)}"}
+        if self.cache is not None:
+            cached = await self.cache.get(name, tool_input, **scope)
+            if not self.cache.missing(cached):
+                return {"tool_name": name, "observation": cached}
+        func = _local_callable(self.tools[name])
+        args, kwargs = ((), tool_input) if isinstance(tool_input, dict) else ((tool_input,), {})
+
+        def call() -> Any:
+            if inspect.iscoroutinefunction(func):
+                return func(*args, **kwargs)
+            return asyncio.to_thread(func, *args, **kwargs)
+
+        result = await self.guard.run(name, call)
+        if isinstance(result, dict) and "error" in result:
+            return {"tool_name": name, "error": result["error"]}
+        if self.cache is not None:
+            await self.cache.put(name, tool_input, result, **scope)
+        return {"tool_name": name, "observation": result}
+
+    async def _run_fallback(self, ctx: InvocationContext, calls: List[Dict[str, Any]],
+                            scope: Dict[str, str]) -> AsyncGenerator[Event, None]:
+        """Runs the Actor model once for every model-side call in `calls`, which it makes
+        together in that one request. With a cache, the Actor's answer is stored for
+        these calls and a hit replays exactly that answer as the action result."""
+        name = calls[0]["tool_name"]
+        args = calls[0].get("tool_input") if len(calls) == 1 else [[c["tool_name"], c.get("tool_input")] for c in calls]
+        if self.cache is not None:
+            cached = await self.cache.get(name, args, **scope)
+            if not self.cache.missing(cached):
+                yield self._result_event(ctx, cached)
+                return
+        answer = None
+        async for event in self.fallback.run_async(ctx):
+            answer = _answer(event) if event.is_final_response() else answer
+            yield event
+        if self.cache is not None and answer:
+            await self.cache.put(name, args, answer, **scope)
+
+    def _result_event(self, ctx: InvocationContext, result: str, text: Optional[str] = None) -> Event:
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=result if text is None else text)]),
+            actions=EventActions(state_delta={self.output_key: result}),
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        action = self.outputs.parse(self.action_key, ctx.session.state.get(self.action_key), dict)
+        calls = _tool_calls(action)
+        scope = {"user_id": ctx.session.user_id, "session_id": ctx.session.id}
+
+        if action is not None and "response" in action:
+            text = action["response"] if isinstance(action["response"], str) else json.dumps(action["response"])
+            yield self._result_event(ctx, json.dumps({"response": action["response"]}, default=str), text)
+            return
+        if not calls:
+            async for event in self.fallback.run_async(ctx):
+                yield event
+            return
+
+        run, skipped = calls[:self.max_calls_per_step], calls[self.max_calls_per_step:]
+        is_model = [c["tool_name"] in self.tools and model_side(self.tools[c["tool_name"]]) for c in run]
+        model_calls = [c for c, m in zip(run, is_model) if m]
+        local_calls = [c for c, m in zip(run, is_model) if not m]
+        # Python tools run while the Actor model makes the model-side calls.
+        local = asyncio.ensure_future(asyncio.gather(
+            *(self._call_tool(c["tool_name"], c.get("tool_input"), scope) for c in local_calls)
+        ))
+        answer = None
+        try:
+            if model_calls:
+                async for event in self._run_fallback(ctx, model_calls, scope):
+                    answer = _answer(event) if event.is_final_response() else answer
+                    yield event
+            observations = list(await local)
+        finally:
+            local.cancel()
+        if model_calls and not local_calls and not skipped:
+            return
+
+        if model_calls:
+            observations.append({"tool_names": [c["tool_name"] for c in model_calls], "observation": answer})
+        observations += [
+            {"tool_name": c["tool_name"], "error": f"Skipped: at most {self.max_calls_per_step} calls per step"}
+            for c in skipped
+        ]
+        observation = {"observations": observations} if "tool_calls" in action else observations[0]
+        yield self._result_event(ctx, json.dumps(observation, default=str))
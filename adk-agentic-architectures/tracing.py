@@ -0,0 +1,241 @@
+"""
+Agent Tracing
+-----------------------------------------------------
+- OpenTelemetry-style spans for every agent run and model call, recorded by an ADK
+  plugin (TracingPlugin), so no architecture needs to change.
+- Agent spans record the agent name, its iteration (how many times that agent has
+  started in the invocation, so LoopAgent/ReAct rounds are distinguishable) and the
+  time to the first event the agent or its sub-agents produced; model spans record
+  the model name, prompt/completion tokens and time to first response.
+- Parents follow the agent tree, including ParallelAgent branches, because the current
+  span is tracked in a context variable that each asyncio task copies.
+- Spans go to an exporter: InMemorySpanCollector keeps them in a list;
+  OtlpJsonFileExporter appends one OTLP/JSON `resourceSpans` document per invocation
+  to a JSON-lines file (summarize it with tests/trace_summary.py).
+- Tracing is opt-in per runner; nothing is recorded unless the plugin is passed in:
+
+    from tracing import OtlpJsonFileExporter, TracingPlugin
+    runner = InMemoryRunner(agent=root_agent, plugins=[TracingPlugin(OtlpJsonFileExporter("trace.jsonl"))])
+
+  tests/load_test.py --trace does this for offline runs, and tests/runtime_checks.py
+  checks the span tree it produces.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+
+SCOPE_NAME = "adk-agentic-architectures"
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent: Optional["Span"] = None
+    start_ns: int = 0
+    end_ns: int = 0
+    first_event_ns: int = 0
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def end(self, status: Optional[str] = None) -> None:
+        if not self.end_ns:
+            self.end_ns = time.time_ns()
+            if status:
+                self.status = status
+            if self.first_event_ns:
+                self.attributes["time_to_first_event_ms"] = round((self.first_event_ns - self.start_ns) / 1e6, 3)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent.span_id if self.parent else "",
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.status} if self.status not in ("ok", "") else {"code": 1},
+        }
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _new_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+class InMemorySpanCollector:
+    """Keeps finished spans in memory."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+
+    def find(self, name: str) -> List[Span]:
+        return [s for s in self.spans if s.name == name]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+
+class OtlpJsonFileExporter:
+    """Appends spans to a JSON-lines file in the OTLP/JSON trace format."""
+
+    def __init__(self, path: str, service_name: str = SCOPE_NAME):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        if not spans:
+            return
+        document = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": _otlp_value(self.service_name)}]},
+                "scopeSpans": [{"scope": {"name": SCOPE_NAME}, "spans": [s.to_otlp() for s in spans]}],
+            }]
+        }
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(document) + "\n")
+
+
+_CURRENT_SPAN: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("adk_trace_span", default=None)
+
+
+class TracingPlugin(BasePlugin):
+    """Opens a span around every agent run and model call and exports them per invocation."""
+
+    def __init__(self, exporter: Any, name: str = "tracing"):
+        super().__init__(name=name)
+        self.exporter = exporter
+        self._trace_ids: Dict[str, str] = {}
+        self._spans: Dict[str, List[Span]] = defaultdict(list)
+        self._open_agents: Dict[str, Dict[str, Span]] = defaultdict(dict)
+        self._iterations: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def _start(self, invocation_id: str, name: str, attributes: Dict[str, Any]) -> Span:
+        trace_id = self._trace_ids.setdefault(invocation_id, _new_id(16))
+        span = Span(name=name, trace_id=trace_id, span_id=_new_id(8), parent=_CURRENT_SPAN.get(),
+                    start_ns=time.time_ns(), attributes={"invocation_id": invocation_id, **attributes})
+        self._spans[invocation_id].append(span)
+        _CURRENT_SPAN.set(span)
+        return span
+
+    def _finish(self, span: Optional[Span], status: Optional[str] = None) -> None:
+        if span is None:
+            return
+        span.end(status)
+        _CURRENT_SPAN.set(span.parent)
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        invocation_id = callback_context.invocation_id
+        self._iterations[invocation_id][agent.name] += 1
+        span = self._start(invocation_id, f"agent {agent.name}", {
+            "agent.name": agent.name,
+            "agent.type": type(agent).__name__,
+            "agent.iteration": self._iterations[invocation_id][agent.name],
+        })
+        self._open_agents[invocation_id][agent.name] = span
+        return None
+
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        span = self._open_agents[callback_context.invocation_id].pop(agent.name, None)
+        self._finish(span)
+        return None
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest):
+        self._start(callback_context.invocation_id, f"llm {llm_request.model}", {
+            "agent.name": callback_context.agent_name,
+            "llm.model": llm_request.model or "",
+        })
+        return None
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse):
+        span = _CURRENT_SPAN.get()
+        if span is None or not span.name.startswith("llm ") or span.end_ns:
+            return None
+        now = time.time_ns()
+        span.first_event_ns = span.first_event_ns or now
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            span.attributes["llm.prompt_tokens"] = usage.prompt_token_count or 0
+            span.attributes["llm.completion_tokens"] = usage.candidates_token_count or 0
+        if not llm_response.partial:
+            self._finish(span, llm_response.error_code)
+        return None
+
+    async def on_model_error_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest,
+                                      error: Exception):
+        span = _CURRENT_SPAN.get()
+        if span is not None and span.name.startswith("llm "):
+            self._finish(span, f"{type(error).__name__}: {error}")
+        return None
+
+    async def on_event_callback(self, *, invocation_context: InvocationContext, event: Event) -> Optional[Event]:
+        span = self._open_agents[invocation_context.invocation_id].get(event.author)
+        now = time.time_ns()
+        while span is not None and not span.first_event_ns:
+            span.first_event_ns = now
+            span = span.parent
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        invocation_id = invocation_context.invocation_id
+        spans = self._spans.pop(invocation_id, [])
+        for span in spans:
+            # Agents cancelled mid-run (e.g. an ensemble's early exit) never reach after_agent.
+            if not span.end_ns:
+                span.end("cancelled")
+        self._trace_ids.pop(invocation_id, None)
+        self._open_agents.pop(invocation_id, None)
+        self._iterations.pop(invocation_id, None)
+        self.exporter.export(spans)
+
+
+def load_spans(path: str) -> List[Dict[str, Any]]:
+    """Reads the spans back from an OtlpJsonFileExporter file."""
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource in json.loads(line)["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    for span in scope["spans"]:
+                        attrs = {a["key"]: next(iter(a["value"].values())) for a in span["attributes"]}
+                        spans.append({**span, "attributes": attrs})
+    return spans
@@ -4,6 +4,7 @@ Default ADK Root Agent (config-driven, agent-agnostic)
 - Uses Google ADK's Agent class directly
 - Configurable via YAML at runtime (path from AGENT_CONFIG env var or default)
 - Exposes `root_agent` for ADK evaluation import
+- Enforces `max_turns` (model calls per invocation) and `tool_timeouts`
 
 This agent is intentionally simple and uses ADK's Agent class directly.
 The ADK Runner handles all execution, async operations, and session management.
@@ -11,6 +12,10 @@ The ADK Runner handles all execution, async operations, and session management.
 
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
+import asyncio
+import functools
+import importlib
+import inspect
 import os
 
 try:
@@ -22,27 +27,20 @@ import json
 # ADK imports
 try:
     from google.adk.agents import Agent
+    from google.adk.models.llm_response import LlmResponse
+    from google.genai import types
 except Exception as e:
     Agent = None
 
-# Built-in tools registry
-_BUILTIN_TOOL_REGISTRY: Dict[str, Any] = {}
-
-def _maybe_import_builtin_tools() -> None:
-    """Lazy load built-in tools to avoid import errors."""
-    global _BUILTIN_TOOL_REGISTRY
-    if _BUILTIN_TOOL_REGISTRY:
-        return
-    try:
-        from google.adk.tools import google_search
-        _BUILTIN_TOOL_REGISTRY["google_search"] = google_search
-    except Exception:
-        pass
-    try:
-        from google.adk.tools import code_executor
-        _BUILTIN_TOOL_REGISTRY["code_executor"] = code_executor
-    except Exception:
-        pass
+# Built-in tools: name -> "module:attribute", imported only when the config uses it.
+# (The architectures in adk-agentic-architectures/ share a registry with a
+# manifest and entry points; this template stays self-contained.)
+# `code_executor` is not listed: google.adk.tools has no such tool, so a config
+# naming it now fails here instead of silently losing the tool. The architectures
+# enable Gemini's built-in code execution as `code_execution` (tool_adapters.py).
+_BUILTIN_TOOLS: Dict[str, str] = {
+    "google_search": "google.adk.tools:google_search",
+}
 
 @dataclass
 class AgentConfig:
@@ -69,15 +67,60 @@ class AgentConfig:
         return cfg
 
 def resolve_tools(names: List[str]) -> List[Any]:
-    """Map tool names from config to actual tool callables."""
-    _maybe_import_builtin_tools()
+    """Map tool names from config to actual tool callables; unknown names raise."""
     tools = []
     for n in names:
-        t = _BUILTIN_TOOL_REGISTRY.get(n)
-        if t:
-            tools.append(t)
+        if n not in _BUILTIN_TOOLS:
+            raise ValueError(f"Unknown tool '{n}'. Known tools: {', '.join(sorted(_BUILTIN_TOOLS))}.")
+        module_name, _, attr = _BUILTIN_TOOLS[n].partition(":")
+        tools.append(getattr(importlib.import_module(module_name), attr))
     return tools
 
+def tool_timeout(cfg: AgentConfig, name: str) -> Optional[float]:
+    """Seconds allowed for a tool: its own entry in tool_timeouts, else default_seconds."""
+    seconds = cfg.tool_timeouts.get(name, cfg.tool_timeouts.get("default_seconds"))
+    return float(seconds) if seconds else None
+
+def with_timeout(func: Any, seconds: float) -> Any:
+    """Wraps a Python tool so it returns an error result instead of running past `seconds`."""
+    @functools.wraps(func)
+    async def guarded(*args, **kwargs):
+        if inspect.iscoroutinefunction(func):
+            call = func(*args, **kwargs)
+        else:
+            call = asyncio.to_thread(func, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(call, seconds)
+        except asyncio.TimeoutError:
+            return {"error": f"Tool '{func.__name__}' timed out after {seconds}s."}
+    return guarded
+
+def apply_tool_timeouts(cfg: AgentConfig, names: List[str], tools: List[Any]) -> tuple:
+    """Applies tool_timeouts: Python tools are wrapped; model built-in tools (google_search)
+    run inside the model request, so the shortest of their timeouts becomes its HTTP timeout."""
+    wrapped, request_timeout = [], None
+    for name, tool in zip(names, tools):
+        seconds = tool_timeout(cfg, name)
+        if seconds and callable(tool) and not hasattr(tool, "process_llm_request"):
+            tool = with_timeout(tool, seconds)
+        elif seconds:
+            request_timeout = min(request_timeout or seconds, seconds)
+        wrapped.append(tool)
+    return wrapped, request_timeout
+
+def enforce_max_turns(max_turns: int):
+    """before_model_callback that ends the invocation after `max_turns` model calls."""
+    def callback(callback_context, llm_request):
+        turns = callback_context.state.get("temp:model_turns", 0) + 1
+        callback_context.state["temp:model_turns"] = turns
+        if turns > max_turns:
+            return LlmResponse(content=types.Content(
+                role="model",
+                parts=[types.Part(text=f"Stopping: reached the limit of {max_turns} model turns.")],
+            ))
+        return None
+    return callback
+
 # Load configuration - REQUIRED, no defaults
 cfg_path = os.path.join(os.path.dirname(__file__), "config", "default_agent.yaml")
 if not os.path.exists(cfg_path):
@@ -87,17 +130,19 @@ if not os.path.exists(cfg_path):
     )
 cfg = AgentConfig.from_file(cfg_path)
 
-# Resolve tools
-tool_impls = resolve_tools(cfg.tools)
-
 # Create the ADK Agent directly
 # ADK's Runner handles all execution, sessions, and async operations
 if Agent is not None:
+    tool_impls, request_timeout = apply_tool_timeouts(cfg, cfg.tools, resolve_tools(cfg.tools))
     root_agent = Agent(
         name=cfg.name,
         model=cfg.model,
         instruction=cfg.instruction,
         tools=tool_impls if tool_impls else None,
+        generate_content_config=types.GenerateContentConfig(
+            http_options=types.HttpOptions(timeout=int(request_timeout * 1000))
+        ) if request_timeout else None,
+        before_model_callback=enforce_max_turns(cfg.max_turns),
     )
 else:
     # Stub for environments without ADK
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Architecture Benchmark Suite
+Runs every architecture's root_agent over the tests/behavior cases against the
+offline fake model and records, per (agent, case):
+  - model calls and estimated prompt/completion tokens
+  - events emitted and final session-state size in bytes
+  - wall-clock time, simulated model time and the orchestration overhead left over
+
+Results are written to a JSON store and can be diffed against a baseline;
+any regression beyond the tolerance makes the run exit non-zero.
+
+Usage:
+    python3 tests/benchmark.py                                  # all agents
+    python3 tests/benchmark.py adk-agentic-architectures/03_ReAct/ --repeat 5
+    python3 tests/benchmark.py --save-baseline tests/benchmark_baseline.json
+    python3 tests/benchmark.py --baseline tests/benchmark_baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fake_model import AGENTS_DIR, REPO_ROOT, STATS, install_fake_model
+from hotpath_profile import profiler_from_env
+from load_test import BEHAVIOR_DIR, load_root_agent
+
+RESULTS_DIR = REPO_ROOT / "tests" / "benchmark_results"
+
+# Metrics that are deterministic under the fake model: any increase is a regression.
+COUNT_METRICS = ["model_calls", "prompt_tokens", "completion_tokens", "events", "state_bytes"]
+# Timing metrics: compared with a relative tolerance and an absolute floor.
+TIME_METRICS = ["wall_ms", "overhead_ms"]
+
+
+def load_cases() -> List[Tuple[str, str]]:
+    """Returns (case id, user message) for every behavior test case."""
+    cases = []
+    for path in sorted(BEHAVIOR_DIR.glob("*/*.test.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        for case in data.get("eval_cases", []):
+            for turn in case.get("conversation", [])[:1]:
+                text = "".join(p.get("text") or "" for p in turn["user_content"]["parts"])
+                cases.append((f"{path.parent.name}/{case['eval_id']}", text))
+    return cases
+
+
+async def run_case(root_agent: Any, prompt: str, plugins: Optional[List[Any]] = None) -> Dict[str, float]:
+    """Runs one fresh session and measures it."""
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+
+    runner = InMemoryRunner(agent=root_agent, app_name="benchmark", plugins=plugins)
+    session = await runner.session_service.create_session(app_name="benchmark", user_id="bench")
+    message = types.Content(role="user", parts=[types.Part(text=prompt)])
+
+    STATS.reset()
+    events = 0
+    start = time.perf_counter()
+    async for _ in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+        events += 1
+    wall = time.perf_counter() - start
+
+    session = await runner.session_service.get_session(
+        app_name="benchmark", user_id="bench", session_id=session.id
+    )
+    state_bytes = len(json.dumps(session.state, default=str).encode("utf-8"))
+    return {
+        "model_calls": STATS.calls,
+        "prompt_tokens": STATS.prompt_tokens,
+        "completion_tokens": STATS.completion_tokens,
+        "events": events,
+        "state_bytes": state_bytes,
+        "wall_ms": wall * 1000,
+        "model_ms": STATS.latency_seconds * 1000,
+        "overhead_ms": max(0.0, wall - STATS.latency_seconds) * 1000,
+    }
+
+
+async def benchmark_agent(agent_dir: Path, cases: List[Tuple[str, str]], repeat: int) -> Dict[str, Any]:
+    root_agent = load_root_agent(str(agent_dir))
+    # One unmeasured run so imports and first-call setup are not attributed to a case.
+    await run_case(root_agent, cases[0][1])
+    # Opt-in CPU profiling of the measured runs (ADK_PROFILE=sampling|cprofile).
+    profiler = profiler_from_env()
+    plugins = [profiler] if profiler else None
+    results = {}
+    for case_id, prompt in cases:
+        runs = [await run_case(root_agent, prompt, plugins) for _ in range(repeat)]
+        results[case_id] = {
+            metric: round(statistics.median(run[metric] for run in runs), 3) for metric in runs[0]
+        }
+    if profiler:
+        profiler.dump()
+    return results
+
+
+def diff_results(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, floor_ms: float
+) -> List[str]:
+    """Lists every metric that regressed relative to the baseline."""
+    regressions = []
+    for agent, cases in current["agents"].items():
+        for case_id, metrics in cases.items():
+            base = baseline.get("agents", {}).get(agent, {}).get(case_id)
+            if base is None:
+                continue
+            for metric in COUNT_METRICS:
+                if metric in base and metrics[metric] > base[metric]:
+                    regressions.append(f"{agent} {case_id} {metric}: {base[metric]} -> {metrics[metric]}")
+            for metric in TIME_METRICS:
+                if metric not in base:
+                    continue
+                limit = max(base[metric] * (1 + tolerance), base[metric] + floor_ms)
+                if metrics[metric] > limit:
+                    regressions.append(
+                        f"{agent} {case_id} {metric}: {base[metric]:.2f} -> {metrics[metric]:.2f}ms"
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent architectures offline.")
+    parser.add_argument("agent_dirs", nargs="*", help="Agent directories (default: all NN_* agents)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the median is kept")
+    parser.add_argument("--latency", default="none", help="Fake model latency spec (see fake_model.py)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Results file (default: tests/benchmark_results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Baseline results file to diff against")
+    parser.add_argument("--save-baseline", help="Also write the results to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown for timings")
+    parser.add_argument("--floor-ms", type=float, default=2.0, help="Timing changes below this are ignored")
+    args = parser.parse_args()
+
+    install_fake_model(latency=args.latency, seed=args.seed)
+    agent_dirs = [Path(d) for d in args.agent_dirs] or sorted(AGENTS_DIR.glob("[0-9][0-9]_*"))
+    cases = load_cases()
+
+    results: Dict[str, Any] = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "latency": args.latency,
+        "repeat": args.repeat,
+        "agents": {},
+    }
+    print(f"\n{'='*96}")
+    print(f"{'Agent':<28} {'Case':<42} {'Calls':>5} {'Tokens':>7} {'Events':>6} {'State B':>8} {'Ovh ms':>7}")
+    print(f"{'='*96}")
+    for agent_dir in agent_dirs:
+        agent_results = asyncio.run(benchmark_agent(agent_dir, cases, args.repeat))
+        results["agents"][agent_dir.name] = agent_results
+        for case_id, m in agent_results.items():
+            tokens = int(m["prompt_tokens"] + m["completion_tokens"])
+            print(f"{agent_dir.name:<28} {case_id:<42} {int(m['model_calls']):>5} {tokens:>7} "
+                  f"{int(m['events']):>6} {int(m['state_bytes']):>8} {m['overhead_ms']:>7.2f}")
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"\nResults written to {out}")
+    if args.save_baseline:
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = diff_results(results, baseline, args.tolerance, args.floor_ms)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\n✅ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Dataflow Dry Run
+Builds the dataflow graph of each sequential (or custom) pipeline config
+without running any model: which sub-agents each step waits for, required
+{placeholders} nothing produces, the critical path, and the theoretical
+speedup of `schedule: dataflow` over running the steps in order. Costs count
+one unit per model call; a loop counts max_iterations passes of its body.
+
+Only the YAML is analysed. Architectures whose Python code drives their
+sub-agents (blackboard, tree of thoughts, ...) set state keys and ordering the
+YAML does not show, so their missing keys and speedups are indicative only;
+`schedule:` applies to the pipelines built from config (planning, multi-agent,
+PEV, ensemble, RLHF). Exits non-zero if a config has a dependency cycle.
+
+Usage:
+    python3 tests/dataflow_report.py                       # every architecture
+    python3 tests/dataflow_report.py adk-agentic-architectures/05_multi_agent/
+    python3 tests/dataflow_report.py adk-agentic-architectures/06_PEV/ --json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+AGENTS_DIR = REPO_ROOT / "adk-agentic-architectures"
+# Like `adk`, put the agents directory on sys.path so shared modules (dataflow) import.
+sys.path.insert(0, str(AGENTS_DIR))
+
+from dataflow import DataflowError, DataflowGraph  # noqa: E402
+
+# Loop roots feed each iteration's output back in, so their graph is cyclic by design.
+PIPELINE_ARCHITECTURES = ("sequential", "custom")
+
+
+def config_files(agent_dirs: List[str]) -> List[Path]:
+    dirs = [Path(d).resolve() for d in agent_dirs] or sorted(p for p in AGENTS_DIR.iterdir() if (p / "config").is_dir())
+    return [path for d in dirs for path in sorted((d / "config").glob("*.yaml"))]
+
+
+def build_report(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    if data.get("architecture") not in PIPELINE_ARCHITECTURES or not data.get("sub_agents"):
+        return {"pipeline": data.get("name"), "config": str(path), "skipped": data.get("architecture")}
+    try:
+        report = DataflowGraph.of(data, strict=False).report()
+    except DataflowError as e:
+        return {"pipeline": data.get("name"), "config": str(path), "error": str(e)}
+    report["config"] = str(path)
+    report["schedule"] = data.get("schedule", "sequential")
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{report['pipeline']}  ({Path(report['config']).relative_to(REPO_ROOT)})")
+    if "skipped" in report:
+        print(f"  skipped: {report['skipped']} architecture")
+        return
+    if "error" in report:
+        print(f"  ERROR: {report['error']}")
+        return
+    print(f"  {'Step':<28} {'Cost':>5}  After")
+    for step in report["steps"]:
+        print(f"  {step['name']:<28} {step['cost']:>5g}  {', '.join(step['after']) or '-'}")
+    for key, readers in sorted(report["missing"].items()):
+        print(f"  missing: {{{key}}} read by {', '.join(readers)}")
+    print(f"  Critical path: {' -> '.join(report['critical_path'])}")
+    print(f"  Serial cost {report['serial_cost']:g}, critical path {report['critical_path_cost']:g}, "
+          f"theoretical speedup {report['theoretical_speedup']:g}x (schedule: {report['schedule']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dry-run the dataflow schedule of pipeline configs.")
+    parser.add_argument("agent_dirs", nargs="*", help="Agent directories; defaults to every architecture")
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    args = parser.parse_args()
+
+    reports = [build_report(path) for path in config_files(args.agent_dirs)]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+    return 1 if any("error" in r for r in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
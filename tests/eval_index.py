@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Eval History Indexer
+Ingests the `*.evalset_result.json` files that `adk eval` leaves in each
+architecture's .adk/eval_history into a small SQLite database, then answers
+questions about them without re-parsing the (double-encoded, null-heavy) files.
+
+Ingestion is incremental: files already indexed with the same size and mtime
+are skipped, so re-running after a new eval only parses the new results.
+
+Tables:
+  runs    (run_id, agent, eval_set_id, created, path)
+  cases   (run_id, eval_id, status, user_text, final_response)
+  metrics (run_id, eval_id, metric_name, score, threshold, status)
+
+Usage:
+    python3 tests/eval_index.py index
+    python3 tests/eval_index.py summary
+    python3 tests/eval_index.py trend --agent 03_ReAct --bucket week
+    python3 tests/eval_index.py scores --metric final_response_match_v2
+    python3 tests/eval_index.py failures --agent 12_graph --limit 5
+    python3 tests/eval_index.py sql "SELECT agent, COUNT(*) FROM runs GROUP BY agent"
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+AGENTS_DIR = REPO_ROOT / "adk-agentic-architectures"
+DEFAULT_DB = REPO_ROOT / "tests" / ".eval_index.sqlite"
+
+# google.adk.evaluation.eval_metrics.EvalStatus
+PASSED, FAILED, NOT_EVALUATED = 1, 2, 3
+_STATUS_NAMES = {PASSED: "passed", FAILED: "failed", NOT_EVALUATED: "not_evaluated"}
+
+_BUCKETS = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, size INTEGER, mtime REAL, ingested_at REAL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY, agent TEXT, eval_set_id TEXT, created REAL, path TEXT
+);
+CREATE TABLE IF NOT EXISTS cases (
+    run_id TEXT, eval_id TEXT, status INTEGER, user_text TEXT, final_response TEXT,
+    PRIMARY KEY (run_id, eval_id)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id TEXT, eval_id TEXT, metric_name TEXT, score REAL, threshold REAL, status INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_agent ON runs (agent, created);
+CREATE INDEX IF NOT EXISTS metrics_name ON metrics (metric_name);
+"""
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _text(content: Optional[Dict[str, Any]]) -> str:
+    parts = (content or {}).get("parts") or []
+    return "".join(p.get("text") or "" for p in parts)
+
+
+def load_result_file(path: Path) -> Dict[str, Any]:
+    """Parses a result file, which adk writes as a JSON string containing JSON."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(data, str):
+        data = json.loads(data)
+    return data
+
+
+def ingest_file(conn: sqlite3.Connection, path: Path, agent: str) -> int:
+    """Indexes one result file and returns the number of cases it contained."""
+    data = load_result_file(path)
+    run_id = data.get("eval_set_result_id") or path.stem
+    conn.execute("DELETE FROM cases WHERE run_id = ?", (run_id,))
+    conn.execute("DELETE FROM metrics WHERE run_id = ?", (run_id,))
+    conn.execute(
+        "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)",
+        (run_id, agent, data.get("eval_set_id"), data.get("creation_timestamp"), str(path)),
+    )
+    cases = data.get("eval_case_results") or []
+    for case in cases:
+        invocations = case.get("eval_metric_result_per_invocation") or []
+        actual = (invocations[0].get("actual_invocation") or {}) if invocations else {}
+        conn.execute(
+            "INSERT OR REPLACE INTO cases VALUES (?, ?, ?, ?, ?)",
+            (run_id, case.get("eval_id"), case.get("final_eval_status"),
+             _text(actual.get("user_content")), _text(actual.get("final_response"))),
+        )
+        conn.executemany(
+            "INSERT INTO metrics VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (run_id, case.get("eval_id"), m.get("metric_name"), m.get("score"),
+                 m.get("threshold"), m.get("eval_status"))
+                for m in case.get("overall_eval_metric_results") or []
+            ],
+        )
+    return len(cases)
+
+
+def index(conn: sqlite3.Connection, agents_dir: Path = AGENTS_DIR) -> Dict[str, int]:
+    """Ingests new or changed result files; unchanged ones are skipped."""
+    known = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT path, size, mtime FROM files")}
+    stats = {"scanned": 0, "ingested": 0, "cases": 0, "errors": 0}
+    for path in sorted(agents_dir.glob("*/.adk/eval_history/*.evalset_result.json")):
+        stats["scanned"] += 1
+        st = path.stat()
+        if known.get(str(path)) == (st.st_size, st.st_mtime):
+            continue
+        try:
+            stats["cases"] += ingest_file(conn, path, agent=path.parents[2].name)
+        except (OSError, ValueError, AttributeError) as e:
+            stats["errors"] += 1
+            print(f"  skipped {path.name}: {e}", file=sys.stderr)
+            continue
+        conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                     (str(path), st.st_size, st.st_mtime, time.time()))
+        stats["ingested"] += 1
+    conn.commit()
+    return stats
+
+
+def _where(agent: Optional[str], eval_set: Optional[str], prefix: str = "r") -> tuple[str, list]:
+    clauses, params = [], []
+    if agent:
+        clauses.append(f"{prefix}.agent LIKE ?")
+        params.append(f"%{agent}%")
+    if eval_set:
+        clauses.append(f"{prefix}.eval_set_id LIKE ?")
+        params.append(f"%{eval_set}%")
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _print_table(headers: List[str], rows: Iterable[tuple]) -> None:
+    rows = [tuple("" if v is None else v for v in row) for row in rows]
+    widths = [max([len(str(h))] + [len(f"{r[i]:.3f}" if isinstance(r[i], float) else str(r[i])) for r in rows])
+              for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for r in rows:
+        print("  ".join((f"{v:.3f}" if isinstance(v, float) else str(v)).ljust(w) for v, w in zip(r, widths)))
+
+
+def cmd_summary(conn: sqlite3.Connection, args) -> None:
+    where, params = _where(args.agent, args.eval_set)
+    rows = conn.execute(
+        f"""SELECT r.agent, COUNT(DISTINCT r.run_id), COUNT(*),
+                   AVG(c.status = {PASSED}), datetime(MAX(r.created), 'unixepoch')
+            FROM runs r JOIN cases c USING (run_id){where}
+            GROUP BY r.agent ORDER BY r.agent""",
+        params,
+    ).fetchall()
+    _print_table(["agent", "runs", "cases", "pass_rate", "last_run"], rows)
+
+
+def cmd_trend(conn: sqlite3.Connection, args) -> None:
+    where, params = _where(args.agent, args.eval_set)
+    rows = conn.execute(
+        f"""SELECT strftime(?, r.created, 'unixepoch') AS bucket, COUNT(*),
+                   SUM(c.status = {PASSED}), AVG(c.status = {PASSED})
+            FROM runs r JOIN cases c USING (run_id){where}
+            GROUP BY bucket ORDER BY bucket""",
+        [_BUCKETS[args.bucket]] + params,
+    ).fetchall()
+    _print_table([args.bucket, "cases", "passed", "pass_rate"], rows)
+
+
+def cmd_scores(conn: sqlite3.Connection, args) -> None:
+    where, params = _where(args.agent, args.eval_set)
+    where = (where + " AND" if where else " WHERE") + " m.metric_name = ? AND m.score IS NOT NULL"
+    scores = [row[0] for row in conn.execute(
+        f"SELECT m.score FROM runs r JOIN metrics m USING (run_id){where} ORDER BY m.score",
+        params + [args.metric],
+    )]
+    if not scores:
+        print(f"No scores recorded for metric '{args.metric}'.")
+        return
+    n = len(scores)
+    quantile = lambda q: scores[min(n - 1, int(q * n))]
+    print(f"{args.metric}: n={n} mean={sum(scores) / n:.3f} min={scores[0]:.3f} "
+          f"p25={quantile(0.25):.3f} p50={quantile(0.5):.3f} p75={quantile(0.75):.3f} max={scores[-1]:.3f}")
+    lo, hi = scores[0], scores[-1]
+    width = (hi - lo) / args.bins or 1.0
+    counts = [0] * args.bins
+    for s in scores:
+        counts[min(args.bins - 1, int((s - lo) / width))] += 1
+    for i, count in enumerate(counts):
+        print(f"  [{lo + i * width:6.3f}, {lo + (i + 1) * width:6.3f}) {count:>6}  {'#' * max(0, round(40 * count / n))}")
+
+
+def cmd_failures(conn: sqlite3.Connection, args) -> None:
+    where, params = _where(args.agent, args.eval_set)
+    where = (where + " AND" if where else " WHERE") + f" c.status != {PASSED}"
+    rows = conn.execute(
+        f"""SELECT datetime(r.created, 'unixepoch'), r.agent, c.eval_id, c.status,
+                   substr(replace(c.final_response, char(10), ' '), 1, 80)
+            FROM runs r JOIN cases c USING (run_id){where}
+            ORDER BY r.created DESC LIMIT ?""",
+        params + [args.limit],
+    ).fetchall()
+    _print_table(["created", "agent", "eval_id", "status", "final_response"],
+                 [r[:3] + (_STATUS_NAMES.get(r[3], r[3]),) + r[4:] for r in rows])
+
+
+def cmd_sql(conn: sqlite3.Connection, args) -> None:
+    cursor = conn.execute(args.query)
+    _print_table([d[0] for d in cursor.description or []], cursor.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and query .adk/eval_history results.")
+    parser.add_argument("--db", default=str(DEFAULT_DB), help="SQLite index path")
+    parser.add_argument("--no-refresh", action="store_true", help="Query without ingesting new files first")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("index", help="Ingest new result files")
+    for name, fn in (("summary", cmd_summary), ("trend", cmd_trend), ("scores", cmd_scores),
+                     ("failures", cmd_failures)):
+        p = sub.add_parser(name)
+        p.add_argument("--agent", help="Substring of the agent directory name")
+        p.add_argument("--eval-set", help="Substring of the eval set id")
+        p.set_defaults(fn=fn)
+        if name == "trend":
+            p.add_argument("--bucket", choices=sorted(_BUCKETS), default="day")
+        elif name == "scores":
+            p.add_argument("--metric", default="final_response_match_v2")
+            p.add_argument("--bins", type=int, default=10)
+        elif name == "failures":
+            p.add_argument("--limit", type=int, default=20)
+    p = sub.add_parser("sql", help="Run a raw SQL query against the index")
+    p.add_argument("query")
+    p.set_defaults(fn=cmd_sql)
+    args = parser.parse_args()
+
+    conn = connect(Path(args.db))
+    if args.command == "index" or not args.no_refresh:
+        start = time.perf_counter()
+        stats = index(conn)
+        if args.command == "index":
+            print(f"Scanned {stats['scanned']} files, ingested {stats['ingested']} "
+                  f"({stats['cases']} cases, {stats['errors']} errors) in {time.perf_counter() - start:.2f}s")
+            return 1 if stats["errors"] else 0
+    args.fn(conn, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
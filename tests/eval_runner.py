@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Parallel Eval Runner
+Validates every agent's structure in one validator process, then runs `adk eval`
+for every (agent x behavior test) pair on an asyncio worker pool instead of one
+at a time like test_all_agents.sh.
+
+- A global concurrency limit caps how many `adk eval` processes run at once.
+- A rate limit (evals started per minute) keeps the sweep under API quotas.
+- Passing results are cached by a hash of the agent's code and config plus the
+  test file and its test_config.json, so unchanged pairs are skipped.
+- A single JSON report and, optionally, a JUnit XML report are written at the end.
+
+Usage:
+    export GOOGLE_API_KEY=your_key_here
+    python3 tests/eval_runner.py                                  # all agents, all tests
+    python3 tests/eval_runner.py adk-agentic-architectures/03_ReAct/ --concurrency 8 --rate 30
+    python3 tests/eval_runner.py --junit eval_results.xml --no-cache
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+AGENTS_DIR = REPO_ROOT / "adk-agentic-architectures"
+BEHAVIOR_DIR = REPO_ROOT / "tests" / "behavior"
+VALIDATOR = REPO_ROOT / "tests" / "validate_agent.py"
+CACHE_FILE = REPO_ROOT / "tests" / ".eval_cache.json"
+
+_HASHED_SUFFIXES = {".py", ".yaml", ".yml", ".json"}
+# `adk eval` summary lines, e.g. "Tests passed: 12" / "Tests failed: 0".
+_PASSED_RE = re.compile(r"Tests passed:\s*(\d+)")
+_FAILED_RE = re.compile(r"Tests failed:\s*(\d+)")
+
+
+@dataclass
+class JobResult:
+    agent: str
+    test: str
+    status: str  # passed | failed | error | skipped
+    duration: float = 0.0
+    cached: bool = False
+    output: str = ""
+
+
+class RateLimiter:
+    """Spaces job starts so no more than `per_minute` begin in any minute."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def discover_tests() -> List[Path]:
+    return sorted(BEHAVIOR_DIR.glob("*/*.test.json"))
+
+
+def agent_fingerprint(agent_dir: Path) -> str:
+    """Hash of every code/config file in the agent directory (eval output excluded),
+    plus the shared modules and manifests every architecture imports from the
+    directory above it (agent_tools.py, model_client.py, tools.yaml, model_tiers.yaml, ...)."""
+    digest = hashlib.sha256()
+    shared = [p for p in sorted(agent_dir.parent.glob("*")) if p.is_file() and p.suffix in _HASHED_SUFFIXES]
+    for path in shared:
+        digest.update(f"../{path.name}".encode("utf-8") + b"\0" + path.read_bytes() + b"\0")
+    for path in sorted(agent_dir.rglob("*")):
+        rel = path.relative_to(agent_dir)
+        if not path.is_file() or path.suffix not in _HASHED_SUFFIXES:
+            continue
+        if any(part.startswith(".") or part == "__pycache__" for part in rel.parts):
+            continue
+        digest.update(str(rel).encode("utf-8") + b"\0" + path.read_bytes() + b"\0")
+    return digest.hexdigest()
+
+
+def eval_status(output: str) -> str:
+    """passed only when adk eval reports no failures and at least one pass."""
+    passed, failed = _PASSED_RE.search(output), _FAILED_RE.search(output)
+    if passed is None and failed is None:
+        return "error"
+    if (failed is None or int(failed.group(1)) == 0) and passed is not None and int(passed.group(1)) >= 1:
+        return "passed"
+    return "failed"
+
+
+def job_key(agent_fp: str, test_file: Path) -> str:
+    digest = hashlib.sha256(agent_fp.encode("utf-8"))
+    for path in (test_file, test_file.parent / "test_config.json"):
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def load_cache() -> Dict[str, dict]:
+    try:
+        return json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+async def run_process(*cmd: str, timeout: float) -> tuple[int, str]:
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, cwd=str(REPO_ROOT)
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return -1, f"Timed out after {timeout}s"
+    return proc.returncode, stdout.decode("utf-8", "replace")
+
+
+class EvalRunner:
+    def __init__(self, concurrency: int, rate: float, timeout: float, use_cache: bool, adk: str):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = RateLimiter(rate)
+        self.timeout = timeout
+        self.use_cache = use_cache
+        self.adk = adk
+        self.cache = load_cache() if use_cache else {}
+
+    async def validate_all(self, agent_dirs: List[Path]) -> Dict[str, JobResult]:
+        """Validates every agent's structure in one validator process."""
+        with tempfile.TemporaryDirectory() as tmp:
+            report = Path(tmp) / "structure.json"
+            code, output = await run_process(
+                sys.executable, str(VALIDATOR), "--json", str(report), *map(str, agent_dirs), timeout=self.timeout
+            )
+            try:
+                results = json.loads(report.read_text(encoding="utf-8"))["results"]
+            except (OSError, ValueError, KeyError):
+                results = None
+        if results is None:
+            return {d.name: JobResult(d.name, "structure", "error", output=output[-2000:]) for d in agent_dirs}
+        return {
+            Path(r["agent_path"]).name: JobResult(
+                Path(r["agent_path"]).name, "structure", "passed" if r["success"] else "failed",
+                r["duration"], output="\n".join(r["errors"]),
+            )
+            for r in results
+        }
+
+    async def evaluate(self, agent_dir: Path, test_file: Path, key: str) -> JobResult:
+        test_name = f"{test_file.parent.name}/{test_file.name[:-len('.test.json')]}"
+        if self.use_cache and self.cache.get(key, {}).get("status") == "passed":
+            return JobResult(agent_dir.name, test_name, "passed", cached=True)
+
+        async with self.semaphore:
+            await self.limiter.acquire()
+            start = time.monotonic()
+            code, output = await run_process(
+                self.adk, "eval", str(agent_dir), str(test_file),
+                f"--config_file_path={test_file.parent / 'test_config.json'}",
+                timeout=self.timeout,
+            )
+        duration = time.monotonic() - start
+        if code == -1 and output.startswith("Timed out"):
+            status = "error"
+        else:
+            status = eval_status(output)
+        result = JobResult(agent_dir.name, test_name, status, duration, output=output[-2000:])
+        if status == "passed":
+            self.cache[key] = {"status": status, "duration": round(duration, 3)}
+        return result
+
+    async def run_agent(self, agent_dir: Path, tests: List[Path], structure: JobResult) -> List[JobResult]:
+        if structure.status != "passed":
+            return [structure] + [
+                JobResult(agent_dir.name, f"{t.parent.name}/{t.name[:-len('.test.json')]}", "skipped",
+                          output="Structure validation failed")
+                for t in tests
+            ]
+        fingerprint = agent_fingerprint(agent_dir)
+        evals = await asyncio.gather(*(self.evaluate(agent_dir, t, job_key(fingerprint, t)) for t in tests))
+        return [structure] + list(evals)
+
+    async def run(self, agent_dirs: List[Path], tests: List[Path]) -> List[JobResult]:
+        structure = await self.validate_all(agent_dirs)
+        per_agent = await asyncio.gather(*(self.run_agent(d, tests, structure[d.name]) for d in agent_dirs))
+        if self.use_cache:
+            CACHE_FILE.write_text(json.dumps(self.cache, indent=2), encoding="utf-8")
+        return [r for results in per_agent for r in results]
+
+
+def write_junit(results: List[JobResult], path: str) -> None:
+    suites = ET.Element("testsuites")
+    for agent in dict.fromkeys(r.agent for r in results):
+        cases = [r for r in results if r.agent == agent]
+        suite = ET.SubElement(
+            suites, "testsuite", name=agent, tests=str(len(cases)),
+            failures=str(sum(r.status == "failed" for r in cases)),
+            errors=str(sum(r.status == "error" for r in cases)),
+            skipped=str(sum(r.status == "skipped" for r in cases)),
+            time=f"{sum(r.duration for r in cases):.3f}",
+        )
+        for r in cases:
+            case = ET.SubElement(suite, "testcase", classname=agent, name=r.test, time=f"{r.duration:.3f}")
+            if r.status in ("failed", "error"):
+                ET.SubElement(case, "failure" if r.status == "failed" else "error").text = r.output
+            elif r.status == "skipped":
+                ET.SubElement(case, "skipped", message=r.output)
+    ET.ElementTree(suites).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run structure validation and adk eval for all agents in parallel.")
+    parser.add_argument("agent_dirs", nargs="*", help="Agent directories (default: all NN_* agents)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max processes running at once")
+    parser.add_argument("--rate", type=float, default=0, help="Max evals started per minute (0 = unlimited)")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-job timeout in seconds")
+    parser.add_argument("--tests", default="*", help="Glob over behavior test names, e.g. 'react*'")
+    parser.add_argument("--no-cache", action="store_true", help="Re-run pairs that passed before")
+    parser.add_argument("--adk", default="adk", help="adk executable")
+    parser.add_argument("--json", dest="json_path", help="JSON report (default: eval_results_<timestamp>.json)")
+    parser.add_argument("--junit", help="Also write a JUnit XML report")
+    args = parser.parse_args()
+
+    if not os.environ.get("GOOGLE_API_KEY"):
+        print("❌ ERROR: GOOGLE_API_KEY not set")
+        print("   Run: export GOOGLE_API_KEY=your_key_here")
+        return 1
+
+    agent_dirs = [Path(d).resolve() for d in args.agent_dirs] or sorted(AGENTS_DIR.glob("[0-9][0-9]_*"))
+    tests = [t for t in discover_tests() if Path(t.name).match(f"{args.tests}.test.json")]
+
+    print(f"Running {len(agent_dirs)} agents x {len(tests)} tests "
+          f"(concurrency={args.concurrency}, rate={args.rate or 'unlimited'}/min)")
+    runner = EvalRunner(args.concurrency, args.rate, args.timeout, not args.no_cache, args.adk)
+    start = time.monotonic()
+    results = asyncio.run(runner.run(agent_dirs, tests))
+    wall = time.monotonic() - start
+
+    icons = {"passed": "✅", "failed": "❌", "error": "💥", "skipped": "⏭️"}
+    print(f"\n{'Agent':<28} {'Test':<36} {'Status':<10} {'Time':>8}")
+    print("-" * 86)
+    for r in results:
+        note = " (cached)" if r.cached else ""
+        print(f"{r.agent:<28} {r.test:<36} {icons[r.status]} {r.status:<7} {r.duration:>7.1f}s{note}")
+
+    counts = {s: sum(r.status == s for r in results) for s in icons}
+    print(f"\nTotal: {len(results)} jobs in {wall:.1f}s - " + ", ".join(f"{v} {k}" for k, v in counts.items()))
+
+    report_path = args.json_path or str(REPO_ROOT / f"eval_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({"wall_seconds": round(wall, 3), "summary": counts,
+                   "results": [asdict(r) for r in results]}, f, indent=2)
+    print(f"Report written to {report_path}")
+    if args.junit:
+        write_junit(results, args.junit)
+        print(f"JUnit report written to {args.junit}")
+    return 0 if counts["failed"] == counts["error"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Local Fake Gemini HTTP Endpoint
+Serves `POST /<version>/models/<model>:generateContent` on localhost with a
+canned answer and usage metadata, so the shared model client
+(adk-agentic-architectures/model_client.py) can be exercised over real HTTP:
+connection reuse, rate limiting, priority admission and retries on injected
+429s. Counts the TCP connections and requests it receives.
+
+The command sends a burst of calls from several sub-agents, once with a
+separate Gemini client per sub-agent and once through the shared client,
+and compares connections opened, retries and limiter wait per priority class.
+
+Usage:
+    from fake_gemini_server import FakeGeminiServer
+    with FakeGeminiServer(latency=0.05, fail_every=10) as server:
+        MODEL_CLIENT.configure({"base_url": server.url, "api_key": "fake"})
+
+    python3 tests/fake_gemini_server.py --calls 60 --agents 6 --rpm 600 --fail-every 10
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+AGENTS_DIR = REPO_ROOT / "adk-agentic-architectures"
+
+_PATH_RE = re.compile(r"^/[^/]+/models/([^/:]+):generateContent$")
+
+
+class FakeGeminiServer:
+    """Threaded HTTP/1.1 (keep-alive) server answering generateContent requests."""
+
+    def __init__(self, latency: float = 0.0, fail_every: int = 0, port: int = 0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.stats = {"connections": 0, "requests": 0, "rejected": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, key: str) -> int:
+        with self._lock:
+            self.stats[key] += 1
+            return self.stats[key]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats = {k: 0 for k in self.stats}
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                server._count("connections")
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                match = _PATH_RE.match(self.path.split("?")[0])
+                if not match:
+                    self._send(404, {"error": {"code": 404, "message": f"no route {self.path}", "status": "NOT_FOUND"}})
+                    return
+                n = server._count("requests")
+                if server.latency:
+                    time.sleep(server.latency)
+                if server.fail_every and n % server.fail_every == 0:
+                    server._count("rejected")
+                    self._send(429, {"error": {"code": 429, "message": "Resource has been exhausted",
+                                               "status": "RESOURCE_EXHAUSTED"}})
+                    return
+                prompt = " ".join(p.get("text", "") for c in request.get("contents", []) for p in c.get("parts", []))
+                prompt_tokens = max(1, len(prompt) // 4)
+                self._send(200, {
+                    "candidates": [{
+                        "content": {"role": "model", "parts": [{"text": f"{match.group(1)} answer to: {prompt[:80]}"}]},
+                        "finishReason": "STOP",
+                    }],
+                    "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": 8,
+                                      "totalTokenCount": prompt_tokens + 8},
+                })
+
+        return Handler
+
+    def start(self) -> "FakeGeminiServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeGeminiServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+async def run_burst(models: List[Any], calls: int) -> Dict[str, Any]:
+    """Sends `calls` requests at once, round-robin over `models`; returns wall time, errors and finish order."""
+    from google.adk.models.llm_request import LlmRequest
+    from google.genai import types
+
+    finished: List[str] = []
+
+    async def one(index: int) -> None:
+        model = models[index % len(models)]
+        request = LlmRequest(
+            model=model.model,
+            contents=[types.Content(role="user", parts=[types.Part(text=f"Request {index}: summarize the findings.")])],
+            config=types.GenerateContentConfig(),
+        )
+        async for _ in model.generate_content_async(request):
+            pass
+        finished.append(getattr(model, "priority", "-"))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(calls)), return_exceptions=True)
+    return {
+        "wall_seconds": round(time.perf_counter() - start, 3),
+        "errors": sum(isinstance(r, Exception) for r in results),
+        "finished": finished,
+    }
+
+
+def mean_rank(finished: List[str], priority: str) -> float:
+    ranks = [i for i, p in enumerate(finished) if p == priority]
+    return round(sum(ranks) / len(ranks), 1) if ranks else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-agent and shared model clients against a local endpoint.")
+    parser.add_argument("--calls", type=int, default=60, help="Concurrent model calls")
+    parser.add_argument("--agents", type=int, default=6, help="Sub-agents the calls are spread over")
+    parser.add_argument("--rpm", type=float, default=600, help="Shared client requests per minute")
+    parser.add_argument("--burst-seconds", type=float, default=1.0, help="Token bucket size in seconds of rate")
+    parser.add_argument("--latency", type=float, default=0.02, help="Server seconds per request")
+    parser.add_argument("--fail-every", type=int, default=10, help="Answer every Nth request with 429 (0 = never)")
+    parser.add_argument("--model", default="gemini-2.5-flash-lite")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(AGENTS_DIR))
+    from google.adk.models.google_llm import Gemini
+    from google.genai import types
+
+    from model_client import SharedModelClient
+
+    with FakeGeminiServer(latency=args.latency, fail_every=args.fail_every) as server:
+        # Baseline: every sub-agent owns a Gemini client (and connection pool), no retries.
+        separate = [
+            Gemini(model=args.model, client_kwargs={"api_key": "fake", "http_options": types.HttpOptions(base_url=server.url)})
+            for _ in range(args.agents)
+        ]
+        baseline = asyncio.run(run_burst(separate, args.calls))
+        baseline_stats = dict(server.stats)
+        server.reset()
+
+        shared = SharedModelClient().configure({
+            "base_url": server.url, "api_key": "fake", "requests_per_minute": args.rpm,
+            "burst_seconds": args.burst_seconds, "retry_initial_delay": 0.05,
+        })
+        priorities = ["router", "background"]
+        models = [shared.model(args.model, priorities[i % 2]) for i in range(args.agents)]
+        pooled = asyncio.run(run_burst(models, args.calls))
+        pooled_stats = dict(server.stats)
+
+    print(f"\n{args.calls} concurrent calls from {args.agents} sub-agents "
+          f"(server latency {args.latency}s, 429 every {args.fail_every or 'never'})")
+    print(f"{'':<18} {'Wall s':>8} {'Connections':>12} {'Requests':>9} {'429s':>5} {'Failed':>7}")
+    for label, r, stats in (("per-agent clients", baseline, baseline_stats), ("shared client", pooled, pooled_stats)):
+        print(f"{label:<18} {r['wall_seconds']:>8} {stats['connections']:>12} {stats['requests']:>9} "
+              f"{stats['rejected']:>5} {r['errors']:>7}")
+    print(f"Shared client at {args.rpm:g} rpm:")
+    for priority, counts in shared.metrics().items():
+        print(f"  {priority:<12} calls {counts['calls']:g}  throttled {counts['throttled']:g}  "
+              f"mean wait {counts['mean_wait_ms']}ms  retries {counts['retries']:g}  errors {counts['errors']:g}  "
+              f"mean finish rank {mean_rank(pooled['finished'], priority)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
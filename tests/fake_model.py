@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Offline Fake Model Backend
+Stands in for Gemini so the architectures can run without GOOGLE_API_KEY or
+network access, e.g. to measure orchestration overhead or load-test in CI.
+
+Responses come from, in order:
+  1. Rules - per-agent canned outputs in the formats each architecture parses
+     (StopChecker JSON, ToT thought lists, routing names, APPROVE, ...).
+  2. Replay - final responses recorded in .adk/eval_history, matched on the
+     user's message.
+  3. An echo of the user's message.
+
+Latency per call is drawn from a configurable, seeded distribution, optionally
+a different one per model name (e.g. slower for gemini-2.5-pro), so model tier
+policies and their downshifts can be exercised offline.
+
+install_stand_in_tools() swaps model-side tools (google_search) in directly
+dispatched tool sets for a local Python stand-in, so tool execution, caching
+and tool policies can be exercised offline too.
+
+Usage:
+    from fake_model import install_fake_model
+    install_fake_model(latency="lognormal:200:0.5", seed=7)
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+AGENTS_DIR = REPO_ROOT / "adk-agentic-architectures"
+
+_AGENT_NAME_RE = re.compile(r'Your internal name is "([^"]+)"')
+
+# (agent name regex, response template). Templates may use {user_text}, {replay}
+# and their JSON-quoted forms {user_text_json}, {replay_json}.
+DEFAULT_RULES: List[Tuple[str, str]] = [
+    (r"Thinker|Reasoner", '{{"tool_name": "google_search", "tool_input": {user_text_json}}}'),
+    (r"Actor(Model)?", '{{"response": {replay_json}}}'),
+    (r"Verifier", '{{"status": "SUCCESS", "final_result": {replay_json}}}'),
+    (r"Controller", "SynthesisSpecialist"),
+    (r"MetaController", "GoogleSearch"),
+    (r"MetacognitiveAnalyst", '{{"strategy": "reason_directly"}}'),
+    (r"ThoughtGenerator", '["Break the request into steps.", "Answer the request directly."]'),
+    (r"StateEvaluator", '{{"best_thought": "Answer the request directly."}}'),
+    (r"KnowledgeExtractor", '[["Dune", "produced_by", "Legendary Pictures"]]'),
+    (r"MemoryUpdater", '{{"episodic": {user_text_json}, "semantic": [["user", "asked_about", "request"]]}}'),
+    (r"CandidateProposer", '["buy 10 shares", "sell 5 shares", "hold"]'),
+    (r"Approver", "APPROVE"),
+]
+
+
+@dataclass
+class FakeModelStats:
+    """Counters shared by every FakeLlm instance."""
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_seconds: float = 0.0
+    calls_by_agent: Dict[str, int] = field(default_factory=dict)
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+STATS = FakeModelStats()
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (~4 characters per token)."""
+    return (len(text) + 3) // 4 if text else 0
+
+
+class LatencyModel:
+    """Seeded latency distribution parsed from a spec string (milliseconds).
+
+    fixed:MS | uniform:LO:HI | lognormal:MEDIAN:SIGMA | exponential:MEAN | none
+    """
+
+    def __init__(self, spec: str = "none", seed: int = 0):
+        self.spec = spec
+        self.seed = seed
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        if kind not in ("none", "fixed", "uniform", "lognormal", "exponential"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self, key: str) -> float:
+        """Returns a latency in seconds, deterministic for a given key."""
+        rng = random.Random(f"{self.seed}:{key}")
+        if self.kind == "none":
+            ms = 0.0
+        elif self.kind == "fixed":
+            ms = self.params[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(self.params[0], self.params[1])
+        elif self.kind == "lognormal":
+            median, sigma = self.params
+            ms = rng.lognormvariate(0.0, sigma) * median
+        else:
+            ms = rng.expovariate(1.0 / self.params[0])
+        return ms / 1000.0
+
+
+def _part_text(content: Optional[Dict[str, Any]]) -> str:
+    parts = (content or {}).get("parts") or []
+    return "".join(p.get("text") or "" for p in parts)
+
+
+def load_eval_history(agents_dir: Path = AGENTS_DIR) -> Dict[str, List[str]]:
+    """Indexes recorded final responses by the user message that produced them."""
+    recordings: Dict[str, List[str]] = {}
+    for path in sorted(agents_dir.glob("*/.adk/eval_history/*.evalset_result.json")):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if isinstance(data, str):
+                data = json.loads(data)
+        except (OSError, json.JSONDecodeError):
+            continue
+        for case in data.get("eval_case_results") or []:
+            for result in case.get("eval_metric_result_per_invocation") or []:
+                invocation = result.get("actual_invocation") or {}
+                user_text = _part_text(invocation.get("user_content")).strip()
+                response = _part_text(invocation.get("final_response")).strip()
+                if user_text and response:
+                    recordings.setdefault(user_text, []).append(response)
+    return recordings
+
+
+class Responder:
+    """Chooses the text a fake model call returns."""
+
+    def __init__(
+        self,
+        rules: Optional[List[Tuple[str, str]]] = None,
+        recordings: Optional[Dict[str, List[str]]] = None,
+        seed: int = 0,
+    ):
+        self.rules = [(re.compile(pattern), template) for pattern, template in (rules if rules is not None else DEFAULT_RULES)]
+        self.recordings = recordings if recordings is not None else {}
+        self.seed = seed
+
+    @staticmethod
+    def from_file(path: str, **kwargs) -> "Responder":
+        """Loads rules from a JSON list of {"agent": regex, "response": template} objects."""
+        with open(path, "r", encoding="utf-8") as f:
+            rules = [(r["agent"], r["response"]) for r in json.load(f)]
+        return Responder(rules=rules, **kwargs)
+
+    def replay(self, user_text: str, key: str) -> str:
+        choices = self.recordings.get(user_text.strip())
+        if not choices:
+            return f"Fake response to: {user_text}"
+        digest = hashlib.sha256(f"{self.seed}:{key}".encode("utf-8")).digest()
+        return choices[digest[0] % len(choices)]
+
+    def respond(self, agent_name: str, user_text: str, key: str) -> str:
+        replay = self.replay(user_text, key)
+        for pattern, template in self.rules:
+            if pattern.fullmatch(agent_name):
+                return template.format(
+                    user_text=user_text,
+                    replay=replay,
+                    user_text_json=json.dumps(user_text),
+                    replay_json=json.dumps(replay),
+                )
+        return replay
+
+
+def _agent_name(llm_request: LlmRequest) -> str:
+    labels = getattr(llm_request.config, "labels", None) or {}
+    if labels.get("adk_agent_name"):
+        return labels["adk_agent_name"]
+    match = _AGENT_NAME_RE.search(str(getattr(llm_request.config, "system_instruction", "") or ""))
+    return match.group(1) if match else ""
+
+
+def _user_text(llm_request: LlmRequest) -> str:
+    for content in llm_request.contents or []:
+        if content.role == "user" and content.parts and content.parts[0].text:
+            return content.parts[0].text
+    return ""
+
+
+class FakeLlm(BaseLlm):
+    """BaseLlm that answers from the installed Responder after a simulated delay."""
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [r"gemini-.*"]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        agent_name = _agent_name(llm_request)
+        user_text = _user_text(llm_request)
+        prompt = str(llm_request.config.system_instruction or "") + "".join(
+            p.text or "" for c in llm_request.contents or [] for p in c.parts or []
+        )
+        key = f"{agent_name}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}"
+
+        delay = _MODEL_LATENCY.get(self.model, _LATENCY).sample(key)
+        if delay:
+            await asyncio.sleep(delay)
+        text = _RESPONDER.respond(agent_name, user_text, key)
+
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(text)
+        STATS.calls += 1
+        STATS.prompt_tokens += prompt_tokens
+        STATS.completion_tokens += completion_tokens
+        STATS.latency_seconds += delay
+        STATS.calls_by_agent[agent_name] = STATS.calls_by_agent.get(agent_name, 0) + 1
+
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=completion_tokens,
+                total_token_count=prompt_tokens + completion_tokens,
+            ),
+        )
+
+
+_RESPONDER = Responder()
+_LATENCY = LatencyModel()
+_MODEL_LATENCY: Dict[str, LatencyModel] = {}
+
+
+def install_fake_model(
+    latency: str = "none",
+    seed: int = 0,
+    rules_file: Optional[str] = None,
+    replay: bool = True,
+    model_latency: Optional[Dict[str, str]] = None,
+) -> FakeModelStats:
+    """Routes every gemini-* model name to FakeLlm and returns the shared call stats.
+
+    `model_latency` maps model names to latency specs that replace `latency` for them.
+    """
+    global _RESPONDER, _LATENCY, _MODEL_LATENCY
+    recordings = load_eval_history() if replay else {}
+    if rules_file:
+        _RESPONDER = Responder.from_file(rules_file, recordings=recordings, seed=seed)
+    else:
+        _RESPONDER = Responder(recordings=recordings, seed=seed)
+    _LATENCY = LatencyModel(latency, seed=seed)
+    _MODEL_LATENCY = {model: LatencyModel(spec, seed=seed) for model, spec in (model_latency or {}).items()}
+    LLMRegistry.register(FakeLlm)
+    STATS.reset()
+    return STATS
+
+
+STAND_IN_STATS: Dict[str, int] = {"calls": 0}
+
+
+async def stand_in_search(query: Any) -> str:
+    """Local stand-in for google_search: a deterministic result after the model latency."""
+    STAND_IN_STATS["calls"] += 1
+    text = query if isinstance(query, str) else json.dumps(query, sort_keys=True)
+    delay = _LATENCY.sample(f"stand_in_search:{text}")
+    if delay:
+        await asyncio.sleep(delay)
+    return _RESPONDER.replay(text, key=f"stand_in_search:{text}")
+
+
+def install_stand_in_tools(root_agent: Any) -> int:
+    """Replaces google_search in every agent's name->tool dict (tool dispatchers); returns how many."""
+    replaced = 0
+    stack = [root_agent]
+    while stack:
+        agent = stack.pop()
+        tools = getattr(agent, "tools", None)
+        if isinstance(tools, dict) and "google_search" in tools:
+            tools["google_search"] = stand_in_search
+            replaced += 1
+        stack.extend(agent.sub_agents)
+    STAND_IN_STATS["calls"] = 0
+    return replaced
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Hot-Path Profiler
+Opt-in CPU profiling of agent orchestration, excluding time spent waiting on
+or inside model calls. Enabled by environment variable for load_test.py and
+benchmark.py runs:
+
+    ADK_PROFILE=sampling   collapsed stacks, ready for flamegraph.pl / speedscope
+    ADK_PROFILE=cprofile   cProfile stats on a CPU-time clock (.pstats)
+    ADK_PROFILE_DIR        output directory (default: profiles/)
+    ADK_PROFILE_INTERVAL_MS  sampling interval (default: 1)
+
+Sampling mode drops samples where the event loop is idle (awaiting model or
+other I/O) and samples inside a model's generate_content_async, so what is
+left is orchestration: state handling, instruction templating, agent
+construction, custom agent loops. Frames of a custom agent's _run_async_impl
+are labelled with the agent's name.
+
+Output per architecture (root agent name):
+    profiles/<Agent>.collapsed   "frame;frame;frame count" lines
+    profiles/<Agent>.pstats      (cprofile mode)
+    profiles/<Agent>.summary.json
+
+Usage:
+    ADK_PROFILE=sampling python3 tests/load_test.py adk-agentic-architectures/16_cellular_automata/ --sessions 50
+    flamegraph.pl profiles/CellularAutomata.collapsed > ca.svg
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.plugins.base_plugin import BasePlugin
+
+_MODEL_FRAMES = {"generate_content_async"}
+_IDLE_FRAMES = {("selectors.py", "select"), ("selectors.py", "poll")}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", Path(code.co_filename).stem)
+    label = f"{module}:{code.co_name}"
+    if code.co_name == "_run_async_impl":
+        agent = frame.f_locals.get("self")
+        name = getattr(agent, "name", None)
+        if name:
+            label += f"[{name}]"
+    return label
+
+
+class _Sampler:
+    """Samples one thread's Python stack on a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.counts = {"samples": 0, "idle": 0, "model": 0}
+        self.active = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hotpath-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if not self.active:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.counts["samples"] += 1
+            if (Path(frame.f_code.co_filename).name, frame.f_code.co_name) in _IDLE_FRAMES:
+                self.counts["idle"] += 1
+                continue
+            labels = []
+            in_model = False
+            while frame is not None:
+                in_model = in_model or frame.f_code.co_name in _MODEL_FRAMES
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if in_model:
+                self.counts["model"] += 1
+                continue
+            self.stacks[";".join(reversed(labels))] += 1
+
+
+class HotPathProfilerPlugin(BasePlugin):
+    """Profiles the runner's thread while at least one invocation is running."""
+
+    def __init__(self, output_dir: str = "profiles", mode: str = "sampling", interval_ms: float = 1.0,
+                 name: str = "hotpath_profiler"):
+        super().__init__(name=name)
+        if mode not in ("sampling", "cprofile"):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.output_dir = Path(output_dir)
+        self.mode = mode
+        self.interval = interval_ms / 1000.0
+        self.agent_name: Optional[str] = None
+        self.invocations = 0
+        self._active = 0
+        self._cpu_start = 0.0
+        self._cpu_seconds = 0.0
+        self._sampler: Optional[_Sampler] = None
+        self._profile: Optional[cProfile.Profile] = None
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext):
+        self.agent_name = self.agent_name or invocation_context.agent.name
+        self.invocations += 1
+        if self._active == 0:
+            self._cpu_start = time.thread_time()
+            if self.mode == "sampling":
+                if self._sampler is None:
+                    self._sampler = _Sampler(threading.get_ident(), self.interval)
+                    self._sampler.start()
+                self._sampler.active = True
+            else:
+                self._profile = self._profile or cProfile.Profile(time.thread_time)
+                self._profile.enable()
+        self._active += 1
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        self._active -= 1
+        if self._active == 0:
+            self._cpu_seconds += time.thread_time() - self._cpu_start
+            if self._sampler is not None:
+                self._sampler.active = False
+            if self._profile is not None:
+                self._profile.disable()
+
+    def dump(self) -> Dict[str, Any]:
+        """Writes the profile for the architecture that ran and returns its summary."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        name = self.agent_name or "unknown"
+        summary: Dict[str, Any] = {
+            "agent": name,
+            "mode": self.mode,
+            "invocations": self.invocations,
+            "thread_cpu_seconds": round(self._cpu_seconds, 4),
+        }
+        if self._sampler is not None:
+            self._sampler.stop()
+            counts = self._sampler.counts
+            orchestration = sum(self._sampler.stacks.values())
+            with open(self.output_dir / f"{name}.collapsed", "w", encoding="utf-8") as f:
+                for stack, count in self._sampler.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            # Samples land at GIL switch points, so scale the thread's measured CPU
+            # time by the share of busy samples that were outside model calls.
+            busy = orchestration + counts["model"]
+            share = orchestration / busy if busy else 0.0
+            summary.update({
+                "interval_ms": self.interval * 1000,
+                **counts,
+                "orchestration_samples": orchestration,
+                "orchestration_ms_per_invocation": round(
+                    self._cpu_seconds * share * 1000 / max(1, self.invocations), 3),
+            })
+            self._sampler = None
+        if self._profile is not None:
+            import pstats
+            self._profile.dump_stats(str(self.output_dir / f"{name}.pstats"))
+            stats = pstats.Stats(self._profile)
+            model = sum(ct for (_, _, fn), (_, _, _, ct, _) in stats.stats.items() if fn in _MODEL_FRAMES)
+            summary.update({
+                "model_cpu_seconds": round(model, 4),
+                "orchestration_ms_per_invocation": round(
+                    (self._cpu_seconds - model) * 1000 / max(1, self.invocations), 3),
+            })
+            self._profile = None
+        with open(self.output_dir / f"{name}.summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+
+def profiler_from_env() -> Optional[HotPathProfilerPlugin]:
+    """Returns a profiler plugin if ADK_PROFILE is set, else None."""
+    mode = os.environ.get("ADK_PROFILE", "").strip().lower()
+    if not mode or mode in ("0", "off", "false"):
+        return None
+    if mode in ("1", "on", "true"):
+        mode = "sampling"
+    return HotPathProfilerPlugin(
+        output_dir=os.environ.get("ADK_PROFILE_DIR", "profiles"),
+        mode=mode,
+        interval_ms=float(os.environ.get("ADK_PROFILE_INTERVAL_MS", "1")),
+    )
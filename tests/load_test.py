@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Offline Load Generator
+Drives N concurrent sessions through an architecture's root_agent against the
+fake model backend and reports throughput and latency percentiles. No API key
+or network access is needed, so the numbers reflect orchestration overhead plus
+the simulated model latency only.
+
+Usage:
+    python3 tests/load_test.py adk-agentic-architectures/03_ReAct/ \\
+        --sessions 200 --concurrency 20 --latency lognormal:150:0.4 --seed 1
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fake_model import REPO_ROOT, STATS, install_fake_model, install_stand_in_tools
+from hotpath_profile import profiler_from_env
+
+BEHAVIOR_DIR = REPO_ROOT / "tests" / "behavior"
+
+
+def load_root_agent(agent_dir: str) -> Any:
+    """Imports an agent directory under its own module name and returns its root_agent."""
+    path = Path(agent_dir).resolve()
+    module_name = "agent_" + re.sub(r"\W", "_", path.name)
+    if module_name in sys.modules:
+        return sys.modules[module_name].agent.root_agent
+    # Like `adk`, put the agents directory on sys.path so shared modules (agent_tools) import.
+    if str(path.parent) not in sys.path:
+        sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(module_name, path / "__init__.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module.agent.root_agent
+
+
+def load_prompts(pattern: str = "*/*.test.json") -> List[str]:
+    """Collects the user messages of the behavior test cases."""
+    prompts = []
+    for path in sorted(BEHAVIOR_DIR.glob(pattern)):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        for case in data.get("eval_cases", []):
+            for turn in case.get("conversation", []):
+                text = "".join(p.get("text") or "" for p in turn["user_content"]["parts"])
+                if text:
+                    prompts.append(text)
+    return prompts
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def tool_cache_metrics(root_agent: Any) -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters of every tool cache in the agent tree, keyed "<agent>/<tool>"."""
+    metrics = {}
+    stack = [root_agent]
+    while stack:
+        agent = stack.pop()
+        cache = getattr(agent, "cache", None)
+        if cache is not None and hasattr(cache, "metrics"):
+            metrics.update({f"{agent.name}/{tool}": m for tool, m in cache.metrics().items()})
+        stack.extend(agent.sub_agents)
+    return metrics
+
+
+@dataclass
+class LoadReport:
+    agent: str
+    sessions: int
+    concurrency: int
+    wall_seconds: float = 0.0
+    errors: int = 0
+    latencies: List[float] = field(default_factory=list)
+    first_event: List[float] = field(default_factory=list)
+    events: int = 0
+    model: Dict[str, Any] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        completed = len(self.latencies)
+        return {
+            "agent": self.agent,
+            "sessions": self.sessions,
+            "concurrency": self.concurrency,
+            "completed": completed,
+            "errors": self.errors,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "throughput_per_second": round(completed / self.wall_seconds, 3) if self.wall_seconds else 0.0,
+            "latency_ms": {
+                f"p{p}": round(percentile(self.latencies, p) * 1000, 2) for p in (50, 95, 99)
+            },
+            "first_event_ms": {
+                f"p{p}": round(percentile(self.first_event, p) * 1000, 2) for p in (50, 95, 99)
+            },
+            "events_per_session": round(self.events / completed, 2) if completed else 0.0,
+            "model": self.model,
+        }
+
+
+async def run_load(
+    root_agent: Any,
+    prompts: List[str],
+    sessions: int,
+    concurrency: int,
+    warmup: int = 1,
+    plugins: Optional[List[Any]] = None,
+    users: Optional[int] = None,
+) -> LoadReport:
+    """Runs `sessions` independent sessions, at most `concurrency` at a time,
+    spread round-robin over `users` distinct users (default: one per session).
+
+    The first `warmup` sessions run unmeasured so lazy imports and first-call
+    setup do not land in the percentiles.
+    """
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+
+    runner = InMemoryRunner(agent=root_agent, app_name="load_test", plugins=plugins)
+    report = LoadReport(agent=root_agent.name, sessions=sessions, concurrency=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_session(index: int, measured: bool = True) -> None:
+        async with semaphore:
+            user_id = f"user_{index % users}" if users else f"user_{index}"
+            session = await runner.session_service.create_session(app_name="load_test", user_id=user_id)
+            message = types.Content(role="user", parts=[types.Part(text=prompts[index % len(prompts)])])
+            start = time.perf_counter()
+            first_event: Optional[float] = None
+            events = 0
+            try:
+                async for _ in runner.run_async(
+                    user_id=user_id, session_id=session.id, new_message=message
+                ):
+                    if first_event is None:
+                        first_event = time.perf_counter() - start
+                    events += 1
+            except Exception as e:
+                report.errors += 1
+                print(f"  session {index} failed: {e!r}", file=sys.stderr)
+                return
+            if not measured:
+                return
+            report.latencies.append(time.perf_counter() - start)
+            report.first_event.append(first_event or 0.0)
+            report.events += events
+
+    for i in range(warmup):
+        await one_session(sessions + i, measured=False)
+    report.errors = 0
+
+    STATS.reset()
+    start = time.perf_counter()
+    await asyncio.gather(*(one_session(i) for i in range(sessions)))
+    report.wall_seconds = time.perf_counter() - start
+    report.model = STATS.to_dict()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for an agent architecture.")
+    parser.add_argument("agent_dir", help="Agent directory, e.g. adk-agentic-architectures/03_ReAct/")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", default="none",
+                        help="fixed:MS | uniform:LO:HI | lognormal:MEDIAN:SIGMA | exponential:MEAN | none")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+                        help="Latency for one model name instead of --latency (repeatable), "
+                             "e.g. gemini-2.5-pro=lognormal:400:0.3")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured sessions run first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rules", help="JSON rules file for the fake model")
+    parser.add_argument("--no-replay", action="store_true", help="Do not replay eval_history responses")
+    parser.add_argument("--prompt", action="append", help="User message (repeatable); defaults to tests/behavior cases")
+    parser.add_argument("--json", dest="json_path", help="Write the summary to this file")
+    parser.add_argument("--trace", help="Append OTLP/JSON spans for every session to this file")
+    parser.add_argument("--stand-in-tools", action="store_true",
+                        help="Run google_search through a local stand-in in tool dispatchers (02, 03)")
+    parser.add_argument("--single-flight", action="store_true",
+                        help="Coalesce identical concurrent sessions of a user (see single_flight.py)")
+    parser.add_argument("--users", type=int,
+                        help="Distinct users the sessions are spread over (default: one per session)")
+    parser.add_argument("--rpm", type=float,
+                        help="Requests per minute for the shared model client (see model_client.py)")
+    parser.add_argument("--tiers", help="Model tier policy YAML instead of model_tiers.yaml")
+    args = parser.parse_args()
+
+    malformed = [spec for spec in args.model_latency if "=" not in spec]
+    if malformed:
+        parser.error(f"--model-latency expects MODEL=SPEC, got {', '.join(malformed)}")
+    model_latency = dict(spec.split("=", 1) for spec in args.model_latency)
+    install_fake_model(latency=args.latency, seed=args.seed, rules_file=args.rules, replay=not args.no_replay,
+                       model_latency=model_latency)
+    root_agent = load_root_agent(args.agent_dir)
+    from model_client import MODEL_CLIENT, TierPolicy
+    if args.rpm:
+        MODEL_CLIENT.configure({"requests_per_minute": args.rpm})
+    if args.tiers:
+        MODEL_CLIENT.tiers = TierPolicy.from_file(args.tiers)
+    if args.stand_in_tools:
+        install_stand_in_tools(root_agent)
+    if args.single_flight:
+        from single_flight import SingleFlightAgent
+        root_agent = SingleFlightAgent(root_agent)
+    prompts = args.prompt or load_prompts()
+
+    plugins = []
+    if args.trace:
+        from tracing import OtlpJsonFileExporter, TracingPlugin
+        plugins.append(TracingPlugin(OtlpJsonFileExporter(args.trace)))
+    profiler = profiler_from_env()
+    if profiler:
+        plugins.append(profiler)
+
+    report = asyncio.run(run_load(root_agent, prompts, args.sessions, args.concurrency, args.warmup, plugins,
+                                  args.users))
+    summary = report.summary()
+
+    print(f"\n{'='*60}")
+    print(f"Load Test: {summary['agent']} ({args.agent_dir})")
+    print(f"{'='*60}")
+    print(f"Sessions:    {summary['completed']}/{summary['sessions']} completed, {summary['errors']} errors")
+    print(f"Concurrency: {summary['concurrency']}")
+    print(f"Throughput:  {summary['throughput_per_second']} sessions/s over {summary['wall_seconds']}s")
+    print("Latency:     " + "  ".join(f"{k}={v}ms" for k, v in summary["latency_ms"].items()))
+    print("First event: " + "  ".join(f"{k}={v}ms" for k, v in summary["first_event_ms"].items()))
+    print(f"Model calls: {summary['model']['calls']} ({summary['model']['calls'] / max(1, summary['completed']):.2f}/session)")
+    for name, metrics in tool_cache_metrics(root_agent).items():
+        print(f"Tool cache:  {name} hits={metrics['hits']} misses={metrics['misses']} "
+              f"hit_rate={metrics['hit_rate']}")
+    from structured_output import parse_metrics
+    for name, metrics in parse_metrics().items():
+        print(f"JSON output: {name} parsed={metrics['parsed']} (extracted={metrics['extracted']}) "
+              f"prose={metrics['prose']} failed={metrics['failed']} invalid={metrics['invalid']} "
+              f"retries={metrics['retries']}")
+    for priority, metrics in MODEL_CLIENT.metrics().items():
+        print(f"Model client: {priority} calls={metrics['calls']} throttled={metrics['throttled']} "
+              f"mean_wait={metrics['mean_wait_ms']}ms retries={metrics['retries']} errors={metrics['errors']}")
+    for tier, metrics in MODEL_CLIENT.tiers.metrics().items():
+        print(f"Model tier:  {tier} calls={metrics['calls']} p50={metrics['p50_ms']}ms p95={metrics['p95_ms']}ms "
+              f"downshifted={metrics['downshifted']} downshifts={metrics['downshifts']} now={metrics['model']}")
+    if args.single_flight:
+        print(f"Coalesced:   {root_agent.stats['followers']} followers on {root_agent.stats['leaders']} executions "
+              f"({root_agent.stats['takeovers']} takeovers)")
+    if profiler:
+        profile = profiler.dump()
+        print(f"Profile:     {profile['orchestration_ms_per_invocation']}ms orchestration CPU/session "
+              f"({profile['mode']}) -> {profiler.output_dir}/{profile['agent']}.*")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary written to {args.json_path}")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Offline Runtime Checks
+Exercises the shared runtime modules in adk-agentic-architectures/ against the
+fake model backend (tests/fake_model.py), so no API key or network is needed.
+Each check builds a small agent tree, runs it and verifies what the module did;
+a failing check prints why and the command exits non-zero.
+
+Checks:
+  tracing   TracingPlugin records one ended span per agent run and model call,
+            parented along the agent tree, in one trace per invocation
+  single_flight
+            SingleFlightAgent coalesces a user's identical requests but not
+            other users', and a follower takes over when the leader is cancelled
+  tool_dispatch
+            a two-call action runs its Python tools concurrently, and all its
+            model-side calls go to the Actor model in one request alongside them;
+            a cached Actor answer is replayed as the same action result
+  dataflow  a sub-agent that reads no other's output starts first unless it
+            names a predecessor in depends_on, and DataflowAgent runs each
+            sub-agent on its own branch with its inputs already in state
+
+Usage:
+    python3 tests/runtime_checks.py                # every check
+    python3 tests/runtime_checks.py tracing single_flight   # selected checks
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+AGENTS_DIR = REPO_ROOT / "adk-agentic-architectures"
+# Like `adk`, put the agents directory on sys.path so shared modules import.
+sys.path.insert(0, str(AGENTS_DIR))
+
+from fake_model import install_fake_model  # noqa: E402
+
+MODEL = "gemini-2.5-flash-lite"
+
+
+class CheckFailed(AssertionError):
+    pass
+
+
+def expect(condition: bool, message: str) -> None:
+    if not condition:
+        raise CheckFailed(message)
+
+
+def llm(name: str, instruction: str, output_key: Optional[str] = None) -> Any:
+    from google.adk.agents import LlmAgent
+    return LlmAgent(name=name, model=MODEL, instruction=instruction, output_key=output_key or name.lower())
+
+
+async def run_once(agent: Any, text: str = "Who produced Dune?", plugins: Optional[List[Any]] = None,
+                   user_id: str = "user", state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Runs one invocation in a fresh session and returns the session's final state."""
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+
+    runner = InMemoryRunner(agent=agent, app_name="runtime_checks", plugins=plugins or [])
+    session = await runner.session_service.create_session(app_name="runtime_checks", user_id=user_id,
+                                                          state=state)
+    message = types.Content(role="user", parts=[types.Part(text=text)])
+    async for _ in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+        pass
+    session = await runner.session_service.get_session(app_name="runtime_checks", user_id=user_id,
+                                                       session_id=session.id)
+    return dict(session.state)
+
+
+async def check_tracing() -> str:
+    from google.adk.agents import SequentialAgent
+    from tracing import InMemorySpanCollector, TracingPlugin
+
+    collector = InMemorySpanCollector()
+    pipeline = SequentialAgent(name="Pipeline", sub_agents=[
+        llm("Drafter", "Draft an answer."),
+        llm("Reviewer", "Review the draft: {drafter}"),
+    ])
+    await run_once(pipeline, plugins=[TracingPlugin(collector)])
+
+    spans = collector.spans
+    by_name = {s.name: s for s in spans}
+    for name in ("agent Pipeline", "agent Drafter", "agent Reviewer"):
+        expect(name in by_name, f"no span '{name}' (got {sorted(by_name)})")
+    model_spans = [s for s in spans if s.name.startswith("llm ")]
+    expect(len(model_spans) == 2, f"expected 2 model spans, got {len(model_spans)}")
+    expect(all(s.end_ns and s.status == "ok" for s in spans), "every span should end with status ok")
+    expect(len({s.trace_id for s in spans}) == 1, "one invocation should produce one trace")
+    expect(by_name["agent Drafter"].parent is by_name["agent Pipeline"], "Drafter span should be under Pipeline")
+    expect(by_name["agent Reviewer"].parent is by_name["agent Pipeline"], "Reviewer span should be under Pipeline")
+    parents = sorted(s.parent.name for s in model_spans)
+    expect(parents == ["agent Drafter", "agent Reviewer"], f"model spans parented to {parents}")
+    return f"{len(spans)} spans in one trace"
+
+
+async def check_single_flight() -> str:
+    from google.adk.agents import SequentialAgent
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+    from fake_model import STATS
+    from single_flight import SingleFlightAgent
+
+    agent = SingleFlightAgent(SequentialAgent(name="Pipeline", sub_agents=[
+        llm("Drafter", "Draft an answer."),
+        llm("Reviewer", "Review the draft: {drafter}"),
+    ]))
+    runner = InMemoryRunner(agent=agent, app_name="runtime_checks")
+    message = types.Content(role="user", parts=[types.Part(text="Who produced Dune?")])
+
+    async def run(user_id: str, stop_after: Optional[int] = None) -> Dict[str, Any]:
+        session = await runner.session_service.create_session(app_name="runtime_checks", user_id=user_id)
+        events = runner.run_async(user_id=user_id, session_id=session.id, new_message=message)
+        count = 0
+        async for _ in events:
+            count += 1
+            if count == stop_after:
+                await events.aclose()
+                break
+        session = await runner.session_service.get_session(app_name="runtime_checks", user_id=user_id,
+                                                           session_id=session.id)
+        return dict(session.state)
+
+    STATS.reset()
+    states = await asyncio.gather(run("alice"), run("alice"), run("bob"))
+    expect(agent.stats["leaders"] == 2 and agent.stats["followers"] == 1,
+           f"expected alice's requests to share a run and bob to run alone, got {agent.stats}")
+    expect(STATS.calls == 4, f"expected 4 model calls for 2 executions, got {STATS.calls}")
+    expect(all(s.get("reviewer") for s in states), "every session should end with the reviewer's output")
+
+    # The leader's caller stops reading after the first event; both followers must still finish.
+    # Closing a run inside a model call makes OpenTelemetry log a harmless context-detach error.
+    logging.getLogger("opentelemetry.context").setLevel(logging.CRITICAL)
+    STATS.reset()
+    leader = asyncio.ensure_future(run("carol", stop_after=1))
+    await asyncio.sleep(0)
+    followers = await asyncio.gather(run("carol"), run("carol"))
+    await leader
+    expect(agent.stats["takeovers"] == 1, f"expected one follower to take over, got {agent.stats}")
+    expect(all(s.get("reviewer") for s in followers), "followers should finish after the leader is cancelled")
+    return (f"{agent.stats['leaders']} executions for {agent.stats['leaders'] + agent.stats['followers']} "
+            f"requests, {agent.stats['takeovers']} takeover")
+
+
+async def check_tool_dispatch() -> str:
+    import json
+    from google.adk.tools import google_search
+    from agent_tools import ToolGuard
+    from fake_model import STATS
+    from structured_output import StructuredOutputs
+    from tool_cache import ToolResultCache
+    from tool_dispatch import ToolDispatcher
+
+    spans: Dict[str, List[float]] = {}
+
+    async def lookup(query: str) -> str:
+        spans[query] = [time.perf_counter()]
+        await asyncio.sleep(0.05)
+        spans[query].append(time.perf_counter())
+        return f"found {query}"
+
+    def actor_started(callback_context: Any, llm_request: Any) -> None:
+        spans["ActorModel"] = [time.perf_counter()]
+
+    def actor_finished(callback_context: Any, llm_response: Any) -> None:
+        spans["ActorModel"].append(time.perf_counter())
+
+    def dispatcher(cache: Any = None) -> ToolDispatcher:
+        actor = llm("ActorModel", "Execute the action: {thought}", "action_result")
+        actor.before_model_callback = actor_started
+        actor.after_model_callback = actor_finished
+        return ToolDispatcher(
+            name="Actor", action_key="thought", output_key="action_result",
+            tools={"lookup": lookup, "google_search": google_search},
+            fallback=actor, outputs=StructuredOutputs(), guard=ToolGuard(), cache=cache,
+        )
+
+    def action(*calls: Any) -> Dict[str, Any]:
+        return {"thought": json.dumps({"tool_calls": [{"tool_name": n, "tool_input": q} for n, q in calls]})}
+
+    def overlap(a: str, b: str) -> bool:
+        return spans[a][0] < spans[b][-1] and spans[b][0] < spans[a][-1]
+
+    state = await run_once(dispatcher(), state=action(("lookup", "Dune"), ("lookup", "Arrival")))
+    observations = json.loads(state["action_result"])["observations"]
+    expect([o.get("observation") for o in observations] == ["found Dune", "found Arrival"],
+           f"expected both lookups in call order, got {observations}")
+    expect(overlap("Dune", "Arrival"), "the two Python tool calls did not run concurrently")
+
+    STATS.reset()
+    state = await run_once(dispatcher(), state=action(("google_search", "Dune"), ("google_search", "Arrival")))
+    expect(STATS.calls_by_agent == {"ActorModel": 1},
+           f"two model-side calls should take one Actor request, got {STATS.calls_by_agent}")
+    expect(bool(state.get("action_result")), "the Actor's answer should be the action result")
+
+    STATS.reset()
+    spans.clear()
+    state = await run_once(dispatcher(), state=action(("lookup", "Dune"), ("google_search", "Arrival")))
+    observations = json.loads(state["action_result"])["observations"]
+    expect(observations[0].get("observation") == "found Dune" and observations[1].get("tool_names") == ["google_search"],
+           f"expected the lookup and the Actor's answer, got {observations}")
+    expect(STATS.calls_by_agent == {"ActorModel": 1}, f"expected one Actor request, got {STATS.calls_by_agent}")
+    expect(overlap("Dune", "ActorModel"), "the Python call did not run while the Actor request was in flight")
+
+    # A cache hit must give the loop the same action result the Actor's turn did.
+    cached = dispatcher(ToolResultCache.from_dict({"default": {"ttl_seconds": 60}}))
+    for calls in ([("google_search", "Dune")], [("google_search", "Dune"), ("google_search", "Arrival")]):
+        STATS.reset()
+        miss = await run_once(cached, state=action(*calls))
+        hit = await run_once(cached, state=action(*calls))
+        expect(STATS.calls_by_agent == {"ActorModel": 1},
+               f"the repeated action should be a cache hit, got {STATS.calls_by_agent}")
+        expect(hit["action_result"] == miss["action_result"],
+               f"a hit stored {hit['action_result']!r}, the miss stored {miss['action_result']!r}")
+    return "2 Python calls concurrent, 2 model-side calls in 1 Actor request, mixed calls overlapped, hit == miss"
+
+
+async def check_dataflow() -> str:
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+    from dataflow import DataflowAgent, DataflowGraph, Step, dependency_stages
+
+    steps = [
+        Step.from_config("Drafter", "Draft an answer.", "drafter"),
+        Step.from_config("Critic", "Critique the answer above.", "critique", depends_on=["Drafter"]),
+        Step.from_config("Researcher", "Research the question.", "research"),
+        Step.from_config("Reviewer", "Review the draft: {drafter}", "reviewer"),
+    ]
+    report = DataflowGraph("Pipeline", steps).report()
+    after = {s["name"]: s["after"] for s in report["steps"]}
+    expect(after["Critic"] == ["Drafter"], f"depends_on: [Drafter] should order Critic after it, got {after}")
+    expect(after["Researcher"] == [], f"Researcher reads no state, so it should start first, got {after}")
+    expect(after["Reviewer"] == ["Drafter"], f"Reviewer reads {{drafter}}, got {after}")
+    expect(report["theoretical_speedup"] == 2, f"expected a 2x speedup, got {report['theoretical_speedup']}")
+    stages = dependency_stages(steps)
+    expect(stages == [[0, 2], [1, 3]], f"expected stages [[0, 2], [1, 3]], got {stages}")
+
+    requests: Dict[str, Any] = {}
+
+    def capture(callback_context: Any, llm_request: Any) -> None:
+        requests[callback_context.agent_name] = llm_request
+
+    agents = [llm("Drafter", "Draft an answer."), llm("Researcher", "Research the question."),
+              llm("Reviewer", "Review the draft: {drafter}")]
+    for agent in agents:
+        agent.before_model_callback = capture
+    graph = DataflowGraph("Pipeline", [
+        Step.from_config(a.name, a.instruction, a.output_key) for a in agents
+    ])
+    pipeline = DataflowAgent(name="Pipeline", sub_agents=agents, graph=graph)
+    runner = InMemoryRunner(agent=pipeline, app_name="runtime_checks")
+    session = await runner.session_service.create_session(app_name="runtime_checks", user_id="user")
+    message = types.Content(role="user", parts=[types.Part(text="Who produced Dune?")])
+    branches: Dict[str, set] = {}
+    async for event in runner.run_async(user_id="user", session_id=session.id, new_message=message):
+        branches.setdefault(event.author, set()).add(event.branch)
+    for agent in agents:
+        expected = {f"Pipeline.{agent.name}"}
+        expect(branches.get(agent.name) == expected, f"{agent.name} ran on {branches.get(agent.name)}, not {expected}")
+    session = await runner.session_service.get_session(app_name="runtime_checks", user_id="user",
+                                                       session_id=session.id)
+    draft = session.state.get("drafter")
+    expect(bool(draft) and session.state.get("reviewer"), "every sub-agent should write its output_key")
+    reviewer = requests["Reviewer"]
+    expect(draft in str(reviewer.config.system_instruction), "Reviewer should start with {drafter} in state")
+    history = " ".join(p.text or "" for c in reviewer.contents for p in c.parts or [])
+    expect(draft not in history, "Reviewer should not see Drafter's events on another branch")
+    return f"{len(steps)} steps at {report['theoretical_speedup']:g}x, {len(agents)} branches"
+
+
+CHECKS: Dict[str, Callable[[], Awaitable[str]]] = {
+    "tracing": check_tracing,
+    "single_flight": check_single_flight,
+    "tool_dispatch": check_tool_dispatch,
+    "dataflow": check_dataflow,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run offline checks of the shared runtime modules.")
+    parser.add_argument("checks", nargs="*", help=f"Checks to run ({', '.join(CHECKS)}); defaults to all")
+    args = parser.parse_args()
+    unknown = [name for name in args.checks if name not in CHECKS]
+    if unknown:
+        parser.error(f"unknown checks: {', '.join(unknown)}")
+
+    # A little model latency, so runs started together are in flight together.
+    install_fake_model(latency="fixed:20", replay=False)
+    failed = 0
+    for name in args.checks or list(CHECKS):
+        start = time.perf_counter()
+        try:
+            detail = asyncio.run(CHECKS[name]())
+            print(f"✅ {name:<16} {time.perf_counter() - start:6.2f}s  {detail}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name:<16} {time.perf_counter() - start:6.2f}s  {e}")
+            if not isinstance(e, CheckFailed):
+                traceback.print_exc()
+    print(f"\n{len(args.checks or CHECKS) - failed}/{len(args.checks or CHECKS)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
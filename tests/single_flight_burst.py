@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Single-Flight Burst
+Sends a burst of identical first-turn requests (one user, fresh sessions) to an
+architecture twice: once as independent executions and once through
+SingleFlightAgent (adk-agentic-architectures/single_flight.py), and compares
+wall time, model calls and distinct answers. Runs on the fake model backend.
+
+Usage:
+    python3 tests/single_flight_burst.py adk-agentic-architectures/03_ReAct/ --requests 20 --latency fixed:50
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+AGENTS_DIR = REPO_ROOT / "adk-agentic-architectures"
+# Like `adk`, put the agents directory on sys.path so shared modules import.
+sys.path.insert(0, str(AGENTS_DIR))
+
+from google.adk.agents import BaseAgent  # noqa: E402
+
+from single_flight import SingleFlightAgent  # noqa: E402
+
+
+async def run_burst(root_agent: BaseAgent, prompt: str, requests: int) -> Dict[str, Any]:
+    """Starts `requests` fresh sessions of one user with the same prompt at once."""
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+
+    from fake_model import STATS
+
+    runner = InMemoryRunner(agent=root_agent, app_name="single_flight")
+    final: List[str] = []
+
+    async def one(index: int) -> None:
+        session = await runner.session_service.create_session(app_name="single_flight", user_id="user")
+        message = types.Content(role="user", parts=[types.Part(text=prompt)])
+        text = ""
+        async for event in runner.run_async(user_id="user", session_id=session.id, new_message=message):
+            if event.is_final_response() and event.content and event.content.parts:
+                text = "".join(p.text or "" for p in event.content.parts) or text
+        final.append(text)
+
+    STATS.reset()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return {
+        "wall_seconds": round(time.perf_counter() - start, 4),
+        "model_calls": STATS.calls,
+        "distinct_answers": len(set(final)),
+    }
+
+
+def main():
+    from fake_model import install_fake_model
+    from load_test import load_prompts, load_root_agent
+
+    parser = argparse.ArgumentParser(description="Compare a burst of identical requests with and without coalescing.")
+    parser.add_argument("agent_dir", help="Agent directory, e.g. adk-agentic-architectures/03_ReAct/")
+    parser.add_argument("--requests", type=int, default=20, help="Concurrent identical requests")
+    parser.add_argument("--latency", default="fixed:50", help="Fake model latency (see load_test.py)")
+    parser.add_argument("--prompt", help="User message; defaults to the first tests/behavior case")
+    args = parser.parse_args()
+
+    install_fake_model(latency=args.latency)
+    root_agent = load_root_agent(args.agent_dir)
+    prompt = args.prompt or load_prompts()[0]
+
+    plain = asyncio.run(run_burst(root_agent, prompt, args.requests))
+    wrapped = SingleFlightAgent(root_agent)
+    coalesced = asyncio.run(run_burst(wrapped, prompt, args.requests))
+
+    print(f"\n{args.requests} concurrent requests to {root_agent.name}: {prompt[:60]!r}")
+    print(f"{'':<14} {'Wall s':>8} {'Model calls':>12} {'Answers':>8}")
+    for label, r in (("independent", plain), ("single-flight", coalesced)):
+        print(f"{label:<14} {r['wall_seconds']:>8} {r['model_calls']:>12} {r['distinct_answers']:>8}")
+    print(f"Leaders: {wrapped.stats['leaders']}  followers: {wrapped.stats['followers']}  "
+          f"takeovers: {wrapped.stats['takeovers']}  uncoalesced: {wrapped.stats['uncoalesced']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Session-State Footprint Profiler
+Measures how many bytes each agent writes into session state, per key, for
+each invocation, separating:
+  - persisted: keys in event state deltas, which a persistent session service
+    stores and replays
+  - ephemeral: `temp:` keys in event deltas, which ADK keeps in memory only
+  - in-process: direct `ctx.session.state[...]` writes, including keys an
+    agent's `state.ephemeral_keys` config moved out of its deltas, attributed
+    to the innermost agent that was running when the value changed
+
+StateProfilerPlugin can be attached to any Runner; the CLI runs architectures
+against the offline fake model.
+
+Usage:
+    python3 tests/state_profile.py adk-agentic-architectures/09_tree_of_thoughts/
+    python3 tests/state_profile.py --all --top 5 --json state_profile.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.sessions.state import State
+
+from fake_model import AGENTS_DIR, install_fake_model
+from load_test import load_prompts, load_root_agent
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, default=str, sort_keys=True).encode("utf-8")
+
+
+def _fingerprint(state: Dict[str, Any]) -> Dict[str, Tuple[str, int]]:
+    result = {}
+    for key, value in state.items():
+        data = _encode(value)
+        result[key] = (hashlib.blake2b(data, digest_size=8).hexdigest(), len(data))
+    return result
+
+
+@dataclass
+class InvocationStateProfile:
+    """Bytes written per (agent, key) during one invocation."""
+    invocation_id: str
+    persisted: Dict[Tuple[str, str], int] = field(default_factory=lambda: defaultdict(int))
+    ephemeral: Dict[Tuple[str, str], int] = field(default_factory=lambda: defaultdict(int))
+    in_process: Dict[Tuple[str, str], int] = field(default_factory=lambda: defaultdict(int))
+    delta_events: int = 0
+    final_state_bytes: int = 0
+    _stack: List[Dict[str, Tuple[str, int]]] = field(default_factory=list)
+    _claimed: Dict[str, str] = field(default_factory=dict)
+
+    def by_agent(self) -> Dict[str, Dict[str, int]]:
+        agents: Dict[str, Dict[str, int]] = defaultdict(lambda: {"persisted": 0, "ephemeral": 0, "in_process": 0})
+        for kind in ("persisted", "ephemeral", "in_process"):
+            for (agent, _), size in getattr(self, kind).items():
+                agents[agent][kind] += size
+        return dict(agents)
+
+    def top_keys(self, n: int) -> List[Tuple[str, str, str, int]]:
+        rows = [
+            (agent, key, kind, size)
+            for kind in ("persisted", "ephemeral", "in_process")
+            for (agent, key), size in getattr(self, kind).items()
+        ]
+        return sorted(rows, key=lambda r: -r[3])[:n]
+
+    def to_dict(self) -> Dict[str, Any]:
+        def keyed(d):
+            return {f"{agent}:{key}": size for (agent, key), size in sorted(d.items())}
+        return {
+            "invocation_id": self.invocation_id,
+            "delta_events": self.delta_events,
+            "final_state_bytes": self.final_state_bytes,
+            "by_agent": self.by_agent(),
+            "persisted": keyed(self.persisted),
+            "ephemeral": keyed(self.ephemeral),
+            "in_process": keyed(self.in_process),
+        }
+
+
+class StateProfilerPlugin(BasePlugin):
+    """Records session-state bytes written per agent and key for every invocation."""
+
+    def __init__(self, name: str = "state_profiler"):
+        super().__init__(name=name)
+        self.profiles: Dict[str, InvocationStateProfile] = {}
+
+    def _profile(self, invocation_id: str) -> InvocationStateProfile:
+        if invocation_id not in self.profiles:
+            self.profiles[invocation_id] = InvocationStateProfile(invocation_id)
+        return self.profiles[invocation_id]
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        ctx = callback_context._invocation_context
+        self._profile(ctx.invocation_id)._stack.append(_fingerprint(ctx.session.state))
+        return None
+
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        ctx = callback_context._invocation_context
+        profile = self._profile(ctx.invocation_id)
+        before = profile._stack.pop() if profile._stack else {}
+        for key, (digest, size) in _fingerprint(ctx.session.state).items():
+            # Sub-agents finish first, so a change they already claimed is not re-attributed to the parent.
+            if before.get(key, (None,))[0] != digest and profile._claimed.get(key) != digest:
+                profile.in_process[(agent.name, key)] += size
+                profile._claimed[key] = digest
+        return None
+
+    async def on_event_callback(self, *, invocation_context: InvocationContext, event: Event) -> Optional[Event]:
+        delta = event.actions.state_delta if event.actions else None
+        profile = self._profile(invocation_context.invocation_id)
+        if delta:
+            profile.delta_events += 1
+            for key, value in delta.items():
+                kind = profile.ephemeral if key.startswith(State.TEMP_PREFIX) else profile.persisted
+                kind[(event.author, key)] += len(_encode(value))
+                profile._claimed[key] = hashlib.blake2b(_encode(value), digest_size=8).hexdigest()
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        profile = self._profile(invocation_context.invocation_id)
+        profile.final_state_bytes = len(_encode(invocation_context.session.state))
+
+
+async def profile_agent(root_agent: Any, prompts: List[str]) -> List[InvocationStateProfile]:
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+
+    plugin = StateProfilerPlugin()
+    runner = InMemoryRunner(agent=root_agent, app_name="state_profile", plugins=[plugin])
+    for prompt in prompts:
+        session = await runner.session_service.create_session(app_name="state_profile", user_id="profiler")
+        message = types.Content(role="user", parts=[types.Part(text=prompt)])
+        async for _ in runner.run_async(user_id="profiler", session_id=session.id, new_message=message):
+            pass
+    return list(plugin.profiles.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile session-state bytes written per agent and key.")
+    parser.add_argument("agent_dirs", nargs="*", help="Agent directories")
+    parser.add_argument("--all", action="store_true", help="Profile every NN_* agent")
+    parser.add_argument("--prompt", action="append", help="User message (repeatable); defaults to tests/behavior cases")
+    parser.add_argument("--top", type=int, default=8, help="Largest keys to list per agent")
+    parser.add_argument("--json", dest="json_path", help="Write per-invocation profiles to this file")
+    args = parser.parse_args()
+
+    agent_dirs = [Path(d) for d in args.agent_dirs]
+    if args.all:
+        agent_dirs += sorted(AGENTS_DIR.glob("[0-9][0-9]_*"))
+    if not agent_dirs:
+        parser.error("pass agent directories or --all")
+
+    install_fake_model()
+    prompts = args.prompt or load_prompts()
+    report: Dict[str, Any] = {}
+    for agent_dir in agent_dirs:
+        profiles = asyncio.run(profile_agent(load_root_agent(str(agent_dir)), prompts))
+        report[agent_dir.name] = [p.to_dict() for p in profiles]
+
+        totals: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        keys: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        for p in profiles:
+            for agent, sizes in p.by_agent().items():
+                for kind, size in sizes.items():
+                    totals[agent][kind] += size
+            for agent, key, kind, size in p.top_keys(10 ** 6):
+                keys[(agent, key, kind)] += size
+        n = max(1, len(profiles))
+
+        print(f"\n{'='*78}")
+        print(f"{agent_dir.name}: {len(profiles)} invocations, mean bytes per invocation")
+        print(f"{'='*78}")
+        print(f"{'Agent':<32} {'Persisted':>12} {'Ephemeral':>12} {'In-process':>12}")
+        for agent, sizes in sorted(totals.items(), key=lambda kv: -sum(kv[1].values())):
+            print(f"{agent:<32} {sizes['persisted'] // n:>12} {sizes['ephemeral'] // n:>12} {sizes['in_process'] // n:>12}")
+        print(f"\nTop keys:")
+        for (agent, key, kind), size in sorted(keys.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"  {agent + ':' + key:<50} {kind:<11} {size // n:>10}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nProfiles written to {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
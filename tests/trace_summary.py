@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Trace Summary
+Summarizes an OTLP/JSON trace written by TracingPlugin
+(adk-agentic-architectures/tracing.py): span count, total and mean duration,
+time to first event and tokens per span name.
+
+Usage:
+    python3 tests/load_test.py adk-agentic-architectures/03_ReAct/ --trace trace.jsonl
+    python3 tests/trace_summary.py trace.jsonl
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+AGENTS_DIR = REPO_ROOT / "adk-agentic-architectures"
+# Like `adk`, put the agents directory on sys.path so shared modules (tracing) import.
+sys.path.insert(0, str(AGENTS_DIR))
+
+from tracing import load_spans  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize an OTLP/JSON trace written by TracingPlugin.")
+    parser.add_argument("trace_file")
+    args = parser.parse_args()
+
+    by_name: Dict[str, List[float]] = defaultdict(list)
+    tokens: Dict[str, int] = defaultdict(int)
+    ttfe: Dict[str, List[float]] = defaultdict(list)
+    traces = set()
+    for span in load_spans(args.trace_file):
+        traces.add(span["traceId"])
+        duration = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+        by_name[span["name"]].append(duration)
+        attrs = span["attributes"]
+        tokens[span["name"]] += int(attrs.get("llm.prompt_tokens", 0)) + int(attrs.get("llm.completion_tokens", 0))
+        if "time_to_first_event_ms" in attrs:
+            ttfe[span["name"]].append(float(attrs["time_to_first_event_ms"]))
+
+    print(f"\n{len(traces)} invocations")
+    print(f"{'Span':<40} {'Count':>6} {'Total ms':>10} {'Mean ms':>9} {'TTFE ms':>9} {'Tokens':>8}")
+    for name, durations in sorted(by_name.items(), key=lambda kv: -sum(kv[1])):
+        first = sum(ttfe[name]) / len(ttfe[name]) if ttfe[name] else 0.0
+        print(f"{name:<40} {len(durations):>6} {sum(durations):>10.2f} {sum(durations) / len(durations):>9.2f} "
+              f"{first:>9.2f} {tokens[name]:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
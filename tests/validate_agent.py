@@ -3,12 +3,43 @@
 Agent Structure Validator
 Checks if an agent is correctly configured BEFORE running eval tests.
 This catches code/config errors early, separate from AI behavior issues.
+
+Many agents can be validated in one process: each is imported under its own
+module name, and --workers N spreads them across a forked process pool that
+shares the parent's already-imported google.adk.
+
+Usage:
+    python3 tests/validate_agent.py adk-agentic-architectures/01_reflection/
+    python3 tests/validate_agent.py --all --workers 4 --json structure.json
 """
 
+import argparse
+import json
+import multiprocessing
+import re
 import sys
 import os
 import importlib.util
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
+from typing import List, Optional
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent / "adk-agentic-architectures"
+
+
+@dataclass
+class ValidationResult:
+    agent_path: str
+    success: bool
+    errors: List[str] = field(default_factory=list)
+    duration: float = 0.0
+
+
+def _module_name(agent_path: Path) -> str:
+    """Unique module name per agent directory so several can be imported side by side."""
+    return "validate_" + re.sub(r"\W", "_", agent_path.resolve().name)
 
 def validate_agent_structure(agent_path: str) -> tuple[bool, list[str]]:
     """
@@ -32,10 +63,14 @@ def validate_agent_structure(agent_path: str) -> tuple[bool, list[str]]:
     
     # Check 3: Can import module
     try:
-        spec = importlib.util.spec_from_file_location("test_agent", init_file)
+        module_name = _module_name(agent_path)
+        # Like `adk`, put the agents directory on sys.path so shared modules (agent_tools) import.
+        if str(agent_path.resolve().parent) not in sys.path:
+            sys.path.insert(0, str(agent_path.resolve().parent))
+        spec = importlib.util.spec_from_file_location(module_name, init_file)
         if spec and spec.loader:
             module = importlib.util.module_from_spec(spec)
-            sys.modules["test_agent"] = module
+            sys.modules[module_name] = module
             spec.loader.exec_module(module)
         else:
             errors.append("Could not load module spec")
@@ -96,20 +131,30 @@ def validate_agent_structure(agent_path: str) -> tuple[bool, list[str]]:
     
     return True, []
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python validate_agent.py <agent_directory>")
-        print("Example: python validate_agent.py agent/")
-        sys.exit(1)
-    
-    agent_path = sys.argv[1]
+def _validate_one(agent_path: str) -> ValidationResult:
+    start = time.perf_counter()
+    success, errors = validate_agent_structure(agent_path)
+    return ValidationResult(str(agent_path), success, errors, round(time.perf_counter() - start, 4))
+
+def validate_agents(agent_paths: List[str], workers: int = 1) -> List[ValidationResult]:
+    """
+    Validate many agent directories, in this process or across `workers` forked processes.
     
+    Returns:
+        One ValidationResult per path, in the order given.
+    """
+    if workers <= 1 or len(agent_paths) <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return [_validate_one(p) for p in agent_paths]
+    # Import ADK once here so every forked worker starts with it loaded.
+    import google.adk.agents  # noqa: F401
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+        return list(pool.map(_validate_one, agent_paths))
+
+def _print_single(agent_path: str, success: bool, errors: List[str]) -> int:
     print(f"\n{'='*60}")
     print(f"Validating Agent Structure: {agent_path}")
     print(f"{'='*60}\n")
     
-    success, errors = validate_agent_structure(agent_path)
-    
     if success:
         print("✅ All structure checks PASSED")
         print("\nAgent is correctly configured and ready for eval testing.")
@@ -126,6 +171,48 @@ def main():
         print("These are CODE/CONFIGURATION errors, not AI issues.")
         return 1
 
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Validate agent structure before running eval tests.")
+    parser.add_argument("agent_dirs", nargs="*", help="Agent directories, e.g. agent/")
+    parser.add_argument("--all", action="store_true", help="Validate every NN_* agent in adk-agentic-architectures/")
+    parser.add_argument("--workers", type=int, default=1, help="Validate across this many processes")
+    parser.add_argument("--json", dest="json_path", help="Write structured results to this file ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    agent_paths = list(args.agent_dirs)
+    if args.all:
+        agent_paths += [str(p) for p in sorted(AGENTS_DIR.glob("[0-9][0-9]_*"))]
+    if not agent_paths:
+        parser.print_usage()
+        print("Example: python validate_agent.py agent/")
+        return 1
+
+    start = time.perf_counter()
+    results = validate_agents(agent_paths, args.workers)
+    wall = time.perf_counter() - start
+
+    if args.json_path:
+        payload = json.dumps({"wall_seconds": round(wall, 4), "results": [asdict(r) for r in results]}, indent=2)
+        if args.json_path == "-":
+            print(payload)
+            return 0 if all(r.success for r in results) else 1
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+
+    if len(results) == 1:
+        return _print_single(results[0].agent_path, results[0].success, results[0].errors)
+
+    print(f"\n{'='*60}")
+    print(f"Validating Agent Structure: {len(results)} agents")
+    print(f"{'='*60}\n")
+    for r in results:
+        print(f"{'✅' if r.success else '❌'} {Path(r.agent_path).name:<32} {r.duration:.2f}s")
+        for i, error in enumerate(r.errors, 1):
+            print(f"     {i}. {error}")
+    failed = sum(not r.success for r in results)
+    print(f"\n{len(results) - failed}/{len(results)} passed in {wall:.2f}s")
+    return 1 if failed else 0
+
 if __name__ == "__main__":
     sys.exit(main())
 